@@ -2,27 +2,33 @@
 Public API.
 """
 
-from . import layout, lexer, primitive, scannerless, sequence
+from . import (
+    codegen, layout, lexer, operators, primitive, scannerless, sequence
+)
 from .core.repair import Insert, RepairOp, Skip
 from .core.types import Loc
 from .parser import (
-    Delay, Parser, Tuple2, Tuple3, Tuple4, Tuple5, Tuple6, Tuple7, Tuple8,
-    TupleParser, alt, attempt, between, bind, chainl1, chainr1, fmap, label,
-    many, maybe, recover, recover_with, recover_with_fn, sep_by, seq, seql,
-    seqr
+    Delay, Feeder, Parser, Tuple2, Tuple3, Tuple4, Tuple5, Tuple6, Tuple7,
+    Tuple8, TupleParser, alt, attempt, between, bind, chainl1, chainr1,
+    collect_into, fmap, fold, label, many, maybe, memo, recover, recover_with,
+    recover_with_fn, sep_by, sep_by1, seq, seql, seqr, skip_many, skip_many1,
+    tap
 )
 from .types import ErrorItem, ParseError, ParseResult
 
 __all__ = (
-    "layout", "lexer", "primitive", "scannerless", "sequence",
+    "codegen", "layout", "lexer", "operators", "primitive", "scannerless",
+    "sequence",
     "Insert", "RepairOp", "Skip",
     "Loc",
     "ErrorItem", "ParseError", "ParseResult",
 
-    "Delay", "Parser", "Tuple2", "Tuple3", "Tuple4", "Tuple5", "Tuple6",
-    "Tuple7", "Tuple8", "TupleParser", "alt", "attempt", "between", "bind",
-    "chainl1", "chainr1", "fmap", "label", "many", "maybe", "recover",
-    "recover_with", "recover_with_fn", "sep_by", "seq", "seql", "seqr"
+    "Delay", "Feeder", "Parser", "Tuple2", "Tuple3", "Tuple4", "Tuple5",
+    "Tuple6", "Tuple7", "Tuple8", "TupleParser", "alt", "attempt", "between",
+    "bind", "chainl1", "chainr1", "collect_into", "fmap", "fold", "label",
+    "many", "maybe", "memo", "recover", "recover_with", "recover_with_fn",
+    "sep_by", "sep_by1", "seq", "seql", "seqr", "skip_many", "skip_many1",
+    "tap"
 )
 
 __version__ = "0.4.3"
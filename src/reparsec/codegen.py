@@ -0,0 +1,1266 @@
+"""
+Code generator that compiles parsers into Python source.
+"""
+
+import importlib.util
+import itertools
+import linecache
+import re
+from typing import (
+    Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence,
+    Tuple, TypeVar
+)
+
+from .core import combinators, scannerless, sequence
+from .core.chain import Append
+from .core.memo import memo
+from .core.parser import ParseFns, ParseObj
+from .core.result import Error, Ok
+from .parser import FnParser, TupleParser
+
+__all__ = ("compile_parser",)
+
+S = TypeVar("S")
+A = TypeVar("A")
+
+_MAX_INDENT = 40
+_MAX_LOOPS = 10
+_MAX_SHARED_SIZE = 16
+
+_modules = itertools.count()
+
+
+def _children(fns: ParseFns[Any, Any]) -> Iterator[ParseFns[Any, Any]]:
+    node = fns.node
+    if node is None or node[0] == "memo":
+        return
+    if node[0] == "dispatch":
+        yield from node[1]
+        return
+    for arg in node[1:]:
+        if isinstance(arg, ParseFns):
+            yield arg
+
+
+def _resolve(fns: ParseFns[S, A]) -> ParseFns[S, A]:
+    node = fns.node
+    while node is not None and node[0] == "delay":
+        resolved: ParseFns[S, A] = node[1].to_fns()
+        if resolved.node == node:
+            break
+        fns = resolved
+        node = fns.node
+    return fns
+
+
+class _Piece:
+    """
+    Part of a regular sub-grammar fused into a single regular expression.
+
+    ``plan`` describes how to rebuild the results of the original parsers
+    from the match, ``expected`` is the expected labels of the original
+    parser when it fails without consuming input, or None if they depend on
+    the input. ``located`` is set if such a failure may be located after
+    the start, where a part wrapped into :meth:`Parser.attempt` has failed.
+    """
+
+    __slots__ = (
+        "plan", "pattern", "group", "atomic", "fails", "committing",
+        "expected", "located", "empty", "leaves"
+    )
+
+    def __init__(
+            self, plan: Tuple[Any, ...], pattern: str, *,
+            group: Optional[str] = None, atomic: bool = False,
+            fails: bool = True, committing: bool = False,
+            expected: Optional[Iterable[str]] = None, located: bool = False,
+            empty: bool = False, leaves: int = 1):
+        self.plan = plan
+        self.pattern = pattern
+        self.group = group
+        self.atomic = atomic
+        self.fails = fails
+        self.committing = committing
+        self.expected = expected
+        self.located = located
+        self.empty = empty
+        self.leaves = leaves
+
+
+class _Fuser:
+    """
+    Fuses sub-grammars made of literals, regular expressions, sequences,
+    alternatives, options and repetitions into a single regular expression.
+
+    Parsers never backtrack into a parser that has succeeded, so every part
+    that can be followed by something else is wrapped into an emulated atomic
+    group, ``(?=(?P<g>...))(?P=g)``. Alternatives, options and repetitions
+    are only fused over parts that fail without consuming input, where the
+    backtracking of regular expressions matches the parsers.
+    """
+
+    def __init__(self) -> None:
+        self._groups = 0
+
+    def _group(self) -> str:
+        self._groups += 1
+        return "g{}".format(self._groups)
+
+    def _atomic(self, piece: _Piece) -> str:
+        if piece.atomic:
+            return piece.pattern
+        if piece.group is not None:
+            return "(?={})(?P={})".format(piece.pattern, piece.group)
+        g = self._group()
+        return "(?=(?P<{}>{}))(?P={})".format(g, piece.pattern, g)
+
+    def fuse(self, fns: ParseFns[Any, Any], used: bool) -> Optional[_Piece]:
+        fns = _resolve(fns)
+        node = fns.node
+        if node is None:
+            return None
+        fuse: Optional[Callable[[Any, bool], Optional[_Piece]]] = getattr(
+            self, "_fuse_" + node[0], None
+        )
+        return None if fuse is None else fuse(node, used)
+
+    def _fuse_literal(self, node: Any, used: bool) -> Optional[_Piece]:
+        _, s, trivia = node
+        if trivia is None:
+            return _Piece(
+                ("literal", s), re.escape(s), atomic=True,
+                expected=[repr(s)]
+            )
+        if scannerless.embed_width(trivia, 0) is None:
+            return None
+        return _Piece(
+            ("literal", s), "{}(?:{})".format(re.escape(s), trivia.pattern),
+            expected=[repr(s)]
+        )
+
+    def _fuse_regexp(self, node: Any, used: bool) -> Optional[_Piece]:
+        _, pat, group, trivia = node
+        width = scannerless.embed_width(pat, group)
+        if width is None:
+            return None
+        g = self._group()
+        if trivia is None:
+            return _Piece(
+                ("regexp", g, group if used else None, not width, g),
+                "(?P<{}>{})".format(g, pat.pattern), group=g, expected=(),
+                empty=not width
+            )
+        if scannerless.embed_width(trivia, 0) is None:
+            return None
+        # The token is matched by an inner group, which the value is taken
+        # from, and the outer group includes the trivia
+        inner = self._group()
+        return _Piece(
+            ("regexp", inner, group if used else None, not width, g),
+            "(?P<{}>(?P<{}>{})(?:{}))".format(
+                g, inner, pat.pattern, trivia.pattern
+            ), group=g, expected=(), empty=not width
+        )
+
+    def _fuse_label(self, node: Any, used: bool) -> Optional[_Piece]:
+        _, parse_fns, expected = node
+        piece = self.fuse(parse_fns, used)
+        if piece is not None:
+            piece.plan = ("label", piece.plan, expected)
+            if not piece.committing:
+                piece.expected = expected
+        return piece
+
+    def _fuse_fmap(self, node: Any, used: bool) -> Optional[_Piece]:
+        _, parse_fns, fn = node
+        # The function is called only for the values that are used
+        piece = self.fuse(parse_fns, True) if used else None
+        if piece is not None:
+            piece.plan = ("fmap", piece.plan, fn)
+        return piece
+
+    def _fuse_id(self, node: Any, used: bool) -> Optional[_Piece]:
+        return self.fuse(node[1], used)
+
+    def _fuse_attempt(self, node: Any, used: bool) -> Optional[_Piece]:
+        piece = self.fuse(node[1], used)
+        if piece is not None and piece.committing:
+            # The error is no longer consumed, but keeps its location
+            piece.committing = False
+            piece.expected = None
+            piece.located = True
+        return piece
+
+    def _fuse_seq(self, node: Any, used: bool) -> Optional[_Piece]:
+        _, parse_fns, second_fns, merge = node
+        if merge is combinators.merge_left:
+            first = self.fuse(parse_fns, used)
+            second = self.fuse(second_fns, False)
+        elif merge is combinators.merge_right:
+            first = self.fuse(parse_fns, False)
+            second = self.fuse(second_fns, used)
+        elif used:
+            first = self.fuse(parse_fns, True)
+            second = self.fuse(second_fns, True)
+        else:
+            return None
+        if first is None or second is None:
+            return None
+        committing = first.committing or second.committing or second.fails
+        return _Piece(
+            ("seq", first.plan, second.plan, merge if used else None),
+            self._atomic(first) + second.pattern,
+            fails=first.fails or second.fails, committing=committing,
+            expected=None if committing else first.expected,
+            located=first.located or second.located,
+            empty=first.empty and second.empty,
+            leaves=first.leaves + second.leaves
+        )
+
+    def _fuse_alt(self, node: Any, used: bool) -> Optional[_Piece]:
+        alts = [node[2]]
+        first = _resolve(node[1])
+        while first.node is not None and first.node[0] == "alt":
+            alts.append(first.node[2])
+            first = _resolve(first.node[1])
+        if first.node is not None and first.node[0] == "dispatch":
+            alts.extend(reversed(first.node[1]))
+        else:
+            alts.append(first)
+        return self._alternatives(alts[::-1], used)
+
+    def _fuse_dispatch(self, node: Any, used: bool) -> Optional[_Piece]:
+        return self._alternatives(node[1], used)
+
+    def _alternatives(
+            self, alts: Sequence[ParseFns[Any, Any]],
+            used: bool) -> Optional[_Piece]:
+        branches: List[Tuple[str, Tuple[Any, ...], object]] = []
+        patterns: List[str] = []
+        prefix: Optional[Iterable[str]] = None
+        leaves = 0
+        empty = False
+        piece: Optional[_Piece] = None
+        for parse_fns in alts:
+            if piece is not None:
+                # The previous alternative fails without consuming input
+                if piece.expected is None or piece.located:
+                    return None
+                prefix = (
+                    piece.expected if prefix is None
+                    else Append(prefix, piece.expected)
+                )
+            piece = self.fuse(parse_fns, used)
+            if piece is None or piece.committing:
+                return None
+            g = piece.group
+            pattern = piece.pattern
+            if g is None:
+                g = self._group()
+                pattern = "(?P<{}>{})".format(g, pattern)
+            branches.append((g, piece.plan, prefix))
+            patterns.append(pattern)
+            leaves += piece.leaves
+            empty = empty or piece.empty
+            if not piece.fails:
+                break
+        assert piece is not None
+        return _Piece(
+            ("alt", branches), "(?:{})".format("|".join(patterns)),
+            fails=piece.fails,
+            expected=(
+                None if piece.expected is None
+                else piece.expected if prefix is None
+                else Append(prefix, piece.expected)
+            ),
+            located=piece.located, empty=empty, leaves=leaves
+        )
+
+    def _fuse_maybe(self, node: Any, used: bool) -> Optional[_Piece]:
+        piece = self.fuse(node[1], used)
+        if piece is None or piece.committing:
+            return None
+        if not piece.fails:
+            return piece
+        if piece.expected is None or piece.located:
+            return None
+        pattern = piece.pattern
+        g = piece.group
+        if g is None:
+            g = self._group()
+            pattern = "(?P<{}>{})".format(g, pattern)
+        return _Piece(
+            ("maybe", g, piece.plan, piece.expected), pattern + "?",
+            fails=False, empty=True, leaves=piece.leaves
+        )
+
+    def _fuse_many(self, node: Any, used: bool) -> Optional[_Piece]:
+        # The values of the items are not rebuilt from the match
+        piece = None if used else self.fuse(node[1], False)
+        if (
+                piece is None or piece.committing or piece.empty or
+                piece.expected is None or piece.located):
+            return None
+        g = self._group()
+        return _Piece(
+            ("many", g, piece.expected),
+            "(?P<{}>(?:{})*)".format(g, self._atomic(piece)), group=g,
+            fails=False, empty=True, leaves=piece.leaves
+        )
+
+    def _fuse_skip_many(self, node: Any, used: bool) -> Optional[_Piece]:
+        _, parse_fns, empty = node
+        if not empty:
+            return None
+        return self._fuse_many(("many", parse_fns), False)
+
+
+class _Compiler:
+    def __init__(self) -> None:
+        self._consts: Dict[int, str] = {}
+        self._values: Dict[str, object] = {
+            "Ok": Ok, "Error": Error, "Append": Append,
+            "lookup": combinators.lookup,
+        }
+        self._functions: Dict[int, str] = {}
+        self._queue: List[Tuple[str, ParseFns[Any, Any]]] = []
+        self._memos: List[Tuple[str, ParseFns[Any, Any]]] = []
+        self._refs: Dict[int, int] = {}
+        self._sizes: Dict[int, int] = {}
+        self._source: List[str] = []
+        self._lines: List[str] = []
+        self._indent = 0
+        self._loops = 0
+        self._vars = 0
+        self._uses_len = False
+        self._uses_kinds = False
+        self._fusing = False
+
+    def compile(self, fns: ParseFns[S, A]) -> Callable[..., Any]:
+        fns = _resolve(fns)
+        self._count(fns)
+        root = self._function(fns)
+        while self._queue:
+            self._generate(*self._queue.pop())
+
+        module_name = "reparsec._generated_{}".format(next(_modules))
+        filename = "<{}>".format(module_name)
+        source = "\n".join(self._source) + "\n"
+        linecache.cache[filename] = (
+            len(source), None, source.splitlines(True), filename
+        )
+        spec = importlib.util.spec_from_loader(module_name, loader=None)
+        assert spec is not None
+        module = importlib.util.module_from_spec(spec)
+        module.__dict__.update(self._values)
+        exec(compile(source, filename, "exec"), module.__dict__)
+        for name, inner in self._memos:
+            setattr(
+                module, "m" + name,
+                memo(ParseFns(getattr(module, "b" + name), inner.fn)).fast_fn
+            )
+        fn: Callable[..., Any] = getattr(module, root)
+        return fn
+
+    def _count(self, fns: ParseFns[Any, Any]) -> None:
+        stack = [_resolve(fns)]
+        while stack:
+            fns = stack.pop()
+            key = id(fns)
+            refs = self._refs.get(key, 0)
+            self._refs[key] = refs + 1
+            if refs:
+                continue
+            if fns.node is not None and fns.node[0] == "memo":
+                stack.append(_resolve(fns.node[1]))
+            stack.extend(_resolve(child) for child in _children(fns))
+
+    def _size(self, fns: ParseFns[Any, Any]) -> int:
+        key = id(fns)
+        size = self._sizes.get(key)
+        if size is None:
+            size = 1 + sum(
+                self._size(_resolve(child)) for child in _children(fns)
+            )
+            self._sizes[key] = min(size, _MAX_SHARED_SIZE + 1)
+        return size
+
+    def _const(self, value: object) -> str:
+        key = id(value)
+        name = self._consts.get(key)
+        if name is None:
+            name = "K{}".format(len(self._consts))
+            self._consts[key] = name
+            self._values[name] = value
+        return name
+
+    def _function(self, fns: ParseFns[Any, Any]) -> str:
+        key = id(fns)
+        name = self._functions.get(key)
+        if name is None:
+            name = "_{}".format(len(self._functions))
+            self._functions[key] = name
+            self._queue.append((name, fns))
+        return name
+
+    def _var(self) -> int:
+        self._vars += 1
+        return self._vars
+
+    def _line(self, line: str) -> None:
+        self._lines.append("    " * self._indent + line)
+
+    def _generate(self, name: str, fns: ParseFns[Any, Any]) -> None:
+        node = fns.node
+        is_memo = node is not None and node[0] == "memo"
+        inner = _resolve(node[1]) if is_memo and node is not None else fns
+
+        self._lines = []
+        self._indent = 1
+        self._loops = 0
+        self._vars = 0
+        self._uses_len = False
+        self._uses_kinds = False
+        o = self._var()
+        if is_memo:
+            self._emit_inline(inner, "pos", "ctx", o)
+        else:
+            self._emit_node(inner, "pos", "ctx", o)
+        self._line("if ok{}:".format(o))
+        self._line("    return Ok(v{0}, p{0}, c{0}, e{0}, k{0})".format(o))
+        self._line("return Error(l{0}, e{0}, k{0})".format(o))
+        body = self._lines
+        if self._uses_kinds:
+            body = [
+                "    ks = stream.kinds if isinstance(stream, {}) else None"
+                .format(self._const(sequence.KindArray))
+            ] + body
+        if self._uses_len:
+            body = ["    ls = len(stream)"] + body
+
+        self._source.append("def {}(stream, pos, ctx):".format(name))
+        if is_memo:
+            self._memos.append((name, inner))
+            self._source.extend([
+                "    if ctx.memo is not None:",
+                "        return m{}(stream, pos, ctx)".format(name),
+            ])
+        self._source.extend(body)
+        self._source.append("")
+        if is_memo:
+            self._source.append("def b{}(stream, pos, ctx):".format(name))
+            self._source.extend(body)
+            self._source.append("")
+
+    def _emit(
+            self, fns: ParseFns[Any, Any], pos: str, ctx: str,
+            o: int) -> None:
+        fns = _resolve(fns)
+        node = fns.node
+        if node is None or node[0] in ("memo", "delay"):
+            self._emit_node(fns, pos, ctx, o)
+        elif (
+                self._indent > _MAX_INDENT or self._loops > _MAX_LOOPS or
+                self._refs.get(id(fns), 0) > 1 and
+                self._size(fns) > _MAX_SHARED_SIZE):
+            self._emit_call(self._function(fns), pos, ctx, o)
+        else:
+            self._emit_inline(fns, pos, ctx, o)
+
+    def _emit_node(
+            self, fns: ParseFns[Any, Any], pos: str, ctx: str,
+            o: int) -> None:
+        node = fns.node
+        if node is None or node[0] == "delay":
+            self._emit_call(self._const(fns.fast_fn), pos, ctx, o)
+        elif node[0] == "memo":
+            self._emit_call(self._function(fns), pos, ctx, o)
+        else:
+            self._emit_inline(fns, pos, ctx, o)
+
+    def _emit_inline(
+            self, fns: ParseFns[Any, Any], pos: str, ctx: str,
+            o: int) -> None:
+        node = fns.node
+        if node is None or node[0] in ("memo", "delay"):
+            self._emit_node(fns, pos, ctx, o)
+            return
+        if not self._fusing and self._emit_fused(fns, pos, ctx, o):
+            return
+        getattr(self, "_emit_" + node[0])(node, pos, ctx, o)
+
+    def _emit_fused(
+            self, fns: ParseFns[Any, Any], pos: str, ctx: str,
+            o: int) -> bool:
+        node = fns.node
+        assert node is not None
+        if node[0] in ("literal", "regexp"):
+            return False
+        piece = _Fuser().fuse(fns, True)
+        if piece is None or piece.leaves < 2:
+            return False
+        try:
+            pat = re.compile(piece.pattern)
+        except re.error:  # pragma: no cover
+            return False
+        line = self._line
+        line("m{} = {}(stream, {})".format(o, self._const(pat.match), pos))
+        self._block("if m{} is not None:".format(o))
+        self._emit_plan(piece.plan, "m{}".format(o), pat.groupindex, o, True)
+        line("ok{} = True".format(o))
+        line("p{0} = m{0}.end()".format(o))
+        line("c{0} = {1}.update_loc(stream, p{0})".format(o, ctx))
+        self._end()
+        self._block("else:")
+        if piece.committing or piece.expected is None or piece.located:
+            # The match fails somewhere inside, the original parsers find
+            # where and why
+            self._fusing = True
+            getattr(self, "_emit_" + node[0])(node, pos, ctx, o)
+            self._fusing = False
+        else:
+            self._error(
+                o, "{}.get_loc(stream, {})".format(ctx, pos),
+                self._const(piece.expected)
+            )
+        self._end()
+        return True
+
+    def _emit_plan(
+            self, plan: Tuple[Any, ...], m: str, groups: Mapping[str, int],
+            o: int, last: bool) -> bool:
+        # Rebuilds the results of the original parsers from the match,
+        # returns True if the part always consumes input
+        consumed: bool = getattr(self, "_plan_" + plan[0])(
+            plan, m, groups, o, last
+        )
+        return consumed
+
+    def _plan_literal(
+            self, plan: Any, m: str, groups: Mapping[str, int], o: int,
+            last: bool) -> bool:
+        self._line("v{} = {}".format(o, self._const(plan[1])))
+        self._line("e{} = ()".format(o))
+        self._line("k{} = True".format(o))
+        return True
+
+    def _plan_regexp(
+            self, plan: Any, m: str, groups: Mapping[str, int], o: int,
+            last: bool) -> bool:
+        _, inner, group, empty, g = plan
+        self._line("v{} = {}".format(
+            o, "None" if group is None else "{}.group({})".format(
+                m, groups[inner] + group
+            )
+        ))
+        self._line("e{} = ()".format(o))
+        self._line("k{} = {}".format(
+            o, "{0}.start({1}) != {0}.end({1})".format(m, groups[g])
+            if empty else "True"
+        ))
+        return not empty
+
+    def _plan_label(
+            self, plan: Any, m: str, groups: Mapping[str, int], o: int,
+            last: bool) -> bool:
+        consumed = self._emit_plan(plan[1], m, groups, o, last)
+        if not consumed:
+            self._line("if not k{}:".format(o))
+            self._line("    e{} = {}".format(o, self._const(plan[2])))
+        return consumed
+
+    def _plan_fmap(
+            self, plan: Any, m: str, groups: Mapping[str, int], o: int,
+            last: bool) -> bool:
+        consumed = self._emit_plan(plan[1], m, groups, o, last)
+        self._line("v{0} = {1}(v{0})".format(o, self._const(plan[2])))
+        return consumed
+
+    def _plan_seq(
+            self, plan: Any, m: str, groups: Mapping[str, int], o: int,
+            last: bool) -> bool:
+        _, first, second, merge = plan
+        consumed = self._emit_plan(first, m, groups, o, False)
+        q = self._var()
+        if self._emit_plan(second, m, groups, q, False):
+            self._line("e{} = e{}".format(o, q))
+            self._line("k{} = True".format(o))
+            consumed = True
+        else:
+            self._emit_prepend(o, q)
+        if merge is not None:
+            self._emit_merge(merge, o, q)
+        return consumed
+
+    def _plan_alt(
+            self, plan: Any, m: str, groups: Mapping[str, int], o: int,
+            last: bool) -> bool:
+        branches = plan[1]
+        if last:
+            # Nothing follows the alternatives, so the group of the matched
+            # one is closed last
+            self._line("g{} = {}.lastgroup".format(o, m))
+        consumed = True
+        for n, (g, branch, prefix) in enumerate(branches):
+            if n < len(branches) - 1:
+                self._block("{} {}:".format(
+                    "elif" if n else "if",
+                    "g{} == {!r}".format(o, g) if last
+                    else "{}.start({}) != -1".format(m, groups[g])
+                ))
+            elif n:
+                self._block("else:")
+            if not self._emit_plan(branch, m, groups, o, False):
+                consumed = False
+                if prefix is not None:
+                    self._line("if not k{}:".format(o))
+                    self._line("    e{0} = Append({1}, e{0})".format(
+                        o, self._const(prefix)
+                    ))
+            if n or len(branches) > 1:
+                self._end()
+        return consumed
+
+    def _plan_maybe(
+            self, plan: Any, m: str, groups: Mapping[str, int], o: int,
+            last: bool) -> bool:
+        _, g, inner, expected = plan
+        self._block("if {}.start({}) != -1:".format(m, groups[g]))
+        self._emit_plan(inner, m, groups, o, False)
+        self._end()
+        self._block("else:")
+        self._line("v{} = None".format(o))
+        self._line("e{} = {}".format(o, self._const(expected)))
+        self._line("k{} = False".format(o))
+        self._end()
+        return False
+
+    def _plan_many(
+            self, plan: Any, m: str, groups: Mapping[str, int], o: int,
+            last: bool) -> bool:
+        _, g, expected = plan
+        self._line("v{} = None".format(o))
+        self._line("e{} = {}".format(o, self._const(expected)))
+        self._line("k{0} = {1}.start({2}) != {1}.end({2})".format(
+            o, m, groups[g]
+        ))
+        return False
+
+    def _emit_call(self, fn: str, pos: str, ctx: str, o: int) -> None:
+        self._emit_unpack("{}(stream, {}, {})".format(fn, pos, ctx), o)
+
+    def _emit_unpack(self, expr: str, o: int) -> None:
+        line = self._line
+        line("r{} = {}".format(o, expr))
+        line("if type(r{}) is Ok:".format(o))
+        line("    ok{0} = True".format(o))
+        line("    v{0} = r{0}.value".format(o))
+        line("    p{0} = r{0}.pos".format(o))
+        line("    c{0} = r{0}.ctx".format(o))
+        line("else:")
+        line("    ok{0} = False".format(o))
+        line("    l{0} = r{0}.loc".format(o))
+        line("e{0} = r{0}.expected".format(o))
+        line("k{0} = r{0}.consumed".format(o))
+
+    def _ok(self, o: int, v: str, p: str, c: str, k: str) -> None:
+        line = self._line
+        line("ok{} = True".format(o))
+        line("v{} = {}".format(o, v))
+        line("p{} = {}".format(o, p))
+        line("c{} = {}".format(o, c))
+        line("e{} = ()".format(o))
+        line("k{} = {}".format(o, k))
+
+    def _error(self, o: int, loc: str, expected: str) -> None:
+        line = self._line
+        line("ok{} = False".format(o))
+        line("l{} = {}".format(o, loc))
+        line("e{} = {}".format(o, expected))
+        line("k{} = False".format(o))
+
+    def _block(self, header: str) -> None:
+        self._line(header)
+        self._indent += 1
+
+    def _end(self) -> None:
+        self._indent -= 1
+
+    def _has(self, pos: str) -> str:
+        # The length is taken once per function, a lazily read stream may
+        # have grown since then
+        self._uses_len = True
+        return "({0} < ls or {0} < len(stream))".format(pos)
+
+    def _emit_sym(self, node: Any, pos: str, ctx: str, o: int) -> None:
+        _, s, expected = node
+        self._uses_len = True
+        self._block("if {} and stream[{}] == {}:".format(
+            self._has(pos), pos, self._const(s)
+        ))
+        self._ok(o, "stream[{}]".format(pos), pos + " + 1", ctx, "True")
+        self._end()
+        self._block("else:")
+        self._error(
+            o, "{}.get_loc(stream, {})".format(ctx, pos),
+            self._const(expected)
+        )
+        self._end()
+
+    def _emit_satisfy(self, node: Any, pos: str, ctx: str, o: int) -> None:
+        _, test = node
+        self._uses_len = True
+        self._block("if {} and {}(stream[{}]):".format(
+            self._has(pos), self._const(test), pos
+        ))
+        self._ok(o, "stream[{}]".format(pos), pos + " + 1", ctx, "True")
+        self._end()
+        self._block("else:")
+        self._error(o, "{}.get_loc(stream, {})".format(ctx, pos), "()")
+        self._end()
+
+    def _emit_token(self, node: Any, pos: str, ctx: str, o: int) -> None:
+        _, kind, kid, expected = node
+        self._uses_len = True
+        self._uses_kinds = True
+        self._block(
+            "if {3} and (stream[{0}].kind == {1} if ks is None "
+            "else ks[{0}] == {2}):".format(
+                pos, self._const(kind), kid, self._has(pos)
+            )
+        )
+        self._ok(o, "stream[{}]".format(pos), pos + " + 1", ctx, "True")
+        self._end()
+        self._block("else:")
+        self._error(
+            o, "{}.get_loc(stream, {})".format(ctx, pos),
+            self._const(expected)
+        )
+        self._end()
+
+    def _emit_punct(self, node: Any, pos: str, ctx: str, o: int) -> None:
+        _, s, expected = node
+        kv = self._const(s.value)
+        self._uses_len = True
+        self._uses_kinds = True
+        self._block(
+            "if {5} and ("
+            "stream[{0}].kind == {1} and stream[{0}].value == {2} "
+            "if ks is None else ks[{0}] == {3} and "
+            "stream.value_ends[{0}] - stream.value_starts[{0}] == {4} and "
+            "stream.src.startswith({2}, stream.value_starts[{0}])):".format(
+                pos, self._const(s.kind), kv, sequence.kind_id(s.kind),
+                len(s.value), self._has(pos)
+            )
+        )
+        self._ok(o, "stream[{}]".format(pos), pos + " + 1", ctx, "True")
+        self._end()
+        self._block("else:")
+        self._error(
+            o, "{}.get_loc(stream, {})".format(ctx, pos),
+            self._const(expected)
+        )
+        self._end()
+
+    def _emit_eof(self, node: Any, pos: str, ctx: str, o: int) -> None:
+        self._uses_len = True
+        # See _has
+        self._block("if {0} >= ls and {0} == len(stream):".format(pos))
+        self._ok(o, "None", pos, ctx, "False")
+        self._end()
+        self._block("else:")
+        self._error(
+            o, "{}.get_loc(stream, {})".format(ctx, pos),
+            "['end of file']"
+        )
+        self._end()
+
+    def _emit_literal(self, node: Any, pos: str, ctx: str, o: int) -> None:
+        _, s, trivia = node
+        ks = self._const(s)
+        self._block("if stream.startswith({}, {}):".format(ks, pos))
+        if trivia is None:
+            self._line("p{} = {} + {}".format(o, pos, len(s)))
+        else:
+            self._line("p{} = {}(stream, {} + {}).end()".format(
+                o, self._const(trivia.match), pos, len(s)
+            ))
+        self._ok(
+            o, ks, "p{}".format(o),
+            "{}.update_loc(stream, p{})".format(ctx, o), "True"
+        )
+        self._end()
+        self._block("else:")
+        self._error(
+            o, "{}.get_loc(stream, {})".format(ctx, pos),
+            self._const([repr(s)])
+        )
+        self._end()
+
+    def _emit_regexp(self, node: Any, pos: str, ctx: str, o: int) -> None:
+        _, pat, group, trivia = node
+        line = self._line
+        line("m{} = {}(stream, {})".format(o, self._const(pat.match), pos))
+        line("v{0} = None if m{0} is None else m{0}.group({1!r})".format(
+            o, group
+        ))
+        self._block("if v{} is not None:".format(o))
+        if trivia is None:
+            line("p{0} = m{0}.end()".format(o))
+        else:
+            line("p{0} = {1}(stream, m{0}.end()).end()".format(
+                o, self._const(trivia.match)
+            ))
+        self._ok(
+            o, "v{}".format(o), "p{}".format(o),
+            "{}.update_loc(stream, p{})".format(ctx, o),
+            "p{} != {}".format(o, pos)
+        )
+        self._end()
+        self._block("else:")
+        self._error(o, "{}.get_loc(stream, {})".format(ctx, pos), "()")
+        self._end()
+
+    def _emit_id(self, node: Any, pos: str, ctx: str, o: int) -> None:
+        self._emit(node[1], pos, ctx, o)
+
+    def _emit_fmap(self, node: Any, pos: str, ctx: str, o: int) -> None:
+        _, parse_fns, fn = node
+        self._emit(parse_fns, pos, ctx, o)
+        self._line("if ok{0}:".format(o))
+        self._line("    v{0} = {1}(v{0})".format(o, self._const(fn)))
+
+    def _emit_label(self, node: Any, pos: str, ctx: str, o: int) -> None:
+        _, parse_fns, expected = node
+        self._emit(parse_fns, pos, ctx, o)
+        self._line("if not k{}:".format(o))
+        self._line("    e{} = {}".format(o, self._const(expected)))
+
+    def _emit_tap(self, node: Any, pos: str, ctx: str, o: int) -> None:
+        _, parse_fns, fn = node
+        self._emit(parse_fns, pos, ctx, o)
+        self._line("if ok{0}:".format(o))
+        self._line("    {1}(v{0})".format(o, self._const(fn)))
+
+    def _emit_attempt(self, node: Any, pos: str, ctx: str, o: int) -> None:
+        self._emit(node[1], pos, ctx, o)
+        self._line("if not ok{}:".format(o))
+        self._line("    k{} = False".format(o))
+
+    def _emit_maybe(self, node: Any, pos: str, ctx: str, o: int) -> None:
+        self._emit(node[1], pos, ctx, o)
+        self._block("if not ok{0} and not k{0}:".format(o))
+        self._line("ok{} = True".format(o))
+        self._line("v{} = None".format(o))
+        self._line("p{} = {}".format(o, pos))
+        self._line("c{} = {}".format(o, ctx))
+        self._end()
+
+    def _emit_prepend(self, o: int, q: int) -> None:
+        # Equivalent of prepend_expected on the result of the second parser
+        self._block("if k{}:".format(q))
+        self._line("e{} = e{}".format(o, q))
+        self._line("k{} = True".format(o))
+        self._end()
+        self._block("else:")
+        self._line("e{0} = Append(e{0}, e{1})".format(o, q))
+        self._end()
+
+    def _emit_merge(self, merge: Any, o: int, q: int) -> None:
+        if merge is combinators.merge_right:
+            self._line("v{} = v{}".format(o, q))
+        elif merge is combinators.merge_pair:
+            self._line("v{0} = (v{0}, v{1})".format(o, q))
+        elif merge is combinators.merge_tuple:
+            self._line("v{0} = (*v{0}, v{1})".format(o, q))
+        elif merge is not combinators.merge_left:
+            self._line("v{0} = {1}(v{0}, v{2})".format(
+                o, self._const(merge), q
+            ))
+
+    def _emit_seq(self, node: Any, pos: str, ctx: str, o: int) -> None:
+        _, parse_fns, second_fns, merge = node
+        self._emit(parse_fns, pos, ctx, o)
+        self._block("if ok{}:".format(o))
+        q = self._var()
+        self._emit(second_fns, "p{}".format(o), "c{}".format(o), q)
+        self._block("if ok{}:".format(q))
+        self._emit_merge(merge, o, q)
+        self._line("p{} = p{}".format(o, q))
+        self._line("c{} = c{}".format(o, q))
+        self._end()
+        self._block("else:")
+        self._line("ok{} = False".format(o))
+        self._line("l{} = l{}".format(o, q))
+        self._end()
+        self._emit_prepend(o, q)
+        self._end()
+
+    def _emit_bind(self, node: Any, pos: str, ctx: str, o: int) -> None:
+        _, parse_fns, fn = node
+        self._emit(parse_fns, pos, ctx, o)
+        self._block("if ok{}:".format(o))
+        q = self._var()
+        self._emit_unpack(
+            "{}(v{}).parse_fast_fn(stream, p{}, c{})".format(
+                self._const(fn), o, o, o
+            ), q
+        )
+        self._line("ok{} = ok{}".format(o, q))
+        self._block("if ok{}:".format(q))
+        self._line("v{} = v{}".format(o, q))
+        self._line("p{} = p{}".format(o, q))
+        self._line("c{} = c{}".format(o, q))
+        self._end()
+        self._block("else:")
+        self._line("l{} = l{}".format(o, q))
+        self._end()
+        self._emit_prepend(o, q)
+        self._end()
+
+    def _emit_alt(self, node: Any, pos: str, ctx: str, o: int) -> None:
+        _, parse_fns, second_fns = node
+        self._emit(parse_fns, pos, ctx, o)
+        self._block("if not ok{0} and not k{0}:".format(o))
+        q = self._var()
+        self._emit(second_fns, pos, ctx, q)
+        self._block("if k{}:".format(q))
+        self._line("ok{} = ok{}".format(o, q))
+        self._line("e{} = e{}".format(o, q))
+        self._line("k{} = True".format(o))
+        self._end()
+        self._block("else:")
+        self._line("e{0} = Append(e{0}, e{1})".format(o, q))
+        self._end()
+        self._block("if ok{}:".format(q))
+        self._line("ok{} = True".format(o))
+        self._line("v{} = v{}".format(o, q))
+        self._line("p{} = p{}".format(o, q))
+        self._line("c{} = c{}".format(o, q))
+        self._end()
+        self._block("elif k{}:".format(q))
+        self._line("l{} = l{}".format(o, q))
+        self._end()
+        self._end()
+
+    def _emit_branches(
+            self, alts: Tuple[ParseFns[Any, Any], ...], lo: int, hi: int,
+            i: int, pos: str, ctx: str, o: int) -> None:
+        if hi - lo == 1:
+            self._emit(alts[lo], pos, ctx, o)
+            return
+        mid = (lo + hi) // 2
+        self._block("if i{} < {}:".format(i, mid))
+        self._emit_branches(alts, lo, mid, i, pos, ctx, o)
+        self._end()
+        self._block("else:")
+        self._emit_branches(alts, mid, hi, i, pos, ctx, o)
+        self._end()
+
+    def _emit_dispatch(self, node: Any, pos: str, ctx: str, o: int) -> None:
+        _, alts, table, expected, chain = node
+        line = self._line
+        i = self._var()
+        if len(table) == 1 and table[0][0] is None:
+            key = "{}.get(stream[{}], {})".format(
+                self._const(table[0][1]), pos, combinators.MISS
+            )
+        elif len(table) == 1:
+            key = "{}.get({}(stream[{}]), {})".format(
+                self._const(table[0][1]), self._const(table[0][0]), pos,
+                combinators.MISS
+            )
+        else:
+            key = "lookup({}, stream[{}])".format(self._const(table), pos)
+        self._block("try:")
+        line("i{} = {}".format(i, key))
+        self._end()
+        self._block("except IndexError:")
+        line("i{} = {}".format(i, combinators.MISS))
+        self._end()
+        self._block("except TypeError:")
+        line("i{} = {}".format(i, combinators.AMBIGUOUS))
+        self._end()
+        self._block("if i{} == {}:".format(i, combinators.MISS))
+        self._error(
+            o, "{}.get_loc(stream, {})".format(ctx, pos),
+            self._const(expected)
+        )
+        self._end()
+        self._block("else:")
+        self._block("if i{} == {}:".format(i, combinators.AMBIGUOUS))
+        line("ok{} = False".format(o))
+        line("k{} = False".format(o))
+        self._end()
+        self._block("else:")
+        self._emit_branches(alts, 0, len(alts), i, pos, ctx, o)
+        self._end()
+        self._block("if not k{}:".format(o))
+        self._emit_call(self._const(chain.fast_fn), pos, ctx, o)
+        self._end()
+        self._end()
+
+    def _emit_many(self, node: Any, pos: str, ctx: str, o: int) -> None:
+        line = self._line
+        line("vs{} = []".format(o))
+        line("pp{} = {}".format(o, pos))
+        line("cc{} = {}".format(o, ctx))
+        line("kk{} = False".format(o))
+        self._block("while True:")
+        self._loops += 1
+        q = self._var()
+        self._emit(node[1], "pp{}".format(o), "cc{}".format(o), q)
+        line("if not ok{}:".format(q))
+        line("    break")
+        line("if not k{}:".format(q))
+        line(
+            "    raise RuntimeError("
+            "\"parser shouldn't accept empty string\")"
+        )
+        line("kk{} = True".format(o))
+        line("vs{}.append(v{})".format(o, q))
+        line("pp{} = p{}".format(o, q))
+        line("cc{} = c{}".format(o, q))
+        self._loops -= 1
+        self._end()
+        self._block("if k{}:".format(q))
+        self._error(o, "l{}".format(q), "e{}".format(q))
+        line("k{} = True".format(o))
+        self._end()
+        self._block("else:")
+        line("ok{} = True".format(o))
+        line("v{0} = vs{0}".format(o))
+        line("p{0} = pp{0}".format(o))
+        line("c{0} = cc{0}".format(o))
+        line("e{} = e{}".format(o, q))
+        line("k{0} = kk{0}".format(o))
+        self._end()
+
+    def _emit_skip_many(
+            self, node: Any, pos: str, ctx: str, o: int) -> None:
+        _, parse_fns, empty = node
+        line = self._line
+        line("pp{} = {}".format(o, pos))
+        line("cc{} = {}".format(o, ctx))
+        line("kk{} = False".format(o))
+        self._block("while True:")
+        self._loops += 1
+        q = self._var()
+        self._emit(parse_fns, "pp{}".format(o), "cc{}".format(o), q)
+        line("if not ok{}:".format(q))
+        line("    break")
+        line("if not k{}:".format(q))
+        line(
+            "    raise RuntimeError("
+            "\"parser shouldn't accept empty string\")"
+        )
+        line("kk{} = True".format(o))
+        line("pp{} = p{}".format(o, q))
+        line("cc{} = c{}".format(o, q))
+        self._loops -= 1
+        self._end()
+        self._block("if k{}:".format(q))
+        self._error(o, "l{}".format(q), "e{}".format(q))
+        line("k{} = True".format(o))
+        self._end()
+        if not empty:
+            self._block("elif not kk{}:".format(o))
+            self._error(o, "l{}".format(q), "e{}".format(q))
+            self._end()
+        self._block("else:")
+        line("ok{} = True".format(o))
+        line("v{} = None".format(o))
+        line("p{0} = pp{0}".format(o))
+        line("c{0} = cc{0}".format(o))
+        line("e{} = e{}".format(o, q))
+        line("k{0} = kk{0}".format(o))
+        self._end()
+
+    def _emit_collect(self, node: Any, pos: str, ctx: str, o: int) -> None:
+        _, parse_fns, next_fns, start = node
+        line = self._line
+        line("ad{0}, fi{0} = {1}()".format(o, self._const(start)))
+        self._emit(parse_fns, pos, ctx, o)
+        self._block("if ok{}:".format(o))
+        if next_fns is None:
+            line("if not k{}:".format(o))
+            line(
+                "    raise RuntimeError("
+                "\"parser shouldn't accept empty string\")"
+            )
+            line("ee{} = ()".format(o))
+        else:
+            line("ee{0} = e{0}".format(o))
+        line("kk{0} = k{0}".format(o))
+        line("ad{0}(v{0})".format(o))
+        line("pp{0} = p{0}".format(o))
+        line("cc{0} = c{0}".format(o))
+        self._block("while True:")
+        self._loops += 1
+        q = self._var()
+        self._emit(
+            parse_fns if next_fns is None else next_fns,
+            "pp{}".format(o), "cc{}".format(o), q
+        )
+        line("if not ok{}:".format(q))
+        line("    break")
+        line("if not k{}:".format(q))
+        line(
+            "    raise RuntimeError("
+            "\"parser shouldn't accept empty string\")"
+        )
+        line("ad{0}(v{1})".format(o, q))
+        line("pp{} = p{}".format(o, q))
+        line("cc{} = c{}".format(o, q))
+        line("ee{} = ()".format(o))
+        line("kk{} = True".format(o))
+        self._loops -= 1
+        self._end()
+        self._block("if k{}:".format(q))
+        self._error(o, "l{}".format(q), "e{}".format(q))
+        line("k{} = True".format(o))
+        self._end()
+        self._block("else:")
+        self._ok(
+            o, "fi{}()".format(o), "pp{}".format(o), "cc{}".format(o),
+            "kk{}".format(o)
+        )
+        line("e{0} = Append(ee{0}, e{1})".format(o, q))
+        self._end()
+        self._end()
+        self._block("elif not k{}:".format(o))
+        line("ok{} = True".format(o))
+        line("v{} = fi{}()".format(o, o))
+        line("p{} = {}".format(o, pos))
+        line("c{} = {}".format(o, ctx))
+        self._end()
+
+    def _emit_sep_by(self, node: Any, pos: str, ctx: str, o: int) -> None:
+        _, parse_fns, sep_fns, empty = node
+        line = self._line
+        self._emit(parse_fns, pos, ctx, o)
+        self._block("if ok{}:".format(o))
+        line("vs{0} = [v{0}]".format(o))
+        line("kk{} = False".format(o))
+        self._block("while True:")
+        self._loops += 1
+        t = self._var()
+        q = self._var()
+        self._emit(sep_fns, "p{}".format(o), "c{}".format(o), t)
+        self._block("if not ok{}:".format(t))
+        line("l{} = l{}".format(q, t))
+        line("e{} = e{}".format(q, t))
+        line("k{} = k{}".format(q, t))
+        line("break")
+        self._end()
+        self._emit(parse_fns, "p{}".format(t), "c{}".format(t), q)
+        self._block("if not k{}:".format(q))
+        line("e{0} = Append(e{1}, e{0})".format(q, t))
+        line("k{} = k{}".format(q, t))
+        self._end()
+        line("if not ok{}:".format(q))
+        line("    break")
+        line("if not k{}:".format(q))
+        line(
+            "    raise RuntimeError("
+            "\"parser shouldn't accept empty string\")"
+        )
+        line("kk{} = True".format(o))
+        line("vs{}.append(v{})".format(o, q))
+        line("p{} = p{}".format(o, q))
+        line("c{} = c{}".format(o, q))
+        self._loops -= 1
+        self._end()
+        self._block("if k{}:".format(q))
+        self._error(o, "l{}".format(q), "e{}".format(q))
+        line("k{} = True".format(o))
+        self._end()
+        self._block("else:")
+        line("v{0} = vs{0}".format(o))
+        self._block("if kk{}:".format(o))
+        line("e{} = e{}".format(o, q))
+        line("k{} = True".format(o))
+        self._end()
+        self._block("else:")
+        line("e{0} = Append(e{0}, e{1})".format(o, q))
+        self._end()
+        self._end()
+        self._end()
+        if empty:
+            self._block("elif not k{}:".format(o))
+            line("ok{} = True".format(o))
+            line("v{} = []".format(o))
+            line("p{} = {}".format(o, pos))
+            line("c{} = {}".format(o, ctx))
+            self._end()
+
+    def _emit_block(self, node: Any, pos: str, ctx: str, o: int) -> None:
+        t = self._var()
+        self._line("b{} = {}.locate(stream, {})".format(t, ctx, pos))
+        self._emit(node[1], pos, "b{0}.set_mark(b{0}.loc.col)".format(t), o)
+        self._line("if ok{}:".format(o))
+        self._line("    c{} = b{}".format(o, t))
+
+    def _emit_aligned(self, node: Any, pos: str, ctx: str, o: int) -> None:
+        t = self._var()
+        self._line("b{} = {}.locate(stream, {})".format(t, ctx, pos))
+        self._block("if b{0}.mark == b{0}.loc.col:".format(t))
+        self._emit(node[1], pos, "b{}".format(t), o)
+        self._end()
+        self._block("else:")
+        self._error(o, "b{}.loc".format(t), "['indentation']")
+        self._end()
+
+    def _emit_indented(self, node: Any, pos: str, ctx: str, o: int) -> None:
+        _, delta, parse_fns = node
+        t = self._var()
+        self._line("b{} = {}.locate(stream, {})".format(t, ctx, pos))
+        self._block("if b{0}.mark + {1} == b{0}.loc.col:".format(t, delta))
+        self._emit(
+            parse_fns, pos, "b{0}.set_mark(b{0}.loc.col)".format(t), o
+        )
+        self._line("if ok{}:".format(o))
+        self._line("    c{} = b{}".format(o, t))
+        self._end()
+        self._block("else:")
+        self._error(o, "b{}.loc".format(t), "['indentation']")
+        self._end()
+
+
+def compile_parser(parser: ParseObj[S, A]) -> TupleParser[S, A]:
+    """
+    Generates a Python module for the parser and returns an equivalent
+    parser that uses it. The combinators are inlined into straight-line code,
+    with a separate function for every :class:`reparsec.Delay` and
+    :meth:`reparsec.Parser.memo` parser. Parsers created by other means are
+    called as is. Only parsing without error recovery is compiled.
+
+    Scannerless sub-grammars made of :func:`reparsec.scannerless.literal` and
+    :func:`reparsec.scannerless.regexp` combined with sequences,
+    alternatives, options and repetitions are fused into a single regular
+    expression, with the values rebuilt from its groups.
+
+    Parsers must be fully defined before compilation.
+
+    >>> from reparsec.codegen import compile_parser
+    >>> from reparsec.sequence import digit, sym
+
+    >>> parser = compile_parser(
+    ...     digit.many().fmap(lambda ds: int("".join(ds))) << sym(";")
+    ... )
+
+    >>> parser.parse("123;").unwrap()
+    123
+
+    >>> parser.parse("12a").unwrap()
+    Traceback (most recent call last):
+      ...
+    reparsec.types.ParseError: at 2: expected digit or ';'
+
+    :param parser: Parser to compile
+    """
+
+    fns = parser.to_fns()
+    return FnParser(
+        ParseFns(_Compiler().compile(fns), fns.fn, fns.first, fns.node)
+    )
@@ -1,8 +1,15 @@
-from typing import Callable, Iterable, List, Optional, Tuple, TypeVar, Union
+from typing import (
+    Any, Callable, Dict, FrozenSet, Generator, Generic, Hashable, Iterable,
+    List, MutableMapping, Optional, Tuple, TypeVar, Union
+)
 
 from .chain import Append
-from .parser import ParseFastFn, ParseFn, ParseFns, ParseObj
-from .recovery import MergeFn, continue_parse, join_repairs
+from .parser import (
+    FirstSet, KeyFn, ParseFastFn, ParseFn, ParseFns, ParseObj, first_set
+)
+from .recovery import (
+    LoopResult, MergeFn, continue_many, continue_parse, join_repairs
+)
 from .repair import make_user_insert
 from .result import Error, Ok, Recovered, Result, SimpleResult
 from .types import Ctx
@@ -34,7 +41,10 @@ def _fmap(parse_fns: ParseFns[S, A], fn: Callable[[A], B]) -> ParseFn[S, B]:
 
 
 def fmap(parse_fns: ParseFns[S, A], fn: Callable[[A], B]) -> ParseFns[S, B]:
-    return ParseFns(_fmap_fast(parse_fns, fn), _fmap(parse_fns, fn))
+    return ParseFns(
+        _fmap_fast(parse_fns, fn), _fmap(parse_fns, fn),
+        first_set(parse_fns), ("fmap", parse_fns, fn)
+    )
 
 
 def _alt_fast(
@@ -90,12 +100,128 @@ def _alt(
     return alt
 
 
+Table = Tuple[Tuple[KeyFn, Dict[Hashable, int]], ...]
+
+MISS = -2
+AMBIGUOUS = -1
+
+
+def lookup(table: Table, t: Any) -> int:
+    # Returns the index of the only branch that can start with t
+    if len(table) == 1:
+        key_fn, keys = table[0]
+        return keys.get(t if key_fn is None else key_fn(t), MISS)
+    found = MISS
+    for key_fn, keys in table:
+        i = keys.get(t if key_fn is None else key_fn(t), MISS)
+        if i != MISS:
+            if found != MISS:
+                return AMBIGUOUS
+            found = i
+    return found
+
+
+def _dispatch_fast(
+        alts: Tuple[ParseFns[S, Any], ...], table: Table,
+        expected: Iterable[str],
+        chain_fn: ParseFastFn[S, A]) -> ParseFastFn[S, A]:
+    fast_fns = [p.fast_fn for p in alts]
+
+    def alt(stream: Any, pos: int, ctx: Ctx[S]) -> SimpleResult[A, S]:
+        try:
+            i = lookup(table, stream[pos])
+        except IndexError:
+            return Error(ctx.get_loc(stream, pos), expected)
+        except TypeError:
+            return chain_fn(stream, pos, ctx)
+        if i == MISS:
+            return Error(ctx.get_loc(stream, pos), expected)
+        if i != AMBIGUOUS:
+            r = fast_fns[i](stream, pos, ctx)
+            if r.consumed:
+                return r
+        return chain_fn(stream, pos, ctx)
+
+    return alt
+
+
+def _dispatch(
+        alts: Tuple[ParseFns[S, Any], ...], table: Table,
+        expected: Iterable[str], chain_fn: ParseFn[S, A]) -> ParseFn[S, A]:
+    fns = [p.fn for p in alts]
+
+    def alt(
+            stream: Any, pos: int, ctx: Ctx[S], ins: int,
+            rem: Optional[int]) -> Result[A, S]:
+        if rem is not None:
+            return chain_fn(stream, pos, ctx, ins, rem)
+        try:
+            i = lookup(table, stream[pos])
+        except IndexError:
+            return Error(ctx.get_loc(stream, pos), expected)
+        except TypeError:
+            return chain_fn(stream, pos, ctx, ins, None)
+        if i == MISS:
+            return Error(ctx.get_loc(stream, pos), expected)
+        if i != AMBIGUOUS:
+            r = fns[i](stream, pos, ctx, ins, None)
+            if r.consumed:
+                return r
+        return chain_fn(stream, pos, ctx, ins, None)
+
+    return alt
+
+
+def _make_table(alts: Tuple[ParseFns[S, Any], ...]) -> Table:
+    tables: Dict[KeyFn, Dict[Hashable, int]] = {}
+    for i, p in enumerate(alts):
+        assert p.first is not None
+        for key_fn, keys in p.first.keys.items():
+            table = tables.setdefault(key_fn, {})
+            for k in keys:
+                table[k] = AMBIGUOUS if k in table else i
+    return tuple(tables.items())
+
+
+def _dispatch_alt(
+        parse_fns: ParseFns[S, A],
+        second_fns: ParseFns[S, B]) -> ParseFns[S, Union[A, B]]:
+    fa = parse_fns.first
+    fb = second_fns.first
+    assert fa is not None and fb is not None
+    alts = (
+        (parse_fns,) if fa.alts is None else fa.alts
+    ) + (
+        (second_fns,) if fb.alts is None else fb.alts
+    )
+    keys: Dict[KeyFn, FrozenSet[Hashable]] = {}
+    expected: List[str] = []
+    chain = alts[0]
+    for p in alts:
+        assert p.first is not None
+        for key_fn, ks in p.first.keys.items():
+            keys[key_fn] = keys.get(key_fn, frozenset()) | ks
+        expected.extend(p.first.expected)
+        if p is not chain:
+            chain = ParseFns(_alt_fast(chain, p), _alt(chain, p))
+    table = _make_table(alts)
+    return ParseFns(
+        _dispatch_fast(alts, table, expected, chain.fast_fn),
+        _dispatch(alts, table, expected, chain.fn),
+        FirstSet(keys, expected, alts),
+        ("dispatch", alts, table, expected, chain)
+    )
+
+
 def alt(
         parse_fns: ParseFns[S, A],
         second_fns: ParseFns[S, B]) -> ParseFns[S, Union[A, B]]:
+    if parse_fns.first is not None and second_fns.first is not None:
+        return _dispatch_alt(parse_fns, second_fns)
     return ParseFns(
         _alt_fast(parse_fns, second_fns),
-        _alt(parse_fns, second_fns)
+        _alt(parse_fns, second_fns),
+        node=("alt", parse_fns, second_fns)
     )
 
 
@@ -146,7 +272,10 @@ def _bind(
 def bind(
         parse_fns: ParseFns[S, A],
         fn: Callable[[A], ParseObj[S, B]]) -> ParseFns[S, B]:
-    return ParseFns(_bind_fast(parse_fns, fn), _bind(parse_fns, fn))
+    return ParseFns(
+        _bind_fast(parse_fns, fn), _bind(parse_fns, fn), first_set(parse_fns),
+        ("bind", parse_fns, fn)
+    )
 
 
 def _seq_h_fast(
@@ -202,25 +331,42 @@ def _seq(
     return ParseFns(
         _seq_h_fast(parse_fns, second_fns, merge),
         _seq_h(parse_fns, second_fns, merge),
+        first_set(parse_fns), ("seq", parse_fns, second_fns, merge)
     )
 
 
+def merge_left(left: A, _: object) -> A:
+    return left
+
+
+def merge_right(_: object, right: B) -> B:
+    return right
+
+
+def merge_pair(left: A, right: B) -> Tuple[A, B]:
+    return (left, right)
+
+
+def merge_tuple(left: Tuple[Any, ...], right: Any) -> Any:
+    return (*left, right)
+
+
 def seql(
         parse_fns: ParseFns[S, A],
         second_fns: ParseFns[S, B]) -> ParseFns[S, A]:
-    return _seq(parse_fns, second_fns, lambda l, _: l)
+    return _seq(parse_fns, second_fns, merge_left)
 
 
 def seqr(
         parse_fns: ParseFns[S, A],
         second_fns: ParseFns[S, B]) -> ParseFns[S, B]:
-    return _seq(parse_fns, second_fns, lambda _, r: r)
+    return _seq(parse_fns, second_fns, merge_right)
 
 
 def seq(
         parse_fns: ParseFns[S, A],
         second_fns: ParseFns[S, B]) -> ParseFns[S, Tuple[A, B]]:
-    return _seq(parse_fns, second_fns, lambda l, r: (l, r))
+    return _seq(parse_fns, second_fns, merge_pair)
 
 
 A0 = TypeVar("A0")
@@ -236,58 +382,40 @@ A7 = TypeVar("A7")
 def tuple3(
         parse_fns: ParseFns[S, Tuple[A0, A1]],
         second_fns: ParseFns[S, A2]) -> ParseFns[S, Tuple[A0, A1, A2]]:
-    def merge(a: Tuple[A0, A1], b: A2) -> Tuple[A0, A1, A2]:
-        return (*a, b)
-    return _seq(parse_fns, second_fns, merge)
+    return _seq(parse_fns, second_fns, merge_tuple)
 
 
 def tuple4(
         parse_fns: ParseFns[S, Tuple[A0, A1, A2]],
         second_fns: ParseFns[S, A3]) -> ParseFns[S, Tuple[A0, A1, A2, A3]]:
-    def merge(a: Tuple[A0, A1, A2], b: A3) -> Tuple[A0, A1, A2, A3]:
-        return (*a, b)
-    return _seq(parse_fns, second_fns, merge)
+    return _seq(parse_fns, second_fns, merge_tuple)
 
 
 def tuple5(
         parse_fns: ParseFns[S, Tuple[A0, A1, A2, A3]],
         second_fns: ParseFns[S, A4]) -> ParseFns[S, Tuple[A0, A1, A2, A3, A4]]:
-    def merge(a: Tuple[A0, A1, A2, A3], b: A4) -> Tuple[A0, A1, A2, A3, A4]:
-        return (*a, b)
-    return _seq(parse_fns, second_fns, merge)
+    return _seq(parse_fns, second_fns, merge_tuple)
 
 
 def tuple6(
         parse_fns: ParseFns[S, Tuple[A0, A1, A2, A3, A4]],
         second_fns: ParseFns[S, A5]) -> ParseFns[
             S, Tuple[A0, A1, A2, A3, A4, A5]]:
-    def merge(
-            a: Tuple[A0, A1, A2, A3, A4],
-            b: A5) -> Tuple[A0, A1, A2, A3, A4, A5]:
-        return (*a, b)
-    return _seq(parse_fns, second_fns, merge)
+    return _seq(parse_fns, second_fns, merge_tuple)
 
 
 def tuple7(
         parse_fns: ParseFns[S, Tuple[A0, A1, A2, A3, A4, A5]],
         second_fns: ParseFns[S, A6]) -> ParseFns[
             S, Tuple[A0, A1, A2, A3, A4, A5, A6]]:
-    def merge(
-            a: Tuple[A0, A1, A2, A3, A4, A5],
-            b: A6) -> Tuple[A0, A1, A2, A3, A4, A5, A6]:
-        return (*a, b)
-    return _seq(parse_fns, second_fns, merge)
+    return _seq(parse_fns, second_fns, merge_tuple)
 
 
 def tuple8(
         parse_fns: ParseFns[S, Tuple[A0, A1, A2, A3, A4, A5, A6]],
         second_fns: ParseFns[S, A7]) -> ParseFns[
             S, Tuple[A0, A1, A2, A3, A4, A5, A6, A7]]:
-    def merge(
-            a: Tuple[A0, A1, A2, A3, A4, A5, A6],
-            b: A7) -> Tuple[A0, A1, A2, A3, A4, A5, A6, A7]:
-        return (*a, b)
-    return _seq(parse_fns, second_fns, merge)
+    return _seq(parse_fns, second_fns, merge_tuple)
 
 
 def _maybe_fast(parse_fns: ParseFns[S, A]) -> ParseFastFn[S, Optional[A]]:
@@ -318,7 +446,9 @@ def _maybe(parse_fns: ParseFns[S, A]) -> ParseFn[S, Optional[A]]:
 
 
 def maybe(parse_fns: ParseFns[S, A]) -> ParseFns[S, Optional[A]]:
-    return ParseFns(_maybe_fast(parse_fns), _maybe(parse_fns))
+    return ParseFns(
+        _maybe_fast(parse_fns), _maybe(parse_fns), node=("maybe", parse_fns)
+    )
 
 
 def _many_fast(parse_fns: ParseFns[S, A]) -> ParseFastFn[S, List[A]]:
@@ -343,37 +473,398 @@ def _many_fast(parse_fns: ParseFns[S, A]) -> ParseFastFn[S, List[A]]:
     return many
 
 
+def _repeat(
+        parse_fn: ParseFn[S, A], stream: S, pos: int, ctx: Ctx[S], ins: int,
+        value: List[A]) -> LoopResult[A, S]:
+    consumed = False
+    r = parse_fn(stream, pos, ctx, ins, None)
+    while type(r) is Ok:
+        if not r.consumed:
+            raise RuntimeError("parser shouldn't accept empty string")
+        consumed = True
+        value.append(r.value)
+        pos = r.pos
+        ctx = r.ctx
+        r = parse_fn(stream, pos, ctx, ins, None)
+    return r, Ok(value, pos, ctx, r.expected, consumed)
+
+
 def _many(parse_fns: ParseFns[S, A]) -> ParseFn[S, List[A]]:
     parse_fn = parse_fns.fn
 
     def many(
             stream: S, pos: int, ctx: Ctx[S], ins: int,
             rem: Optional[int]) -> Result[List[A], S]:
+        r, ok = _repeat(parse_fn, stream, pos, ctx, ins, [])
+        if type(r) is Recovered:
+            return continue_many(
+                r, ins, ok.value,
+                lambda p, c: _repeat(parse_fn, stream, p, c, ins, [])
+            )
+        if r.consumed:
+            return r
+        return ok
+
+    return many
+
+
+def many(parse_fns: ParseFns[S, A]) -> ParseFns[S, List[A]]:
+    return ParseFns(
+        _many_fast(parse_fns), _many(parse_fns), node=("many", parse_fns)
+    )
+
+
+def _sep_by_fast(
+        parse_fns: ParseFns[S, A], sep_fns: ParseFns[S, B],
+        empty: bool) -> ParseFastFn[S, List[A]]:
+    parse_fn = parse_fns.fast_fn
+    sep_fn = sep_fns.fast_fn
+
+    def sep_by(
+            stream: S, pos: int, ctx: Ctx[S]) -> SimpleResult[List[A], S]:
+        ra = parse_fn(stream, pos, ctx)
+        if type(ra) is Error:
+            if ra.consumed or not empty:
+                return ra
+            return Ok([], pos, ctx, ra.expected)
+        value = [ra.value]
+        consumed = False
+        p = ra.pos
+        c = ra.ctx
+        r: SimpleResult[A, S]
+        while True:
+            rs = sep_fn(stream, p, c)
+            if type(rs) is Error:
+                r = rs
+                break
+            r = parse_fn(stream, rs.pos, rs.ctx).prepend_expected(
+                rs.expected, rs.consumed
+            )
+            if type(r) is Error:
+                break
+            if not r.consumed:
+                raise RuntimeError("parser shouldn't accept empty string")
+            consumed = True
+            value.append(r.value)
+            p = r.pos
+            c = r.ctx
+        if r.consumed:
+            return r
+        if consumed:
+            return Ok(value, p, c, r.expected, True)
+        return Ok(
+            value, p, c, Append(ra.expected, r.expected), ra.consumed
+        )
+
+    return sep_by
+
+
+def _sep_by(
+        parse_fns: ParseFns[S, A], sep_fns: ParseFns[S, B],
+        empty: bool) -> ParseFn[S, List[A]]:
+    parse_fn = parse_fns.fn
+    item_fn = seqr(sep_fns, parse_fns).fn
+
+    def items(
+            stream: S, pos: int, ctx: Ctx[S], ins: int,
+            value: List[A]) -> Result[List[A], S]:
+        r, ok = _repeat(item_fn, stream, pos, ctx, ins, value)
+        if type(r) is Recovered:
+            return continue_many(
+                r, ins, ok.value,
+                lambda p, c: _repeat(item_fn, stream, p, c, ins, [])
+            )
+        if r.consumed:
+            return r
+        return ok
+
+    def sep_by(
+            stream: S, pos: int, ctx: Ctx[S], ins: int,
+            rem: Optional[int]) -> Result[List[A], S]:
+        ra = parse_fn(stream, pos, ctx, ins, None if empty else rem)
+        r: Result[List[A], S]
+        if type(ra) is Error:
+            r = ra
+        elif type(ra) is Recovered:
+            r = continue_parse(
+                ra, ins, lambda v, p, c, _: items(stream, p, c, ins, [v]),
+                merge_right
+            )
+        else:
+            r = items(
+                stream, ra.pos, ra.ctx, ins, [ra.value]
+            ).prepend_expected(ra.expected, ra.consumed)
+        if empty and not r.consumed and type(r) is not Ok:
+            return Ok([], pos, ctx, r.expected)
+        return r
+
+    return sep_by
+
+
+def sep_by(
+        parse_fns: ParseFns[S, A], sep_fns: ParseFns[S, B],
+        empty: bool = True) -> ParseFns[S, List[A]]:
+    return ParseFns(
+        _sep_by_fast(parse_fns, sep_fns, empty),
+        _sep_by(parse_fns, sep_fns, empty),
+        None if empty else first_set(parse_fns),
+        ("sep_by", parse_fns, sep_fns, empty)
+    )
+
+
+def _skip_many_fast(
+        parse_fns: ParseFns[S, A], empty: bool) -> ParseFastFn[S, None]:
+    parse_fn = parse_fns.fast_fn
+
+    def skip_many(stream: S, pos: int, ctx: Ctx[S]) -> SimpleResult[None, S]:
+        consumed = False
+        r = parse_fn(stream, pos, ctx)
+        if not empty and type(r) is Error:
+            return r
+        while type(r) is Ok:
+            if not r.consumed:
+                raise RuntimeError("parser shouldn't accept empty string")
+            consumed = True
+            pos = r.pos
+            ctx = r.ctx
+            r = parse_fn(stream, pos, ctx)
+        if r.consumed:
+            return r
+        return Ok(None, pos, ctx, r.expected, consumed)
+
+    return skip_many
+
+
+def _drop(_: object) -> None:
+    return None
+
+
+def _skip_many(parse_fns: ParseFns[S, A], empty: bool) -> ParseFn[S, None]:
+    parse_fn = parse_fns.fn
+
+    def loop(
+            stream: S, pos: int, ctx: Ctx[S], ins: int,
+            r: Result[A, S]) -> LoopResult[A, S]:
         consumed = False
-        value: List[A] = []
-        r = parse_fn(stream, pos, ctx, ins, None)
         while type(r) is Ok:
             if not r.consumed:
                 raise RuntimeError("parser shouldn't accept empty string")
             consumed = True
-            value.append(r.value)
             pos = r.pos
             ctx = r.ctx
             r = parse_fn(stream, pos, ctx, ins, None)
+        return r, Ok([], pos, ctx, r.expected, consumed)
+
+    def skip(
+            stream: S, pos: int, ctx: Ctx[S], ins: int,
+            r: Result[A, S]) -> Result[None, S]:
+        r, ok = loop(stream, pos, ctx, ins, r)
         if type(r) is Recovered:
-            return continue_parse(
-                r, ins, lambda _, p, c, __: many(stream, p, c, ins, None),
-                lambda a, b: [*value, a, *b]
-            )
+            return continue_many(
+                r, ins, [],
+                lambda p, c: loop(
+                    stream, p, c, ins, parse_fn(stream, p, c, ins, None)
+                )
+            ).fmap(_drop)
         if r.consumed:
             return r
-        return Ok(value, pos, ctx, r.expected, consumed)
+        return Ok(None, ok.pos, ok.ctx, ok.expected, ok.consumed)
 
-    return many
+    def skip_many(
+            stream: S, pos: int, ctx: Ctx[S], ins: int,
+            rem: Optional[int]) -> Result[None, S]:
+        r = parse_fn(stream, pos, ctx, ins, None if empty else rem)
+        if not empty and type(r) is Error:
+            return r
+        return skip(stream, pos, ctx, ins, r)
 
+    return skip_many
+
+
+def skip_many(
+        parse_fns: ParseFns[S, A], empty: bool = True) -> ParseFns[S, None]:
+    # Like many, but drops the values instead of collecting them into a list
+    return ParseFns(
+        _skip_many_fast(parse_fns, empty), _skip_many(parse_fns, empty),
+        None if empty else first_set(parse_fns),
+        ("skip_many", parse_fns, empty)
+    )
 
-def many(parse_fns: ParseFns[S, A]) -> ParseFns[S, List[A]]:
-    return ParseFns(_many_fast(parse_fns), _many(parse_fns))
+
+Start = Callable[[], Tuple[Callable[[A], object], Callable[[], B]]]
+
+
+def _collect_fast(
+        parse_fns: ParseFns[S, A], next_fns: Optional[ParseFns[S, A]],
+        start: Start[A, B]) -> ParseFastFn[S, B]:
+    parse_fn = parse_fns.fast_fn
+    next_fn = parse_fn if next_fns is None else next_fns.fast_fn
+
+    def collect(stream: S, pos: int, ctx: Ctx[S]) -> SimpleResult[B, S]:
+        add, finish = start()
+        r = parse_fn(stream, pos, ctx)
+        if type(r) is Error:
+            if r.consumed:
+                return r
+            return Ok(finish(), pos, ctx, r.expected)
+        if next_fns is None:
+            if not r.consumed:
+                raise RuntimeError("parser shouldn't accept empty string")
+            expected: Iterable[str] = ()
+        else:
+            expected = r.expected
+        consumed = r.consumed
+        while True:
+            add(r.value)
+            pos = r.pos
+            ctx = r.ctx
+            r = next_fn(stream, pos, ctx)
+            if type(r) is Error:
+                break
+            if not r.consumed:
+                raise RuntimeError("parser shouldn't accept empty string")
+            expected = ()
+            consumed = True
+        if r.consumed:
+            return r
+        return Ok(finish(), pos, ctx, Append(expected, r.expected), consumed)
+
+    return collect
+
+
+def _finish(start: Start[A, B], values: List[A]) -> B:
+    add, finish = start()
+    for v in values:
+        add(v)
+    return finish()
+
+
+def collect(
+        parse_fns: ParseFns[S, A], sep_fns: Optional[ParseFns[S, Any]],
+        start: Start[A, B]) -> ParseFns[S, B]:
+    # Like many or sep_by, but passes the values to the function returned by
+    # start instead of collecting them into a list. Error recovery may try
+    # several continuations of the same prefix, so it collects the list and
+    # passes it afterwards
+    if sep_fns is None:
+        next_fns = None
+        items = many(parse_fns)
+    else:
+        next_fns = seqr(sep_fns, parse_fns)
+        items = sep_by(parse_fns, sep_fns)
+    return ParseFns(
+        _collect_fast(parse_fns, next_fns, start),
+        fmap(items, lambda v: _finish(start, v)).fn,
+        node=("collect", parse_fns, next_fns, start)
+    )
+
+
+class _Fold(Generic[A, B]):
+    __slots__ = "acc", "step"
+
+    def __init__(self, init: B, step: Callable[[B, A], B]):
+        self.acc = init
+        self.step = step
+
+    def add(self, value: A) -> None:
+        self.acc = self.step(self.acc, value)
+
+    def finish(self) -> B:
+        return self.acc
+
+
+def fold(
+        parse_fns: ParseFns[S, A], sep_fns: Optional[ParseFns[S, Any]],
+        init: B, step: Callable[[B, A], B]) -> ParseFns[S, B]:
+    def start() -> Tuple[Callable[[A], object], Callable[[], B]]:
+        f = _Fold(init, step)
+        return f.add, f.finish
+
+    return collect(parse_fns, sep_fns, start)
+
+
+def _adder(container: Any) -> Callable[[Any], object]:
+    if hasattr(container, "append"):
+        add: Callable[[Any], object] = container.append
+        return add
+    if hasattr(container, "add"):
+        add = container.add
+        return add
+    if isinstance(container, MutableMapping):
+        setitem = container.__setitem__
+        return lambda kv: setitem(kv[0], kv[1])
+    raise TypeError(
+        "Expected a container with append or add method, or a mapping"
+    )
+
+
+def collect_into(
+        parse_fns: ParseFns[S, Any], sep_fns: Optional[ParseFns[S, Any]],
+        factory: Callable[[], B]) -> ParseFns[S, B]:
+    def start() -> Tuple[Callable[[Any], object], Callable[[], B]]:
+        container = factory()
+        return _adder(container), lambda: container
+
+    return collect(parse_fns, sep_fns, start)
+
+
+IterFn = Callable[
+    [S, int, Ctx[S]], Generator[Any, None, SimpleResult[None, S]]
+]
+
+
+def many_items(
+        parse_fns: ParseFns[S, List[A]]
+) -> Tuple[ParseFastFn[S, A], ParseFastFn[S, A], bool]:
+    # Splits many or sep_by into the parsers of the first and of the next
+    # items, and the flag that allows zero items. The first item of sep_by
+    # may be empty, so the parsers of many are the same object
+    node = parse_fns.node
+    while node is not None and node[0] == "delay":
+        parse_fns = node[1].to_fns()
+        node = None if parse_fns.node == node else parse_fns.node
+    if node is None or node[0] not in ("many", "sep_by"):
+        raise ValueError("Expected a parser created with many or sep_by")
+    if node[0] == "many":
+        return node[1].fast_fn, node[1].fast_fn, True
+    return node[1].fast_fn, seqr(node[2], node[1]).fast_fn, node[3]
+
+
+def _iter_items(
+        first_fn: ParseFastFn[S, Any], next_fn: ParseFastFn[S, Any],
+        empty: bool, stream: S, pos: int,
+        ctx: Ctx[S]) -> Generator[Any, None, SimpleResult[None, S]]:
+    r = first_fn(stream, pos, ctx)
+    if type(r) is Error:
+        if r.consumed or not empty:
+            return r
+        return Ok(None, pos, ctx, r.expected)
+    if first_fn is next_fn and not r.consumed:
+        raise RuntimeError("parser shouldn't accept empty string")
+    while True:
+        yield r.value
+        pos = r.pos
+        ctx = r.ctx
+        r = next_fn(stream, pos, ctx)
+        if type(r) is Error:
+            if r.consumed:
+                return r
+            return Ok(None, pos, ctx, r.expected, True)
+        if not r.consumed:
+            raise RuntimeError("parser shouldn't accept empty string")
+
+
+def iter_many(parse_fns: ParseFns[S, List[A]]) -> IterFn[S]:
+    # Yields the values of many or sep_by one at a time instead of collecting
+    # them, and returns the result without the value
+    first_fn, next_fn, empty = many_items(parse_fns)
+
+    def iter_fn(
+            stream: S, pos: int,
+            ctx: Ctx[S]) -> Generator[Any, None, SimpleResult[None, S]]:
+        return _iter_items(first_fn, next_fn, empty, stream, pos, ctx)
+
+    return iter_fn
 
 
 def _attempt_fast(parse_fns: ParseFns[S, A]) -> ParseFastFn[S, A]:
@@ -406,7 +897,10 @@ def _attempt(parse_fns: ParseFns[S, A]) -> ParseFn[S, A]:
 
 
 def attempt(parse_fns: ParseFns[S, A]) -> ParseFns[S, A]:
-    return ParseFns(_attempt_fast(parse_fns), _attempt(parse_fns))
+    return ParseFns(
+        _attempt_fast(parse_fns), _attempt(parse_fns), first_set(parse_fns),
+        ("attempt", parse_fns)
+    )
 
 
 def _label_fast(
@@ -434,9 +928,50 @@ def _label(
 
 def label(parse_fns: ParseFns[S, A], x: str) -> ParseFns[S, A]:
     expected = [x]
+    first = parse_fns.first
     return ParseFns(
         _label_fast(parse_fns, expected),
-        _label(parse_fns, expected)
+        _label(parse_fns, expected),
+        None if first is None else FirstSet(first.keys, expected),
+        ("label", parse_fns, expected)
+    )
+
+
+def _tap_fast(
+        parse_fns: ParseFns[S, A],
+        fn: Callable[[A], object]) -> ParseFastFn[S, A]:
+    parse_fn = parse_fns.fast_fn
+
+    def tap(stream: S, pos: int, ctx: Ctx[S]) -> SimpleResult[A, S]:
+        r = parse_fn(stream, pos, ctx)
+        if type(r) is Ok:
+            fn(r.value)
+        return r
+
+    return tap
+
+
+def _tap(
+        parse_fns: ParseFns[S, A], fn: Callable[[A], object]) -> ParseFn[S, A]:
+    parse_fn = parse_fns.fn
+
+    def tap(
+            stream: S, pos: int, ctx: Ctx[S], ins: int,
+            rem: Optional[int]) -> Result[A, S]:
+        r = parse_fn(stream, pos, ctx, ins, rem)
+        if type(r) is Ok:
+            fn(r.value)
+        return r
+
+    return tap
+
+
+def tap(
+        parse_fns: ParseFns[S, A],
+        fn: Callable[[A], object]) -> ParseFns[S, A]:
+    return ParseFns(
+        _tap_fast(parse_fns, fn), _tap(parse_fns, fn), first_set(parse_fns),
+        ("tap", parse_fns, fn)
     )
 
 
@@ -461,7 +996,10 @@ def _recover(parse_fns: ParseFns[S, A]) -> ParseFn[S, A]:
 
 
 def recover(parse_fns: ParseFns[S, A]) -> ParseFns[S, A]:
-    return ParseFns(_recover_fast(parse_fns), _recover(parse_fns))
+    return ParseFns(
+        _recover_fast(parse_fns), _recover(parse_fns), first_set(parse_fns),
+        ("id", parse_fns)
+    )
 
 
 def _recover_with_fast(parse_fns: ParseFns[S, A]) -> ParseFastFn[S, A]:
@@ -498,7 +1036,8 @@ def recover_with(
 
     return ParseFns(
         _recover_with_fast(parse_fns),
-        _recover_with(parse_fns, x, vs)
+        _recover_with(parse_fns, x, vs),
+        first_set(parse_fns), ("id", parse_fns)
     )
 
 
@@ -540,4 +1079,5 @@ def recover_with_fn(
     return ParseFns(
         _recover_with_fn_fast(parse_fns),
         _recover_with_fn(parse_fns, fn, label),
+        first_set(parse_fns), ("id", parse_fns)
     )
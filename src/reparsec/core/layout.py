@@ -13,7 +13,7 @@ def _block_fast(parse_fns: ParseFns[S, A]) -> ParseFastFn[S, A]:
     parse_fn = parse_fns.fast_fn
 
     def block(stream: S, pos: int, ctx: Ctx[S]) -> SimpleResult[A, S]:
-        ctx = ctx.update_loc(stream, pos)
+        ctx = ctx.locate(stream, pos)
         return parse_fn(stream, pos, ctx.set_mark(ctx.loc.col)).set_ctx(ctx)
 
     return block
@@ -25,7 +25,7 @@ def _block(parse_fns: ParseFns[S, A]) -> ParseFn[S, A]:
     def block(
             stream: S, pos: int, ctx: Ctx[S], ins: int,
             rem: Optional[int]) -> Result[A, S]:
-        ctx = ctx.update_loc(stream, pos)
+        ctx = ctx.locate(stream, pos)
         return parse_fn(
             stream, pos, ctx.set_mark(ctx.loc.col), ins, rem
         ).set_ctx(ctx)
@@ -34,14 +34,16 @@ def _block(parse_fns: ParseFns[S, A]) -> ParseFn[S, A]:
 
 
 def block(parse_fns: ParseFns[S, A]) -> ParseFns[S, A]:
-    return ParseFns(_block_fast(parse_fns), _block(parse_fns),)
+    return ParseFns(
+        _block_fast(parse_fns), _block(parse_fns), node=("block", parse_fns)
+    )
 
 
 def _aligned_fast(parse_fns: ParseFns[S, A]) -> ParseFastFn[S, A]:
     parse_fn = parse_fns.fast_fn
 
     def aligned(stream: S, pos: int, ctx: Ctx[S]) -> SimpleResult[A, S]:
-        ctx = ctx.update_loc(stream, pos)
+        ctx = ctx.locate(stream, pos)
         if ctx.mark == ctx.loc.col:
             return parse_fn(stream, pos, ctx)
         return Error(ctx.loc, ["indentation"])
@@ -55,7 +57,7 @@ def _aligned(parse_fns: ParseFns[S, A]) -> ParseFn[S, A]:
     def aligned(
             stream: S, pos: int, ctx: Ctx[S], ins: int,
             rem: Optional[int]) -> Result[A, S]:
-        ctx = ctx.update_loc(stream, pos)
+        ctx = ctx.locate(stream, pos)
         if ctx.mark == ctx.loc.col:
             return parse_fn(stream, pos, ctx, ins, rem)
         return Error(ctx.loc, ["indentation"])
@@ -64,14 +66,17 @@ def _aligned(parse_fns: ParseFns[S, A]) -> ParseFn[S, A]:
 
 
 def aligned(parse_fns: ParseFns[S, A]) -> ParseFns[S, A]:
-    return ParseFns(_aligned_fast(parse_fns), _aligned(parse_fns))
+    return ParseFns(
+        _aligned_fast(parse_fns), _aligned(parse_fns),
+        node=("aligned", parse_fns)
+    )
 
 
 def _indented_fast(delta: int, parse_fns: ParseFns[S, A]) -> ParseFastFn[S, A]:
     parse_fn = parse_fns.fast_fn
 
     def indented(stream: S, pos: int, ctx: Ctx[S]) -> SimpleResult[A, S]:
-        ctx = ctx.update_loc(stream, pos)
+        ctx = ctx.locate(stream, pos)
         level = ctx.loc.col
         if ctx.mark + delta == level:
             return parse_fn(stream, pos, ctx.set_mark(level)).set_ctx(ctx)
@@ -86,7 +91,7 @@ def _indented(delta: int, parse_fns: ParseFns[S, A]) -> ParseFn[S, A]:
     def indented(
             stream: S, pos: int, ctx: Ctx[S], ins: int,
             rem: Optional[int]) -> Result[A, S]:
-        ctx = ctx.update_loc(stream, pos)
+        ctx = ctx.locate(stream, pos)
         level = ctx.loc.col
         if ctx.mark + delta == level:
             return parse_fn(
@@ -101,4 +106,5 @@ def indented(delta: int, parse_fns: ParseFns[S, A]) -> ParseFns[S, A]:
     return ParseFns(
         _indented_fast(delta, parse_fns),
         _indented(delta, parse_fns),
+        node=("indented", delta, parse_fns)
     )
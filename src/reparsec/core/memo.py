@@ -0,0 +1,231 @@
+from typing import Any, Dict, List, Optional, Tuple, TypeVar
+
+from .parser import ParseFastFn, ParseFn, ParseFns, first_set
+from .recovery import continue_parse
+from .repair import Repair
+from .result import Error, Ok, Recovered, Result, SimpleResult
+from .types import Ctx
+
+S = TypeVar("S")
+A = TypeVar("A")
+
+
+MemoKey = Tuple[object, int, int]
+RepairKey = Tuple[object, int, int, int, Optional[int]]
+
+
+class _Frame:
+    __slots__ = "seed", "index", "left_recursive", "involved"
+
+    def __init__(self, seed: SimpleResult[Any, Any], index: int):
+        self.seed = seed
+        self.index = index
+        self.left_recursive = False
+        self.involved = False
+
+
+class Memo:
+    __slots__ = "results", "repairs", "recursive", "active", "stack"
+
+    def __init__(self) -> None:
+        self.results: Dict[MemoKey, SimpleResult[Any, Any]] = {}
+        # Results of the error recovery, which also depend on the number of
+        # insertions left
+        self.repairs: Dict[RepairKey, Result[Any, Any]] = {}
+        # Whether the parsers are left recursive at the positions the fast
+        # path has parsed
+        self.recursive: Dict[MemoKey, bool] = {}
+        self.active: Dict[MemoKey, _Frame] = {}
+        self.stack: List[_Frame] = []
+
+    def enter(self, key: MemoKey, seed: SimpleResult[Any, Any]) -> _Frame:
+        frame = _Frame(seed, len(self.stack))
+        self.active[key] = frame
+        self.stack.append(frame)
+        return frame
+
+    def leave(self, key: MemoKey) -> None:
+        del self.active[key]
+        self.stack.pop()
+
+    def recurse(self, frame: _Frame) -> SimpleResult[Any, Any]:
+        # Left recursion: every parser between the frame and the top of the
+        # stack depends on the seed, so their results must not be cached
+        frame.left_recursive = True
+        for f in self.stack[frame.index + 1:]:
+            f.involved = True
+        return _copy(frame.seed)
+
+
+def _copy(r: SimpleResult[A, S]) -> SimpleResult[A, S]:
+    if type(r) is Ok:
+        return Ok(r.value, r.pos, r.ctx, r.expected, r.consumed)
+    return Error(r.loc, r.expected, r.consumed)
+
+
+def _copy_recovered(r: Result[A, S]) -> Result[A, S]:
+    # The callers update the expected labels of the repairs in place, the
+    # operations are persistent and shared
+    if type(r) is not Recovered:
+        return _copy(r)
+    return Recovered(
+        [
+            Repair(
+                rep.cost, rep.prio, rep.ins, rep.ops, rep.value, rep.pos,
+                rep.ctx, rep.expected, rep.consumed
+            )
+            for rep in r.repairs
+        ],
+        r.min_prio, r.loc, r.expected, r.consumed
+    )
+
+
+def _grow_fast(
+        parse_fn: ParseFastFn[S, A], stream: S, pos: int, ctx: Ctx[S],
+        frame: _Frame, seed: Ok[A, S]) -> SimpleResult[A, S]:
+    while True:
+        frame.seed = seed
+        r = parse_fn(stream, pos, ctx)
+        if type(r) is Ok:
+            if r.pos <= seed.pos:
+                return seed
+            seed = r
+        elif r.loc == seed.ctx.get_loc(stream, seed.pos):
+            return Ok(
+                seed.value, seed.pos, seed.ctx, r.expected, seed.consumed
+            )
+        else:
+            return r
+
+
+def _grow(
+        parse_fns: ParseFns[S, A], stream: S, pos: int, ctx: Ctx[S],
+        ins: int, rem: Optional[int], frame: _Frame,
+        seed: Ok[A, S]) -> Result[A, S]:
+    table = ctx.memo
+    assert table is not None
+    key = (parse_fns.fast_fn, pos, ctx.mark)
+    while True:
+        # Try to grow the seed without repairs first, so the insertions are
+        # made only where the fast path fails
+        table.enter(key, seed)
+        r = parse_fns.fast_fn(stream, pos, ctx)
+        table.leave(key)
+        if type(r) is Error:
+            if r.loc == seed.ctx.get_loc(stream, seed.pos):
+                return Ok(
+                    seed.value, seed.pos, seed.ctx, r.expected, seed.consumed
+                )
+            frame.seed = seed
+            rr = parse_fns.fn(stream, pos, ctx, ins, rem)
+            if type(rr) is Recovered:
+                return _resume(
+                    parse_fns, stream, pos, ctx, ins, frame, rr, seed.pos
+                )
+            if type(rr) is Error:
+                return rr
+            r = rr
+        if r.pos <= seed.pos:
+            return seed
+        seed = r
+
+
+def _resume(
+        parse_fns: ParseFns[S, A], stream: S, pos: int, ctx: Ctx[S],
+        ins: int, frame: _Frame, r: Recovered[A, S],
+        last: int) -> Result[A, S]:
+    def grow(v: A, p: int, c: Ctx[S], i: int) -> Result[A, S]:
+        seed = Ok(v, p, c, (), p != pos)
+        if p > last:
+            return _grow(parse_fns, stream, pos, ctx, ins, i, frame, seed)
+        return seed
+
+    return continue_parse(r, ins, grow, lambda _, v: v)
+
+
+def _memo_fast(parse_fns: ParseFns[S, A]) -> ParseFastFn[S, A]:
+    parse_fn = parse_fns.fast_fn
+
+    def memo(stream: S, pos: int, ctx: Ctx[S]) -> SimpleResult[A, S]:
+        table = ctx.memo
+        if table is None:
+            return parse_fn(stream, pos, ctx)
+        key = (parse_fn, pos, ctx.mark)
+        frame = table.active.get(key)
+        if frame is not None:
+            return table.recurse(frame)
+        r = table.results.get(key)
+        if r is not None:
+            return _copy(r)
+        frame = table.enter(key, Error(ctx.get_loc(stream, pos)))
+        r = parse_fn(stream, pos, ctx)
+        if frame.left_recursive and type(r) is Ok:
+            r = _grow_fast(parse_fn, stream, pos, ctx, frame, r)
+        table.leave(key)
+        table.recursive[key] = frame.left_recursive
+        if not frame.involved:
+            table.results[key] = r
+        return _copy(r)
+
+    return memo
+
+
+def _left_recursive(
+        memo_fast: ParseFastFn[S, A], parse_fns: ParseFns[S, A], stream: S,
+        pos: int, ctx: Ctx[S], table: Memo) -> bool:
+    # A parser is called again at the same position either by the left
+    # recursion, or after an insertion that consumes no input. The fast
+    # path makes no insertions, so it tells them apart
+    key = (parse_fns.fast_fn, pos, ctx.mark)
+    if key not in table.recursive:
+        memo_fast(stream, pos, ctx)
+    return table.recursive.get(key, True)
+
+
+def _memo(
+        parse_fns: ParseFns[S, A],
+        memo_fast: ParseFastFn[S, A]) -> ParseFn[S, A]:
+    parse_fn = parse_fns.fn
+
+    def memo(
+            stream: S, pos: int, ctx: Ctx[S], ins: int,
+            rem: Optional[int]) -> Result[A, S]:
+        table = ctx.memo
+        if table is None:
+            return parse_fn(stream, pos, ctx, ins, rem)
+        key = (parse_fn, pos, ctx.mark)
+        frame = table.active.get(key)
+        if frame is not None:
+            if _left_recursive(
+                    memo_fast, parse_fns, stream, pos, ctx, table):
+                return table.recurse(frame)
+            return parse_fn(stream, pos, ctx, ins, rem)
+        # Alternatives try their parsers without repairs, then again with
+        # repairs, so the same parser is often called again with the same
+        # arguments
+        rkey = (parse_fn, pos, ctx.mark, ins, rem)
+        r = table.repairs.get(rkey)
+        if r is not None:
+            return _copy_recovered(r)
+        frame = table.enter(key, Error(ctx.get_loc(stream, pos)))
+        r = parse_fn(stream, pos, ctx, ins, rem)
+        if frame.left_recursive:
+            if type(r) is Ok:
+                r = _grow(parse_fns, stream, pos, ctx, ins, rem, frame, r)
+            elif type(r) is Recovered:
+                r = _resume(parse_fns, stream, pos, ctx, ins, frame, r, pos)
+        table.leave(key)
+        if not frame.involved:
+            table.repairs[rkey] = r
+            return _copy_recovered(r)
+        return r
+
+    return memo
+
+
+def memo(parse_fns: ParseFns[S, A]) -> ParseFns[S, A]:
+    memo_fast = _memo_fast(parse_fns)
+    return ParseFns(
+        memo_fast, _memo(parse_fns, memo_fast), first_set(parse_fns),
+        ("memo", parse_fns)
+    )
@@ -0,0 +1,280 @@
+from typing import (
+    Any, Callable, Generic, Iterable, List, Optional, Sequence, Tuple, TypeVar
+)
+
+from .chain import Append
+from .combinators import alt, fmap, many, seq
+from .parser import ParseFastFn, ParseFns, first_set
+from .result import Error, Ok, SimpleResult
+from .types import Ctx
+
+S = TypeVar("S")
+A = TypeVar("A")
+
+PREFIX = "prefix"
+POSTFIX = "postfix"
+INFIXL = "infixl"
+INFIXR = "infixr"
+
+
+class Operator(Generic[S, A]):
+    __slots__ = "kind", "parse_fns"
+
+    def __init__(self, kind: str, parse_fns: ParseFns[S, Any]):
+        self.kind = kind
+        self.parse_fns = parse_fns
+
+
+Table = Sequence[Sequence[Operator[S, A]]]
+_Frame = Tuple[int, str, Any, Any]
+_Levels = List[Optional[ParseFastFn[S, Any]]]
+
+
+def _choice(alts: Sequence[ParseFns[S, Any]]) -> Optional[ParseFns[S, Any]]:
+    res: Optional[ParseFns[S, Any]] = None
+    for parse_fns in alts:
+        res = parse_fns if res is None else alt(res, parse_fns)
+    return res
+
+
+def _apply_prefix(v: Tuple[List[Callable[[A], A]], A]) -> A:
+    ops, res = v
+    for op in reversed(ops):
+        res = op(res)
+    return res
+
+
+def _apply_postfix(v: Tuple[A, List[Callable[[A], A]]]) -> A:
+    res, ops = v
+    for op in ops:
+        res = op(res)
+    return res
+
+
+def _reduce_left(v: Tuple[A, List[Tuple[Callable[[A, A], A], A]]]) -> A:
+    res, tail = v
+    for op, arg in tail:
+        res = op(res, arg)
+    return res
+
+
+def _reduce_right(v: Tuple[A, List[Tuple[Callable[[A, A], A], A]]]) -> A:
+    res, tail = v
+    rassoc: List[Tuple[A, Callable[[A, A], A]]] = []
+    for op, arg in tail:
+        rassoc.append((res, op))
+        res = arg
+    for arg, op in reversed(rassoc):
+        res = op(arg, res)
+    return res
+
+
+def _kinds(
+        level: Sequence[Operator[S, A]], *kinds: str) -> List[Operator[S, A]]:
+    return [op for op in level if op.kind in kinds]
+
+
+def _layered(operand: ParseFns[S, A], table: Table[S, A]) -> ParseFns[S, A]:
+    # The table as a stack of chainl1 and chainr1 levels. It defines the
+    # behaviour of the operator parser and is used for error recovery
+    term = operand
+    for level in table:
+        pre = _choice([op.parse_fns for op in _kinds(level, PREFIX)])
+        if pre is not None:
+            term = fmap(seq(many(pre), term), _apply_prefix)
+        post = _choice([op.parse_fns for op in _kinds(level, POSTFIX)])
+        if post is not None:
+            term = fmap(seq(term, many(post)), _apply_postfix)
+        infix = _kinds(level, INFIXL, INFIXR)
+        op = _choice([op.parse_fns for op in infix])
+        if op is not None:
+            term = fmap(
+                seq(term, many(seq(op, term))),
+                _reduce_left if infix[0].kind == INFIXL else _reduce_right
+            )
+    return term
+
+
+def _tag(*tag: object) -> Callable[[Any], Tuple[Any, ...]]:
+    return lambda fn: (*tag, fn)
+
+
+def _prefixes(table: Table[S, A]) -> _Levels[S]:
+    # For every level, the prefix operators of that level and the tighter
+    # ones, loosest first: the order in which the levels try them
+    res: _Levels[S] = []
+    for n in range(len(table)):
+        choice = _choice([
+            fmap(op.parse_fns, _tag(k))
+            for k in range(n, -1, -1)
+            for op in _kinds(table[k], PREFIX)
+        ])
+        res.append(None if choice is None else choice.fast_fn)
+    return res
+
+
+def _operators(
+        table: Table[S, A],
+        postfix: bool) -> _Levels[S]:
+    # For every level, the postfix and infix operators of that level and the
+    # looser ones, in the order in which the levels try them after an operand
+    res: _Levels[S] = []
+    for n in range(len(table)):
+        choice = _choice([
+            fmap(op.parse_fns, _tag(k, op.kind))
+            for k in range(n, len(table))
+            for op in (
+                (_kinds(table[k], POSTFIX) if postfix or k > n else []) +
+                _kinds(table[k], INFIXL, INFIXR)
+            )
+        ])
+        res.append(None if choice is None else choice.fast_fn)
+    return res
+
+
+def _reduce(frames: List[_Frame], x: Any) -> Any:
+    while frames:
+        _, kind, fn, lhs = frames.pop()
+        x = fn(x) if kind == PREFIX else fn(lhs, x)
+    return x
+
+
+def _unwind(frames: List[_Frame], x: Any, level: int, kind: str) -> Any:
+    # Applies the operators that bind tighter than the next one
+    while frames:
+        fl, fk, fn, lhs = frames[-1]
+        if fl > level or fl == level and (
+                fk == INFIXL and kind != INFIXL or fk == INFIXR):
+            break
+        frames.pop()
+        x = fn(x) if fk == PREFIX else fn(lhs, x)
+    return x
+
+
+def _parse_operand(
+        operand_fn: ParseFastFn[S, Any], prefixes: _Levels[S], stream: S,
+        r: Ok[Any, S], frames: List[_Frame], limit: int,
+        last: int) -> SimpleResult[Any, S]:
+    pos = r.pos
+    ctx = r.ctx
+    expected = r.expected
+    consumed = r.consumed
+    prefix_fn = prefixes[limit]
+    while prefix_fn is not None:
+        rp = prefix_fn(stream, pos, ctx)
+        if type(rp) is Error:
+            if rp.consumed:
+                return rp
+            expected = Append(expected, rp.expected)
+            break
+        if not rp.consumed:
+            raise RuntimeError("parser shouldn't accept empty string")
+        level, fn = rp.value
+        frames.append((level, PREFIX, fn, None))
+        pos = rp.pos
+        ctx = rp.ctx
+        expected = ()
+        consumed = True
+        prefix_fn = prefixes[level]
+    ra = operand_fn(stream, pos, ctx)
+    if type(ra) is Error:
+        if ra.consumed:
+            return ra
+        return Error(ra.loc, Append(expected, ra.expected), consumed)
+    if ra.pos == last:
+        raise RuntimeError("parser shouldn't accept empty string")
+    return ra.prepend_expected(expected, consumed)
+
+
+def _missed(
+        tails: _Levels[S], stream: S, pos: int, ctx: Ctx[S],
+        frames: List[_Frame], expected: Iterable[str]) -> Iterable[str]:
+    # The layered parser loses the expected labels of the levels below an
+    # infix operator once its right operand is parsed, so the labels are
+    # collected again, starting from the loosest pending operator
+    for level, kind, _, _ in frames:
+        if kind != PREFIX:
+            tail_fn = tails[level]
+            assert tail_fn is not None
+            return tail_fn(stream, pos, ctx).expected
+    return expected
+
+
+def _parse_operators(
+        operators: _Levels[S], tails: _Levels[S], stream: S, r: Ok[Any, S],
+        frames: List[_Frame]) -> SimpleResult[Any, S]:
+    x = r.value
+    pos = r.pos
+    ctx = r.ctx
+    expected = r.expected
+    consumed = r.consumed
+    op_fn = operators[0]
+    while op_fn is not None:
+        ro = op_fn(stream, pos, ctx)
+        if type(ro) is Error:
+            if ro.consumed:
+                return ro
+            expected = _missed(
+                tails, stream, pos, ctx, frames, Append(expected, ro.expected)
+            )
+            break
+        level, kind, fn = ro.value
+        x = _unwind(frames, x, level, kind)
+        if kind != POSTFIX:
+            frames.append((level, kind, fn, x))
+            return ro.prepend_expected(expected, consumed)
+        if not ro.consumed:
+            raise RuntimeError("parser shouldn't accept empty string")
+        x = fn(x)
+        pos = ro.pos
+        ctx = ro.ctx
+        expected = ()
+        consumed = True
+        op_fn = operators[level]
+    return Ok(_reduce(frames, x), pos, ctx, expected, consumed)
+
+
+def _expr_fast(
+        operand: ParseFns[S, A], table: Table[S, A]) -> ParseFastFn[S, A]:
+    operand_fn = operand.fast_fn
+    prefixes = _prefixes(table)
+    operators = _operators(table, True)
+    tails = _operators(table, False)
+    top = len(table) - 1
+
+    def expr(stream: S, pos: int, ctx: Ctx[S]) -> SimpleResult[A, S]:
+        # Precedence climbing: operators waiting for their right operand are
+        # kept on the stack of frames, and every operator is parsed once,
+        # then applied when a looser operator or the end of the expression
+        # is found
+        frames: List[_Frame] = []
+        r: SimpleResult[Any, S] = Ok(None, pos, ctx)
+        last = -1
+        limit = top
+        while type(r) is Ok:
+            ra = _parse_operand(
+                operand_fn, prefixes, stream, r, frames, limit, last
+            )
+            if type(ra) is Error:
+                return ra
+            r = _parse_operators(operators, tails, stream, ra, frames)
+            if not frames:
+                break
+            last = ra.pos
+            limit = frames[-1][0]
+        return r
+
+    return expr
+
+
+def expr_table(
+        operand: ParseFns[S, A], table: Table[S, A]) -> ParseFns[S, A]:
+    for level in table:
+        if _kinds(level, INFIXL) and _kinds(level, INFIXR):
+            raise ValueError(
+                "Expected operators of the same associativity in a level"
+            )
+    layered = _layered(operand, table)
+    if not table:
+        return layered
+    return ParseFns(_expr_fast(operand, table), layered.fn, first_set(layered))
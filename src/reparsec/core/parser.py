@@ -1,6 +1,8 @@
 from abc import abstractmethod
-from dataclasses import dataclass
-from typing import Callable, Generic, Optional, TypeVar
+from typing import (
+    Any, Callable, Dict, FrozenSet, Generic, Hashable, Iterable, Optional,
+    Tuple, TypeVar
+)
 
 from .result import Result, SimpleResult
 from .types import Ctx
@@ -21,12 +23,61 @@ ParseFn = Callable[
 ]
 
 
-@dataclass(eq=False, frozen=True, repr=False)
+KeyFn = Optional[Callable[[Any], Hashable]]
+
+
+class FirstSet:
+    """
+    Describes the elements a parser can start with. If the key of the
+    current element (the element itself when the key function is ``None``)
+    is not in ``keys``, or the input is exhausted, the parser fails at the
+    current position without consuming input and reports ``expected``.
+    ``alts`` holds the branches of a chain of alternatives.
+    """
+
+    __slots__ = "keys", "expected", "alts"
+
+    def __init__(
+            self, keys: Dict[KeyFn, FrozenSet[Hashable]],
+            expected: Iterable[str] = (),
+            alts: "Optional[Tuple[ParseFns[Any, Any], ...]]" = None):
+        self.keys = keys
+        self.expected = expected
+        self.alts = alts
+
+
+Node = Tuple[Any, ...]
+
+
 class ParseFns(Generic[S_contra, A_co]):
-    __slots__ = "fast_fn", "fn"
+    """
+    A pair of parse functions. ``node`` describes how the functions were
+    built: the name of the combinator followed by its arguments. Parsers
+    without ``node`` are treated as opaque by the code generator.
+    """
+
+    __slots__ = "fast_fn", "fn", "first", "node"
+
+    def __init__(
+            self, fast_fn: ParseFastFn[S_contra, A_co],
+            fn: ParseFn[S_contra, A_co], first: Optional[FirstSet] = None,
+            node: Optional[Node] = None):
+        self.fast_fn = fast_fn
+        self.fn = fn
+        self.first = first
+        self.node = node
+
+
+def first_set(parse_fns: ParseFns[Any, Any]) -> Optional[FirstSet]:
+    """
+    Returns the first set for a parser that fails exactly when
+    ``parse_fns`` fails without consuming input.
+    """
 
-    fast_fn: ParseFastFn[S_contra, A_co]
-    fn: ParseFn[S_contra, A_co]
+    first = parse_fns.first
+    if first is None or first.alts is None:
+        return first
+    return FirstSet(first.keys, first.expected)
 
 
 class ParseObj(Generic[S_contra, A_co]):
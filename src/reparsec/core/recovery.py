@@ -1,8 +1,14 @@
-from typing import Callable, Iterable, List, TypeVar, Union
+import heapq
+from typing import (
+    Any, Callable, Generic, Iterable, Iterator, List, Optional, Tuple, TypeVar,
+    Union
+)
+
+from typing_extensions import final
 
 from .chain import Append
-from .repair import OpItem, Repair, ops_prepend_expected
-from .result import Ok, Recovered, Result
+from .repair import Ops, Repair, ops_join, ops_prepend_expected, repair_key
+from .result import Error, Ok, Recovered, Result
 from .types import Ctx
 
 S = TypeVar("S")
@@ -13,6 +19,39 @@ C = TypeVar("C")
 
 ContinueFn = Callable[[A, int, Ctx[S], int], Result[B, S]]
 MergeFn = Callable[[A, B], C]
+# The result of the item that stops a repetition, and the values before it
+LoopResult = Tuple[Union[Error, Recovered[A, S]], Ok[List[A], S]]
+LoopFn = Callable[[int, Ctx[S]], LoopResult[A, S]]
+
+
+def _beam_key(rep: Repair[A, S]) -> Tuple[int, int, int, bool]:
+    # The repairs being combined stop at different positions, and the ones
+    # behind have yet to pay for the input up to the others. Skipping the
+    # rest of the input costs one per element, so the repairs are compared
+    # by the cost of reaching the end that way first
+    return (rep.cost - rep.pos, *repair_key(rep))
+
+
+def _best(reps: List[Repair[A, S]]) -> Optional[List[int]]:
+    # The indices of the best repairs if their number is limited. The limit
+    # is the same in every context of a parse, so it is taken from any
+    # repair. The order of the repairs is kept, as it breaks the ties in the
+    # end
+    if not reps:
+        return None
+    limit = reps[0].ctx.max_repairs
+    if limit is None or len(reps) <= limit:
+        return None
+    return sorted(heapq.nsmallest(
+        limit, range(len(reps)), key=lambda i: _beam_key(reps[i])
+    ))
+
+
+def _prune(reps: List[Repair[A, S]]) -> List[Repair[A, S]]:
+    best = _best(reps)
+    if best is None:
+        return reps
+    return [reps[i] for i in best]
 
 
 def continue_parse(
@@ -42,6 +81,112 @@ def continue_parse(
                     )
                 )
 
+    return Recovered(
+        _prune(reps), ra.min_prio, ra.loc, ra.expected, ra.consumed
+    )
+
+
+@final
+class _Chunk(Generic[A]):
+    # The values of a repetition as a persistent list of chunks, shared by
+    # the repairs that continue the same prefix
+    __slots__ = "values", "prev"
+
+    def __init__(self, values: List[A], prev: "Optional[_Chunk[A]]"):
+        self.values = values
+        self.prev = prev
+
+
+def _values(chunk: Optional[_Chunk[A]]) -> List[A]:
+    chunks: List[List[A]] = []
+    while chunk is not None:
+        chunks.append(chunk.values)
+        chunk = chunk.prev
+    res: List[A] = []
+    for values in reversed(chunks):
+        res.extend(values)
+    return res
+
+
+def _flatten(tree: List[Any]) -> List[Repair[A, S]]:
+    # Lists the repairs in the order of the nested continuations
+    res: List[Repair[A, S]] = []
+    stack: List[Iterator[Any]] = [iter(tree)]
+    while stack:
+        for item in stack[-1]:
+            if type(item) is list:
+                stack.append(iter(item))
+                break
+            res.append(item)
+        else:
+            stack.pop()
+    return res
+
+
+def continue_many(
+        ra: Recovered[A, S], ins: int, value: List[A],
+        loop: LoopFn[S, A]) -> Recovered[List[A], S]:
+    # Same as continue_parse that continues the rest of a repetition with
+    # the same repetition and appends the values, but without the recursion.
+    # The repairs are continued one error at a time, and the continuations
+    # of an error are pruned together, so the beam of repairs bounds the work
+    # for every error. Each continuation keeps its place in the tree of the
+    # repairs of the previous errors, to list the repairs in the same order
+    tree: List[Any] = []
+    prefix = _Chunk(value, None)
+    states: List[Repair[_Chunk[A], S]] = [
+        Repair(
+            r.cost, r.prio, r.ins, r.ops, _Chunk([r.value], prefix), r.pos,
+            r.ctx, r.expected, r.consumed
+        )
+        for r in ra.repairs
+    ]
+    slots = [tree] * len(states)
+    while states:
+        next_states: List[Repair[_Chunk[A], S]] = []
+        next_slots: List[List[Any]] = []
+        for r, slot in zip(states, slots):
+            rb, ok = loop(r.pos, r.ctx)
+            chunk = _Chunk(ok.value, r.value) if ok.value else r.value
+            if type(rb) is Recovered:
+                node: List[Any] = []
+                slot.append(node)
+                for rr in rb.repairs:
+                    next_states.append(
+                        Repair(
+                            r.cost + rr.cost, r.prio, rr.ins, _join_ops(r, rr),
+                            _Chunk([rr.value], chunk), rr.pos, rr.ctx,
+                            _append_expected(r, rr.expected, rr.consumed),
+                            r.consumed or rr.consumed
+                        )
+                    )
+                    next_slots.append(node)
+            elif not rb.consumed:
+                slot.append(
+                    Repair(
+                        r.cost, r.prio, r.ins if r.pos == ok.pos else ins,
+                        r.ops, chunk, ok.pos, ok.ctx,
+                        _append_expected(r, ok.expected, ok.consumed),
+                        r.consumed or ok.consumed
+                    )
+                )
+        best = _best(next_states)
+        if best is None:
+            states = next_states
+            slots = next_slots
+        else:
+            states = [next_states[i] for i in best]
+            slots = [next_slots[i] for i in best]
+
+    finals: List[Repair[_Chunk[A], S]] = _flatten(tree)
+    reps: List[Repair[List[A], S]] = []
+    for r in _prune(finals):
+        reps.append(
+            Repair(
+                r.cost, r.prio, r.ins, r.ops, _values(r.value), r.pos, r.ctx,
+                r.expected, r.consumed
+            )
+        )
     return Recovered(reps, ra.min_prio, ra.loc, ra.expected, ra.consumed)
 
 
@@ -58,6 +203,7 @@ def join_repairs(
     else:
         reps.extend(r for r in rb.repairs if r.prio is not None)
         min_prio = rb.min_prio
+    reps = _prune(reps)
     if ra.consumed:
         return Recovered(reps, min_prio, ra.loc, ra.expected, True)
     if rb.consumed:
@@ -68,11 +214,10 @@ def join_repairs(
     )
 
 
-def _join_ops(rep: Repair[A, S], repb: Repair[B, S]) -> List[OpItem]:
-    ops = [OpItem(i.op, i.loc, i.expected, i.consumed) for i in rep.ops]
-    ops_prepend_expected(repb.ops, rep.expected, rep.consumed)
-    ops.extend(repb.ops)
-    return ops
+def _join_ops(rep: Repair[A, S], repb: Repair[B, S]) -> Ops:
+    return ops_join(
+        rep.ops, ops_prepend_expected(repb.ops, rep.expected, rep.consumed)
+    )
 
 
 def _append_expected(
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Generic, Iterable, List, Optional, TypeVar, Union
+from typing import Generic, Iterable, List, Optional, Tuple, TypeVar, Union
 
 from typing_extensions import final
 
@@ -14,58 +14,183 @@ S = TypeVar("S")
 @dataclass
 @final
 class Skip:
+    __slots__ = "count",
+
     count: int
 
 
 @dataclass
 @final
 class Insert:
+    __slots__ = "label",
+
     label: str
 
 
 RepairOp = Union[Skip, Insert]
 
 
-@dataclass
+@final
 class OpItem:
-    op: RepairOp
-    loc: Loc
-    expected: Iterable[str] = ()
-    consumed: bool = False
+    __slots__ = "op", "loc", "expected", "consumed"
 
+    def __init__(
+            self, op: RepairOp, loc: Loc, expected: Iterable[str] = (),
+            consumed: bool = False):
+        self.op = op
+        self.loc = loc
+        self.expected = expected
+        self.consumed = consumed
 
-@dataclass
-class Repair(Generic[A_co, S]):
-    cost: int
-    prio: Optional[int]
-    ins: int
-    ops: List[OpItem]
-    value: A_co
-    pos: int
-    ctx: Ctx[S]
-    expected: Iterable[str] = ()
-    consumed: bool = False
+    def __repr__(self) -> str:
+        return (
+            "OpItem(op={!r}, loc={!r}, expected={!r}, consumed={!r})"
+        ).format(self.op, self.loc, self.expected, self.consumed)
+
+
+@final
+class _Join:
+    __slots__ = "left", "right"
+
+    def __init__(self, left: "Ops", right: "Ops"):
+        self.left = left
+        self.right = right
+
+
+@final
+class _Relabel:
+    # The expected labels of the unconsumed operations of ops, either set or
+    # prepended, which are applied once the operations are listed
+    __slots__ = "ops", "replace", "expected", "consumed"
+
+    def __init__(
+            self, ops: "Ops", replace: bool, expected: Iterable[str],
+            consumed: bool):
+        self.ops = ops
+        self.replace = replace
+        self.expected = expected
+        self.consumed = consumed
 
 
-def ops_set_expected(ops: List[OpItem], expected: Iterable[str]) -> None:
-    for op in ops:
-        if not op.consumed:
-            op.expected = expected
+# The operations of a repair as a persistent tree, shared by the repairs that
+# continue it
+Ops = Union[OpItem, _Join, _Relabel]
+_Change = Tuple[bool, Iterable[str], bool]
+
+
+@final
+class Repair(Generic[A_co, S]):
+    __slots__ = (
+        "cost", "prio", "ins", "ops", "value", "pos", "ctx", "expected",
+        "consumed"
+    )
+
+    def __init__(
+            self, cost: int, prio: Optional[int], ins: int, ops: Ops,
+            value: A_co, pos: int, ctx: Ctx[S], expected: Iterable[str] = (),
+            consumed: bool = False):
+        self.cost = cost
+        self.prio = prio
+        self.ins = ins
+        self.ops = ops
+        self.value = value
+        self.pos = pos
+        self.ctx = ctx
+        self.expected = expected
+        self.consumed = consumed
+
+    def __repr__(self) -> str:
+        return (
+            "Repair(cost={!r}, prio={!r}, ins={!r}, ops={!r}, value={!r},"
+            " pos={!r}, ctx={!r}, expected={!r}, consumed={!r})"
+        ).format(
+            self.cost, self.prio, self.ins, ops_items(self.ops), self.value,
+            self.pos, self.ctx, self.expected, self.consumed
+        )
+
+
+def repair_key(rep: Repair[A, S]) -> Tuple[int, int, bool]:
+    # The best repair is the cheapest one, then the one that reaches
+    # further, then the one that is not an automatic insertion
+    return rep.cost, -rep.pos, rep.prio is None
+
+
+def _relabel(
+        ops: Ops, replace: bool, expected: Iterable[str],
+        consumed: bool) -> Ops:
+    if type(ops) is OpItem:
+        if ops.consumed:
+            return ops
+        return OpItem(
+            ops.op, ops.loc,
+            expected if replace else Append(expected, ops.expected), consumed
+        )
+    if type(ops) is _Relabel:
+        if ops.consumed:
+            # All the operations are consumed already
+            return ops
+        return _Relabel(
+            ops.ops, ops.replace or replace,
+            expected if replace else Append(expected, ops.expected), consumed
+        )
+    return _Relabel(ops, replace, expected, consumed)
+
+
+def ops_set_expected(ops: Ops, expected: Iterable[str]) -> Ops:
+    return _relabel(ops, True, expected, False)
 
 
 def ops_prepend_expected(
-        ops: List[OpItem], expected: Iterable[str], consumed: bool) -> None:
-    for op in ops:
-        if not op.consumed:
-            op.expected = Append(expected, op.expected)
-            op.consumed |= consumed
+        ops: Ops, expected: Iterable[str], consumed: bool) -> Ops:
+    return _relabel(ops, False, expected, consumed)
+
+
+def ops_join(left: Ops, right: Ops) -> Ops:
+    return _Join(left, right)
+
+
+def _compose(inner: _Change, outer: Optional[_Change]) -> _Change:
+    if outer is None or inner[2]:
+        return inner
+    replace, expected, consumed = outer
+    return (
+        inner[0] or replace,
+        expected if replace else Append(expected, inner[1]), consumed
+    )
+
+
+def ops_items(ops: Ops) -> List[OpItem]:
+    # The tree is walked once, composing the pending relabelings on the way
+    # down, without recursion, as its depth grows with the number of errors
+    res: List[OpItem] = []
+    stack: List[Tuple[Ops, Optional[_Change]]] = [(ops, None)]
+    while stack:
+        node, change = stack.pop()
+        if type(node) is _Join:
+            stack.append((node.right, change))
+            stack.append((node.left, change))
+        elif type(node) is _Relabel:
+            stack.append((
+                node.ops,
+                _compose((node.replace, node.expected, node.consumed), change)
+            ))
+        elif change is None or node.consumed:
+            res.append(node)
+        else:
+            replace, expected, consumed = change
+            res.append(OpItem(
+                node.op, node.loc,
+                expected if replace else Append(expected, node.expected),
+                consumed
+            ))
+    return res
 
 
 def make_insert(
         rem: int, value: A, pos: int, ctx: Ctx[S], loc: Loc, label: str,
         expected: Iterable[str] = ()) -> Repair[A, S]:
     return Repair(
-        1, None, rem - 1, [OpItem(Insert(label), loc, expected)], value,
+        1, None, rem - 1, OpItem(Insert(label), loc, expected), value,
         pos, ctx, (), True
     )
 
@@ -74,7 +199,7 @@ def make_user_insert(
         rem: int, value: A, pos: int, ctx: Ctx[S], loc: Loc, label: str,
         expected: Iterable[str] = ()) -> Repair[A, S]:
     return Repair(
-        1, 0, rem - 1, [OpItem(Insert(label), loc, expected)], value, pos, ctx,
+        1, 0, rem - 1, OpItem(Insert(label), loc, expected), value, pos, ctx,
         (), True
     )
 
@@ -83,7 +208,7 @@ def make_skip(
         ins: int, value: A, pos: int, ctx: Ctx[S], loc: Loc, skip: int,
         expected: Iterable[str] = ()) -> Repair[A, S]:
     return Repair(
-        skip, False, ins, [OpItem(Skip(skip), loc, expected)], value, pos, ctx,
+        skip, False, ins, OpItem(Skip(skip), loc, expected), value, pos, ctx,
         (), True
     )
 
@@ -92,5 +217,5 @@ def make_pending_skip(
         ins: int, value: A, pos: int, ctx: Ctx[S], loc: Loc, skip: int,
         expected: Iterable[str] = ()) -> Repair[A, S]:
     return Repair(
-        skip, False, ins, [OpItem(Skip(skip), loc, expected)], value, pos, ctx
+        skip, False, ins, OpItem(Skip(skip), loc, expected), value, pos, ctx
     )
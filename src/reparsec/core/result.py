@@ -131,7 +131,7 @@ class Recovered(Generic[A_co, S]):
         for r in self.repairs:
             if not r.consumed:
                 r.expected = expected
-            ops_set_expected(r.ops, expected)
+            r.ops = ops_set_expected(r.ops, expected)
         return self
 
     def prepend_expected(
@@ -144,7 +144,7 @@ class Recovered(Generic[A_co, S]):
             if not r.consumed:
                 r.expected = Append(expected, r.expected)
                 r.consumed |= consumed
-            ops_prepend_expected(r.ops, expected, consumed)
+            r.ops = ops_prepend_expected(r.ops, expected, consumed)
         return self
 
 
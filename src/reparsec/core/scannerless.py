@@ -1,13 +1,29 @@
+import importlib
 import re
-from typing import List, Optional, Pattern, TypeVar, Union
+from array import array
+from bisect import bisect_right
+from itertools import chain
+from typing import (
+    Any, Callable, Dict, FrozenSet, Iterator, List, Mapping, Match, Optional,
+    Pattern, Tuple, TypeVar, Union, cast
+)
 
-from .parser import ParseFastFn, ParseFn, ParseFns
+from .combinators import alt, fmap
+from .parser import FirstSet, ParseFastFn, ParseFn, ParseFns
 from .repair import Repair, make_insert, make_skip
 from .result import Error, Ok, Recovered, Result, SimpleResult
 from .types import Ctx, Loc
 
 A = TypeVar("A")
 
+try:
+    _sre_parse: Any = importlib.import_module("re._parser")
+except ImportError:  # pragma: no cover
+    _sre_parse = importlib.import_module("sre_parse")
+
+_MAX_FIRST_CHARS = 256
+_NEWLINE = re.compile("\n")
+
 
 def get_loc(loc: Loc, stream: str, pos: int) -> Loc:
     start, line, col = loc
@@ -20,76 +36,235 @@ def get_loc(loc: Loc, stream: str, pos: int) -> Loc:
     return Loc(pos, line, col)
 
 
-def _literal_fast(s: str) -> ParseFastFn[str, str]:
+class LineIndex:
+    """
+    Offsets of the line starts of a string. Resolves a position to a
+    location in logarithmic time, wherever the previous location is.
+    """
+
+    __slots__ = "_starts",
+
+    def __init__(self, stream: str):
+        self._starts = array(
+            "q", chain(
+                (0,), (m.end() for m in _NEWLINE.finditer(stream)),
+                (len(stream) + 1,)
+            )
+        )
+
+    def get_loc(self, loc: Loc, stream: str, pos: int) -> Loc:
+        starts = self._starts
+        line = loc.line
+        start = starts[line]
+        if start <= pos < starts[line + 1]:
+            return Loc(pos, line, pos - start)
+        line = bisect_right(starts, pos) - 1
+        return Loc(pos, line, pos - starts[line])
+
+
+TriviaFn = Callable[[str, int], Match[str]]
+
+
+def _trivia(trivia: Optional[str]) -> Optional[Pattern[str]]:
+    if trivia is None:
+        return None
+    p = re.compile(trivia)
+    if p.match("") is None:
+        raise ValueError("Expected trivia pattern that matches empty string")
+    return p
+
+
+def _literal_fast(
+        s: str, trivia: Optional[Pattern[str]]) -> ParseFastFn[str, str]:
     ls = len(s)
     expected = [repr(s)]
 
-    def literal(
+    if trivia is None:
+        def literal(
+                stream: str, pos: int,
+                ctx: Ctx[str]) -> SimpleResult[str, str]:
+            if stream.startswith(s, pos):
+                return Ok(
+                    s, pos + ls, ctx.update_loc(stream, pos + ls), (), True
+                )
+            return Error(ctx.get_loc(stream, pos), expected)
+
+        return literal
+
+    skip = cast(TriviaFn, trivia.match)
+
+    def literal_trivia(
             stream: str, pos: int, ctx: Ctx[str]) -> SimpleResult[str, str]:
         if stream.startswith(s, pos):
-            return Ok(s, pos + ls, ctx.update_loc(stream, pos + ls), (), True)
+            end = skip(stream, pos + ls).end()
+            return Ok(s, end, ctx.update_loc(stream, end), (), True)
         return Error(ctx.get_loc(stream, pos), expected)
 
-    return literal
+    return literal_trivia
 
 
-def _literal(s: str) -> ParseFn[str, str]:
+def _literal(s: str, trivia: Optional[Pattern[str]]) -> ParseFn[str, str]:
     ls = len(s)
     ss = repr(s)
     expected = [ss]
+    skip = None if trivia is None else cast(TriviaFn, trivia.match)
+
+    def end_of(stream: str, pos: int) -> int:
+        return pos + ls if skip is None else skip(stream, pos + ls).end()
 
     def literal(
             stream: str, pos: int, ctx: Ctx[str], ins: int,
             rem: Optional[int]) -> Result[str, str]:
         if stream.startswith(s, pos):
-            return Ok(s, pos + ls, ctx.update_loc(stream, pos + ls), (), True)
+            end = end_of(stream, pos)
+            return Ok(s, end, ctx.update_loc(stream, end), (), True)
         if rem is None:
             return Error(ctx.get_loc(stream, pos), expected)
         loc = ctx.get_loc(stream, pos)
         reps: List[Repair[str, str]] = []
         if rem:
             reps.append(make_insert(rem, s, pos, ctx, loc, ss, expected))
-        cur = pos + 1
-        while cur < len(stream):
-            if stream.startswith(s, cur):
-                reps.append(
-                    make_skip(
-                        ins, s, cur + ls, ctx.update_loc(stream, cur + ls),
-                        loc, cur - pos, expected
-                    )
+        # The occurrence starts before the end of the skip window
+        cur = stream.find(s, pos + 1, ctx.skip_end(pos) - 1 + ls)
+        if cur >= 0:
+            end = end_of(stream, cur)
+            reps.append(
+                make_skip(
+                    ins, s, end, ctx.update_loc(stream, end), loc, cur - pos,
+                    expected
                 )
-                return Recovered(reps, cur - pos, loc, expected)
-            cur += 1
+            )
+            return Recovered(reps, cur - pos, loc, expected)
         return Recovered(reps, None, loc, expected)
 
     return literal
 
 
-def literal(s: str) -> ParseFns[str, str]:
+def literal(s: str, trivia: Optional[str] = None) -> ParseFns[str, str]:
     if len(s) == 0:
         raise ValueError("Expected non-empty value")
 
-    return ParseFns(_literal_fast(s), _literal(s))
+    t = _trivia(trivia)
+    return ParseFns(
+        _literal_fast(s, t), _literal(s, t),
+        FirstSet({None: frozenset(s[0])}, [repr(s)]), ("literal", s, t)
+    )
+
+
+def _one_of_fast(
+        table: Mapping[str, A], lengths: Mapping[str, Tuple[int, ...]],
+        expected: List[str]) -> ParseFastFn[str, A]:
+    missing: Any = object()
+
+    def one_of(stream: str, pos: int, ctx: Ctx[str]) -> SimpleResult[A, str]:
+        ls = lengths.get(stream[pos:pos + 1])
+        if ls is not None:
+            for length in ls:
+                end = pos + length
+                if end > len(stream):
+                    # The slice would be shorter, and match a shorter key
+                    continue
+                v = table.get(stream[pos:end], missing)
+                if v is not missing:
+                    return Ok(v, end, ctx.update_loc(stream, end), (), True)
+        return Error(ctx.get_loc(stream, pos), expected)
+
+    return one_of
+
+
+def _one_of(
+        parse_fn: ParseFastFn[str, A],
+        chain_fn: ParseFn[str, A]) -> ParseFn[str, A]:
+    def one_of(
+            stream: str, pos: int, ctx: Ctx[str], ins: int,
+            rem: Optional[int]) -> Result[A, str]:
+        r = parse_fn(stream, pos, ctx)
+        if type(r) is Ok or rem is None:
+            return r
+        return chain_fn(stream, pos, ctx, ins, rem)
+
+    return one_of
+
+
+def _const(x: A) -> Any:
+    return lambda _: x
+
+
+def one_of(table: Mapping[str, A]) -> ParseFns[str, A]:
+    if not table:
+        raise ValueError("Expected at least one value")
+    if not all(table):
+        raise ValueError("Expected non-empty value")
+
+    by_char: Dict[str, List[int]] = {}
+    for s in table:
+        by_char.setdefault(s[0], []).append(len(s))
+    lengths = {
+        c: tuple(sorted(set(ls), reverse=True)) for c, ls in by_char.items()
+    }
+    # Longer values first, as the match table tries them
+    items = sorted(table.items(), key=lambda kv: len(kv[0]), reverse=True)
+    expected = [repr(s) for s, _ in items]
+
+    # Error recovery follows the chain of alternatives that one_of replaces
+    chain: Optional[ParseFns[str, A]] = None
+    for s, v in items:
+        item = fmap(literal(s), _const(v))
+        chain = item if chain is None else alt(chain, item)
+    assert chain is not None
+
+    parse_fn = _one_of_fast(dict(table), lengths, expected)
+    return ParseFns(
+        parse_fn, _one_of(parse_fn, chain.fn),
+        FirstSet({None: frozenset(lengths)}, expected)
+    )
 
 
 def _regexp_fast(
-        pat: Pattern[str], group: Union[int, str]) -> ParseFastFn[str, str]:
+        pat: Pattern[str], group: Union[int, str],
+        trivia: Optional[Pattern[str]]) -> ParseFastFn[str, str]:
     match = pat.match
 
-    def regexp(stream: str, pos: int, ctx: Ctx[str]) -> SimpleResult[str, str]:
+    if trivia is None:
+        def regexp(
+                stream: str, pos: int,
+                ctx: Ctx[str]) -> SimpleResult[str, str]:
+            r = match(stream, pos=pos)
+            if r is not None:
+                v: Optional[str] = r.group(group)
+                if v is not None:
+                    end = r.end()
+                    return Ok(
+                        v, end, ctx.update_loc(stream, end), (), end != pos
+                    )
+            return Error(ctx.get_loc(stream, pos))
+
+        return regexp
+
+    skip = cast(TriviaFn, trivia.match)
+
+    def regexp_trivia(
+            stream: str, pos: int, ctx: Ctx[str]) -> SimpleResult[str, str]:
         r = match(stream, pos=pos)
         if r is not None:
             v: Optional[str] = r.group(group)
             if v is not None:
-                end = r.end()
+                end = skip(stream, r.end()).end()
                 return Ok(v, end, ctx.update_loc(stream, end), (), end != pos)
         return Error(ctx.get_loc(stream, pos))
 
-    return regexp
+    return regexp_trivia
 
 
-def _regexp(pat: Pattern[str], group: Union[int, str]) -> ParseFn[str, str]:
+def _regexp(
+        pat: Pattern[str], group: Union[int, str],
+        trivia: Optional[Pattern[str]]) -> ParseFn[str, str]:
     match = pat.match
+    search = pat.search
+    skip = None if trivia is None else cast(TriviaFn, trivia.match)
+
+    def end_of(stream: str, end: int) -> int:
+        return end if skip is None else skip(stream, end).end()
 
     def regexp(
             stream: str, pos: int, ctx: Ctx[str], ins: int,
@@ -98,32 +273,149 @@ def _regexp(pat: Pattern[str], group: Union[int, str]) -> ParseFn[str, str]:
         if r is not None:
             v: Optional[str] = r.group(group)
             if v is not None:
-                end = r.end()
+                end = end_of(stream, r.end())
                 return Ok(v, end, ctx.update_loc(stream, end), (), end != pos)
         if rem is None:
             return Error(ctx.get_loc(stream, pos))
         loc = ctx.get_loc(stream, pos)
-        cur = pos + 1
-        while cur < len(stream):
-            r = match(stream, pos=cur)
-            if r is not None:
-                v = r.group(group)
-                if v is not None:
-                    end = r.end()
-                    return Recovered(
-                        [
-                            make_skip(
-                                ins, v, end, ctx.update_loc(stream, end), loc,
-                                cur - pos
-                            )
-                        ], cur - pos, loc
-                    )
-            cur += 1
+        # The leftmost match is the first one that the parser would find
+        # skipping one character at a time
+        stop = min(len(stream), ctx.skip_end(pos))
+        r = search(stream, pos + 1)
+        while r is not None and r.start() < stop:
+            cur = r.start()
+            v = r.group(group)
+            if v is not None:
+                end = end_of(stream, r.end())
+                return Recovered(
+                    [
+                        make_skip(
+                            ins, v, end, ctx.update_loc(stream, end), loc,
+                            cur - pos
+                        )
+                    ], cur - pos, loc
+                )
+            r = search(stream, cur + 1)
         return Error(loc)
 
     return regexp
 
 
-def regexp(pat: str, group: Union[int, str]) -> ParseFns[str, str]:
+def _set_first_chars(items: Any) -> Optional[FrozenSet[str]]:
+    chars: List[str] = []
+    for op, av in items:
+        name = str(op)
+        if name == "LITERAL":
+            chars.append(chr(av))
+        elif name == "RANGE" and av[1] - av[0] < _MAX_FIRST_CHARS:
+            chars.extend(chr(c) for c in range(av[0], av[1] + 1))
+        else:
+            return None
+    return frozenset(chars)
+
+
+def _branch_first_chars(branches: Any) -> Optional[FrozenSet[str]]:
+    result: FrozenSet[str] = frozenset()
+    for branch in branches:
+        first = _first_chars(branch)
+        if first is None:
+            return None
+        result |= first
+    return result
+
+
+def _item_first_chars(op: Any, av: Any) -> Optional[FrozenSet[str]]:
+    name = str(op)
+    if name == "LITERAL":
+        return frozenset(chr(av))
+    if name == "IN":
+        return _set_first_chars(av)
+    if name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT"):
+        return _first_chars(av[2]) if av[0] >= 1 else None
+    if name == "SUBPATTERN":
+        return None if av[1] & (re.I | re.L) else _first_chars(av[3])
+    if name == "ATOMIC_GROUP":
+        return _first_chars(av)
+    if name == "BRANCH":
+        return _branch_first_chars(av[1])
+    return None
+
+
+def _first_chars(items: Any) -> Optional[FrozenSet[str]]:
+    # Conservatively finds the characters that any match of the pattern must
+    # start with. Returns None if the pattern can match an empty string or
+    # the analysis is not supported for its first item.
+    if not len(items):
+        return None
+    first = _item_first_chars(*items[0])
+    if first is None or len(first) > _MAX_FIRST_CHARS:
+        return None
+    return first
+
+
+def _regexp_first(pat: str) -> Optional[FirstSet]:
+    try:
+        parsed = _sre_parse.parse(pat)
+    except Exception:  # pragma: no cover
+        return None
+    if parsed.state.flags & (re.I | re.L):
+        return None
+    chars = _first_chars(parsed)
+    if chars is None:
+        return None
+    return FirstSet({None: chars})
+
+
+def _nested(av: Any) -> Iterator[Any]:
+    if isinstance(av, _sre_parse.SubPattern):
+        yield av
+    elif isinstance(av, (list, tuple)):
+        for item in av:
+            yield from _nested(item)
+
+
+def _has_group_refs(items: Any) -> bool:
+    for op, av in items:
+        if str(op).startswith("GROUPREF"):
+            return True
+        if any(_has_group_refs(sub) for sub in _nested(av)):
+            return True
+    return False
+
+
+def _always_matched(items: Any, group: int) -> bool:
+    for op, av in items:
+        if str(op) == "SUBPATTERN" and (
+                av[0] == group or _always_matched(av[3], group)):
+            return True
+    return False
+
+
+def embed_width(pat: Pattern[str], group: Union[int, str]) -> Optional[int]:
+    # Returns the minimum width of the matches if the pattern can be embedded
+    # into a larger one that extracts the group by its index: the pattern has
+    # no global flags, named groups or backreferences, and the group takes
+    # part in every match
+    if pat.flags != re.U or pat.groupindex or not isinstance(group, int):
+        return None
+    try:
+        parsed = _sre_parse.parse(pat.pattern)
+    except Exception:  # pragma: no cover
+        return None
+    if _has_group_refs(parsed):
+        return None
+    if group and not _always_matched(parsed, group):
+        return None
+    width: int = parsed.getwidth()[0]
+    return width
+
+
+def regexp(
+        pat: str, group: Union[int, str],
+        trivia: Optional[str] = None) -> ParseFns[str, str]:
     p = re.compile(pat)
-    return ParseFns(_regexp_fast(p, group), _regexp(p, group))
+    t = _trivia(trivia)
+    return ParseFns(
+        _regexp_fast(p, group, t), _regexp(p, group, t), _regexp_first(pat),
+        ("regexp", p, group, t)
+    )
@@ -1,12 +1,107 @@
-from typing import Callable, Iterable, List, Optional, Sequence, Sized, TypeVar
+from bisect import bisect_left
+from operator import attrgetter
+from typing import (
+    TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Sequence,
+    Sized, TypeVar
+)
 
-from .parser import ParseFastFn, ParseFn, ParseFns
+from .parser import FirstSet, ParseFastFn, ParseFn, ParseFns
 from .repair import Repair, make_insert, make_pending_skip, make_skip
 from .result import Error, Ok, Recovered, Result, SimpleResult
 from .types import Ctx
 
 A = TypeVar("A")
 
+FindFn = Callable[[Any, int, int, Ctx[Any]], int]
+
+if TYPE_CHECKING:
+    from array import array
+
+_kind = attrgetter("kind")
+# The registry is global and only grows, by one entry per distinct name of
+# a kind, so the ids of a kind are the same in every stream and parser
+_kind_ids: Dict[str, int] = {}
+_kind_names: List[str] = []
+
+
+class KindArray:
+    """
+    Base class of the token sequences that store the interned ids of the
+    kinds of their tokens in ``kinds``, and the offsets of their values in
+    ``src``. The token and punct parsers match them without creating the
+    tokens.
+    """
+
+    __slots__ = ()
+
+    src: str
+    kinds: "array[int]"
+    value_starts: "array[int]"
+    value_ends: "array[int]"
+
+    def find_kind(self, kind: str, start: int = 0) -> int:
+        raise NotImplementedError
+
+
+class KindIndex:
+    """
+    Positions of the tokens of each kind in a token stream, which error
+    recovery uses to find where to resume. Built during a parse, as far as
+    the searches have read the stream.
+    """
+
+    __slots__ = "_stream", "_positions", "_start", "_end"
+
+    def __init__(self, stream: Any):
+        self._stream = stream
+        self._positions: Dict[str, List[int]] = {}
+        # The tokens from _start to _end are in the index
+        self._start = 0
+        self._end = 0
+
+    def find(self, kind: str, start: int, stop: int) -> int:
+        # Returns the position of the first token of kind from start to stop,
+        # or -1 if there is none
+        stream = self._stream
+        if isinstance(stream, KindArray):
+            cur = stream.find_kind(kind, start)
+            return cur if cur < stop else -1
+        if not self._start <= start <= self._end:
+            # Only a continuous range is kept, as a lazily read stream may
+            # have dropped the tokens between
+            self._positions = {}
+            self._start = self._end = start
+        positions = self._positions
+        ps = positions.get(kind)
+        if ps is not None:
+            i = bisect_left(ps, start)
+            if i < len(ps):
+                return ps[i] if ps[i] < stop else -1
+        cur = self._end
+        while cur < stop and cur < len(stream):
+            k = stream[cur].kind
+            ps = positions.get(k)
+            if ps is None:
+                ps = positions[k] = []
+            ps.append(cur)
+            cur += 1
+            self._end = cur
+            if k == kind:
+                return cur - 1
+        return -1
+
+
+def kind_id(kind: str) -> int:
+    kid = _kind_ids.get(kind)
+    if kid is None:
+        kid = _kind_ids[kind] = len(_kind_names)
+        _kind_names.append(kind)
+    return kid
+
+
+def kind_name(kid: int) -> str:
+    return _kind_names[kid]
+
 
 def _eof_fast() -> ParseFastFn[Sized, None]:
     def eof(
@@ -29,6 +124,16 @@ def _eof() -> ParseFn[Sized, None]:
             return Error(ctx.get_loc(stream, pos), ["end of file"])
         loc = ctx.get_loc(stream, pos)
         sl = len(stream)
+        if isinstance(stream, Sequence):
+            while True:
+                # The length of a lazily read stream grows when its last item
+                # is read
+                stream[sl - 1]
+                if sl == len(stream):
+                    break
+                sl = len(stream)
+        if sl >= ctx.skip_end(pos):
+            return Error(loc, ["end of file"])
         return Recovered(
             [
                 make_pending_skip(
@@ -41,7 +146,7 @@ def _eof() -> ParseFn[Sized, None]:
 
 
 def eof() -> ParseFns[Sized, None]:
-    return ParseFns(_eof_fast(), _eof())
+    return ParseFns(_eof_fast(), _eof(), node=("eof",))
 
 
 def _satisfy_fast(test: Callable[[A], bool]) -> ParseFastFn[Sequence[A], A]:
@@ -69,7 +174,8 @@ def _satisfy(test: Callable[[A], bool]) -> ParseFn[Sequence[A], A]:
             return Error(ctx.get_loc(stream, pos))
         loc = ctx.get_loc(stream, pos)
         cur = pos + 1
-        while cur < len(stream):
+        stop = ctx.skip_end(pos)
+        while cur < stop and cur < len(stream):
             t = stream[cur]
             if test(t):
                 return Recovered(
@@ -86,8 +192,12 @@ def _satisfy(test: Callable[[A], bool]) -> ParseFn[Sequence[A], A]:
     return satisfy
 
 
-def satisfy(test: Callable[[A], bool]) -> ParseFns[Sequence[A], A]:
-    return ParseFns(_satisfy_fast(test), _satisfy(test))
+def satisfy(
+        test: Callable[[A], bool],
+        first: Optional[FirstSet] = None) -> ParseFns[Sequence[A], A]:
+    return ParseFns(
+        _satisfy_fast(test), _satisfy(test), first, ("satisfy", test)
+    )
 
 
 def _sym_fast(s: A, expected: Iterable[str]) -> ParseFastFn[Sequence[A], A]:
@@ -103,6 +213,24 @@ def _sym_fast(s: A, expected: Iterable[str]) -> ParseFastFn[Sequence[A], A]:
     return sym
 
 
+def _find_sym(stream: Sequence[A], s: A, start: int, stop: int) -> int:
+    # Searches the built-in sequences without a loop in Python
+    if type(stream) is str:
+        if isinstance(s, str) and len(s) == 1:
+            return stream.find(s, start, stop)
+    elif type(stream) is list or type(stream) is tuple:
+        try:
+            return stream.index(s, start, stop)
+        except ValueError:
+            return -1
+    cur = start
+    while cur < stop and cur < len(stream):
+        if stream[cur] == s:
+            return cur
+        cur += 1
+    return -1
+
+
 def _sym(s: A, label: str, expected: Iterable[str]) -> ParseFn[Sequence[A], A]:
     def sym(
             stream: Sequence[A], pos: int, ctx: Ctx[Sequence[A]], ins: int,
@@ -117,18 +245,15 @@ def _sym(s: A, label: str, expected: Iterable[str]) -> ParseFn[Sequence[A], A]:
         reps: List[Repair[A, Sequence[A]]] = []
         if rem:
             reps.append(make_insert(rem, s, pos, ctx, loc, label, expected))
-        cur = pos + 1
-        while cur < len(stream):
-            t = stream[cur]
-            if t == s:
-                reps.append(
-                    make_skip(
-                        ins, t, cur + 1, ctx.update_loc(stream, cur + 1), loc,
-                        cur - pos, expected
-                    )
+        cur = _find_sym(stream, s, pos + 1, ctx.skip_end(pos))
+        if cur >= 0:
+            reps.append(
+                make_skip(
+                    ins, stream[cur], cur + 1, ctx.update_loc(stream, cur + 1),
+                    loc, cur - pos, expected
                 )
-                return Recovered(reps, cur - pos, loc, expected)
-            cur += 1
+            )
+            return Recovered(reps, cur - pos, loc, expected)
         return Recovered(reps, None, loc, expected)
 
     return sym
@@ -140,5 +265,197 @@ def sym(s: A, label: Optional[str]) -> ParseFns[Sequence[A], A]:
     else:
         label_ = label
     expected = [label_]
+    try:
+        first: Optional[FirstSet] = FirstSet({None: frozenset([s])}, expected)
+    except TypeError:
+        first = None
+
+    return ParseFns(
+        _sym_fast(s, expected), _sym(s, label_, expected), first,
+        ("sym", s, expected)
+    )
+
+
+def _token_test(kind: str) -> Callable[[Any, int], bool]:
+    kid = kind_id(kind)
+
+    def test(stream: Any, pos: int) -> bool:
+        if isinstance(stream, KindArray):
+            return stream.kinds[pos] == kid
+        return bool(stream[pos].kind == kind)
+
+    return test
+
+
+def _token_fast(
+        kind: str,
+        expected: Iterable[str]) -> ParseFastFn[Sequence[Any], Any]:
+    kid = kind_id(kind)
+
+    def token(
+            stream: Sequence[Any], pos: int,
+            ctx: Ctx[Sequence[Any]]) -> SimpleResult[Any, Sequence[Any]]:
+        if pos < len(stream):
+            if isinstance(stream, KindArray):
+                if stream.kinds[pos] == kid:
+                    return Ok(stream[pos], pos + 1, ctx, (), True)
+            else:
+                t = stream[pos]
+                if t.kind == kind:
+                    return Ok(t, pos + 1, ctx, (), True)
+        return Error(ctx.get_loc(stream, pos), expected)
+
+    return token
+
+
+def _scan(
+        test: Callable[[Any, int], bool], stream: Any, start: int,
+        stop: int) -> int:
+    cur = start
+    while cur < stop and cur < len(stream):
+        if test(stream, cur):
+            return cur
+        cur += 1
+    return -1
+
+
+def _find_token(
+        kind: str, test: Callable[[Any, int], bool]) -> FindFn:
+    def find(stream: Any, start: int, stop: int, ctx: Ctx[Any]) -> int:
+        index = ctx.kind_index
+        if index is None:
+            return _scan(test, stream, start, stop)
+        cur = index.find(kind, start, stop)
+        while cur >= 0 and not test(stream, cur):
+            cur = index.find(kind, cur + 1, stop)
+        return cur
+
+    return find
 
-    return ParseFns(_sym_fast(s, expected), _sym(s, label_, expected))
+
+def _token(
+        test: Callable[[Any, int], bool], find: FindFn,
+        expected: Iterable[str]) -> ParseFn[Sequence[Any], Any]:
+    def token(
+            stream: Sequence[Any], pos: int, ctx: Ctx[Sequence[Any]],
+            ins: int, rem: Optional[int]) -> Result[Any, Sequence[Any]]:
+        if pos < len(stream) and test(stream, pos):
+            return Ok(stream[pos], pos + 1, ctx, (), True)
+        if rem is None:
+            return Error(ctx.get_loc(stream, pos), expected)
+        loc = ctx.get_loc(stream, pos)
+        cur = find(stream, pos + 1, ctx.skip_end(pos), ctx)
+        if cur >= 0:
+            return Recovered(
+                [
+                    make_skip(
+                        ins, stream[cur], cur + 1,
+                        ctx.update_loc(stream, cur + 1), loc, cur - pos,
+                        expected
+                    ),
+                ], cur - pos, loc, expected
+            )
+        return Error(loc, expected)
+
+    return token
+
+
+def token(kind: str) -> ParseFns[Sequence[Any], Any]:
+    expected = [kind]
+    test = _token_test(kind)
+    return ParseFns(
+        _token_fast(kind, expected),
+        _token(test, _find_token(kind, test), expected),
+        FirstSet({_kind: frozenset([kind])}, expected),
+        ("token", kind, kind_id(kind), expected)
+    )
+
+
+def _punct_test(s: Any) -> Callable[[Any, int], bool]:
+    kind = s.kind
+    kid = kind_id(kind)
+    value = s.value
+    size = len(value)
+
+    def test(stream: Any, pos: int) -> bool:
+        if isinstance(stream, KindArray):
+            start = stream.value_starts[pos]
+            return (
+                stream.kinds[pos] == kid and
+                stream.value_ends[pos] - start == size and
+                stream.src.startswith(value, start)
+            )
+        t = stream[pos]
+        return bool(t.kind == kind and t.value == value)
+
+    return test
+
+
+def _punct_fast(s: A, expected: Iterable[str]) -> ParseFastFn[Sequence[A], A]:
+    kind: str = getattr(s, "kind")
+    kid = kind_id(kind)
+    value: str = getattr(s, "value")
+    size = len(value)
+
+    def punct(
+            stream: Sequence[A], pos: int,
+            ctx: Ctx[Sequence[A]]) -> SimpleResult[A, Sequence[A]]:
+        if pos < len(stream):
+            if isinstance(stream, KindArray):
+                if stream.kinds[pos] == kid:
+                    start = stream.value_starts[pos]
+                    if (
+                            stream.value_ends[pos] - start == size and
+                            stream.src.startswith(value, start)):
+                        return Ok(stream[pos], pos + 1, ctx, (), True)
+            else:
+                t: Any = stream[pos]
+                if t.kind == kind and t.value == value:
+                    return Ok(t, pos + 1, ctx, (), True)
+        return Error(ctx.get_loc(stream, pos), expected)
+
+    return punct
+
+
+def _punct(
+        s: A, test: Callable[[Any, int], bool], find: FindFn, label: str,
+        expected: Iterable[str]) -> ParseFn[Sequence[A], A]:
+    def punct(
+            stream: Sequence[A], pos: int, ctx: Ctx[Sequence[A]], ins: int,
+            rem: Optional[int]) -> Result[A, Sequence[A]]:
+        if pos < len(stream) and test(stream, pos):
+            return Ok(stream[pos], pos + 1, ctx, (), True)
+        if rem is None:
+            return Error(ctx.get_loc(stream, pos), expected)
+        loc = ctx.get_loc(stream, pos)
+        reps: List[Repair[A, Sequence[A]]] = []
+        if rem:
+            reps.append(make_insert(rem, s, pos, ctx, loc, label, expected))
+        cur = find(stream, pos + 1, ctx.skip_end(pos), ctx)
+        if cur >= 0:
+            reps.append(
+                make_skip(
+                    ins, stream[cur], cur + 1, ctx.update_loc(stream, cur + 1),
+                    loc, cur - pos, expected
+                )
+            )
+            return Recovered(reps, cur - pos, loc, expected)
+        return Recovered(reps, None, loc, expected)
+
+    return punct
+
+
+def punct(s: A, label: Optional[str]) -> ParseFns[Sequence[A], A]:
+    # The same as sym for the tokens that have the kind and the value of s,
+    # without calling their __eq__
+    if label is None:
+        label_ = repr(s)
+    else:
+        label_ = label
+    expected = [label_]
+    test = _punct_test(s)
+    find = _find_token(getattr(s, "kind"), test)
+    return ParseFns(
+        _punct_fast(s, expected), _punct(s, test, find, label_, expected),
+        FirstSet({None: frozenset([s])}, expected), ("punct", s, expected)
+    )
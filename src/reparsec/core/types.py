@@ -1,4 +1,11 @@
-from typing import Callable, Generic, NamedTuple, TypeVar
+import sys
+from typing import (
+    TYPE_CHECKING, Callable, Generic, NamedTuple, Optional, TypeVar
+)
+
+if TYPE_CHECKING:
+    from .memo import Memo
+    from .sequence import KindIndex
 
 S = TypeVar("S")
 S_contra = TypeVar("S_contra", contravariant=True)
@@ -13,24 +20,59 @@ class Loc(NamedTuple):
 
 
 class Ctx(Generic[S_contra]):
-    __slots__ = "mark", "loc", "_get_loc"
+    __slots__ = (
+        "mark", "loc", "_get_loc", "memo", "track", "max_repairs",
+        "max_skip", "kind_index"
+    )
 
     def __init__(
             self, mark: int, loc: Loc,
-            get_loc: Callable[[Loc, S_contra, int], Loc]):
+            get_loc: Callable[[Loc, S_contra, int], Loc],
+            memo: "Optional[Memo]" = None, track: bool = True,
+            max_repairs: Optional[int] = None,
+            max_skip: Optional[int] = None,
+            kind_index: "Optional[KindIndex]" = None):
         self.mark = mark
         self.loc = loc
         self._get_loc = get_loc
+        self.memo = memo
+        self.track = track
+        self.max_repairs = max_repairs
+        self.max_skip = max_skip
+        self.kind_index = kind_index
 
     def get_loc(self, stream: S_contra, pos: int) -> Loc:
+        if not self.track:
+            # Without tracking, the location may be far behind, so only the
+            # position is kept and the location is resolved when the error
+            # is reported
+            return Loc(pos, 0, 0)
         return self._get_loc(self.loc, stream, pos)
 
     def update_loc(self, stream: S_contra, pos: int) -> "Ctx[S_contra]":
+        if not self.track:
+            return self
+        return self.locate(stream, pos)
+
+    def locate(self, stream: S_contra, pos: int) -> "Ctx[S_contra]":
+        # Unlike update_loc, sets the location even if the tracking is off,
+        # for the parsers that read it
         if pos == self.loc.pos:
             return self
         return Ctx(
-            self.mark, self._get_loc(self.loc, stream, pos), self._get_loc
+            self.mark, self._get_loc(self.loc, stream, pos), self._get_loc,
+            self.memo, self.track, self.max_repairs, self.max_skip,
+            self.kind_index
         )
 
     def set_mark(self, mark: int) -> "Ctx[S_contra]":
-        return Ctx(mark, self.loc, self._get_loc)
+        return Ctx(
+            mark, self.loc, self._get_loc, self.memo, self.track,
+            self.max_repairs, self.max_skip, self.kind_index
+        )
+
+    def skip_end(self, pos: int) -> int:
+        # The end of the positions that a skip repair from pos can resume at
+        if self.max_skip is None:
+            return sys.maxsize
+        return pos + self.max_skip + 1
@@ -2,15 +2,24 @@
 Simple lexer based on regular expressions.
 """
 
+from array import array
+from bisect import bisect_left
 from dataclasses import dataclass, field
-from typing import Iterator, List, Pattern, Sequence, TypeVar
+from typing import (
+    Dict, Iterator, List, Optional, Pattern, Sequence, TextIO, Tuple, TypeVar,
+    Union, overload
+)
 
+from .core import sequence
+from .core.scannerless import LineIndex
 from .core.types import Loc
-from .parser import Parser, TupleParser, label
-from .sequence import satisfy
+from .parser import FnParser, Parser, TupleParser
 from .types import ParseResult
 
-__all__ = ("Token", "LexError", "split_tokens", "token", "token_ins", "parse")
+__all__ = (
+    "Token", "TokenArray", "LazyTokens", "LexError", "split_tokens", "token",
+    "punct", "token_ins", "parse", "parse_iter"
+)
 
 A = TypeVar("A")
 
@@ -101,6 +110,290 @@ def split_tokens(src: str, spec: Pattern[str]) -> List[Token]:
     return list(iter_tokens(src, spec))
 
 
+class TokenArray(sequence.KindArray, Sequence[Token]):
+    """
+    Sequence of tokens that keeps only the kinds and the offsets of the
+    tokens, and creates :class:`Token` objects on access. Uses an order of
+    magnitude less memory than the list returned by :func:`split_tokens`.
+
+    The specification is the same as for :func:`split_tokens`.
+
+    >>> from reparsec.lexer import TokenArray
+    >>> import re
+
+    >>> spec = re.compile(r"(?P<num>[0-9]+)|(?P<op>[+])|\\s+")
+
+    >>> tokens = TokenArray("1 + 2", spec)
+    >>> len(tokens)
+    3
+    >>> tokens[2]
+    Token(kind='num', value='2')
+    >>> tokens[2].start
+    Loc(pos=4, line=0, col=4)
+
+    The kinds of the tokens are stored as integers, which lets
+    :func:`token` and :func:`punct` match the tokens without creating them.
+    The names of the kinds are interned once per process, in a registry
+    that is shared by all specifications.
+
+    :param src: Input
+    :param spec: Compiled regular expression
+    """
+
+    __slots__ = (
+        "src", "kinds", "_starts", "_ends", "value_starts", "value_ends",
+        "_index", "_loc", "_last", "_positions"
+    )
+
+    def __init__(self, src: str, spec: Pattern[str]):
+        self.src = src
+        ids: List[int] = [0] * (spec.groups + 1)
+        for name, group in spec.groupindex.items():
+            ids[group] = sequence.kind_id(name)
+        self.kinds = kinds = array("I")
+        self._starts = starts = array("q")
+        self._ends = ends = array("q")
+        self.value_starts = value_starts = array("q")
+        self.value_ends = value_ends = array("q")
+        self._index = LineIndex(src)
+        self._loc = Loc(0, 0, 0)
+        self._last: Optional[Tuple[int, Token]] = None
+        self._positions: Optional[Dict[int, "array[int]"]] = None
+        pos = 0
+        src_len = len(src)
+        while pos < src_len:
+            match = spec.match(src, pos=pos)
+            if match is None:
+                raise LexError(self._index.get_loc(self._loc, src, pos))
+            end = match.end()
+            if match.lastgroup is not None:
+                group = match.lastindex or 0
+                kinds.append(ids[group])
+                starts.append(pos)
+                ends.append(end)
+                value_starts.append(match.start(group))
+                value_ends.append(match.end(group))
+            pos = end
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    @overload
+    def __getitem__(self, index: int) -> Token:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[Token]:
+        ...
+
+    def __getitem__(
+            self, index: Union[int, slice]) -> Union[Token, Sequence[Token]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        last = self._last
+        if last is not None and last[0] == index:
+            return last[1]
+        # The end of a token is usually on the line of its start
+        get_loc = self._index.get_loc
+        src = self.src
+        start = get_loc(self._loc, src, self._starts[index])
+        token = Token(
+            sequence.kind_name(self.kinds[index]),
+            src[self.value_starts[index]:self.value_ends[index]],
+            start, get_loc(start, src, self._ends[index])
+        )
+        self._loc = start
+        self._last = (index, token)
+        return token
+
+    def kind(self, index: int) -> str:
+        """
+        Returns the kind of a token without creating the token.
+
+        :param index: Index of the token
+        """
+
+        return sequence.kind_name(self.kinds[index])
+
+    def find_kind(self, kind: str, start: int = 0) -> int:
+        """
+        Returns the index of the first token of ``kind`` at or after
+        ``start``, or -1 if there is none. The first call builds an index of
+        the positions of the tokens of every kind, the following ones take
+        logarithmic time. Error recovery uses it to find where to resume.
+
+        :param kind: Kind of the token
+        :param start: Index to start from
+        """
+
+        positions = self._positions
+        if positions is None:
+            positions = {}
+            for i, kid in enumerate(self.kinds):
+                ps = positions.get(kid)
+                if ps is None:
+                    ps = positions[kid] = array("q")
+                ps.append(i)
+            self._positions = positions
+        ps = positions.get(sequence.kind_id(kind))
+        if ps is None:
+            return -1
+        i = bisect_left(ps, start)
+        return ps[i] if i < len(ps) else -1
+
+    def start(self, index: int) -> Loc:
+        """
+        Returns the start location of a token without creating the token.
+
+        :param index: Index of the token
+        """
+
+        return self._index.get_loc(self._loc, self.src, self._starts[index])
+
+    def end(self, index: int) -> Loc:
+        """
+        Returns the end location of a token without creating the token.
+
+        :param index: Index of the token
+        """
+
+        return self._index.get_loc(self._loc, self.src, self._ends[index])
+
+
+def iter_file_tokens(
+        file: TextIO, spec: Pattern[str],
+        chunk_size: int = 65536) -> Iterator[Token]:
+    buf = ""
+    offset = 0
+    pos = 0
+    line = 0
+    col = 0
+    loc = Loc(0, 0, 0)
+    eof = False
+    while not eof or pos < len(buf):
+        match = None
+        if eof or len(buf) - pos >= chunk_size:
+            match = spec.match(buf, pos=pos)
+        # A match that reaches the end of the buffer may be longer, and the
+        # failed one may succeed, when more of the input is read
+        if not eof and (match is None or match.end() == len(buf)):
+            chunk = file.read(chunk_size)
+            eof = not chunk
+            buf = buf[pos:] + chunk
+            offset += pos
+            pos = 0
+            continue
+        if match is None:
+            raise LexError(loc)
+
+        end = match.end()
+        nl = buf.count("\n", pos, end)
+        if nl:
+            line += nl
+            col = end - buf.rfind("\n", pos, end) - 1
+        else:
+            col += end - pos
+        end_loc = Loc(offset + end, line, col)
+
+        kind = match.lastgroup
+        if kind is not None:
+            yield Token(kind, match.group(kind), loc, end_loc)
+
+        pos = end
+        loc = end_loc
+
+
+class LazyTokens(Sequence[Token]):
+    """
+    Sequence of tokens that reads the input from a text file in chunks and
+    splits it into tokens as the parser advances. Only the last ``window``
+    tokens are kept: a parser that backtracks further gets a
+    :class:`ValueError`.
+
+    The length of the sequence is the number of tokens read so far plus one
+    if there are more tokens, so it grows as the tokens are read.
+
+    The specification is the same as for :func:`split_tokens`. Every token,
+    as well as the text that the specification needs to see after it to
+    decide on the token, should fit in ``chunk_size`` characters.
+
+    >>> from reparsec.lexer import LazyTokens
+    >>> import io, re
+
+    >>> spec = re.compile(r"(?P<num>[0-9]+)|(?P<op>[+])|\\s+")
+
+    >>> tokens = LazyTokens(io.StringIO("1 + 2"), spec)
+    >>> len(tokens)
+    1
+    >>> tokens[0]
+    Token(kind='num', value='1')
+    >>> len(tokens)
+    2
+    >>> list(tokens)  # doctest: +NORMALIZE_WHITESPACE
+    [Token(kind='num', value='1'), Token(kind='op', value='+'),
+     Token(kind='num', value='2')]
+
+    :param file: Text file to read
+    :param spec: Compiled regular expression
+    :param chunk_size: Number of characters to read at once
+    :param window: Number of tokens to keep for backtracking
+    """
+
+    __slots__ = "_tokens", "_base", "_window", "_iter", "_done"
+
+    def __init__(
+            self, file: TextIO, spec: Pattern[str], chunk_size: int = 65536,
+            window: int = 65536):
+        self._tokens: List[Token] = []
+        self._base = 0
+        self._window = window
+        self._iter = iter_file_tokens(file, spec, chunk_size)
+        self._done = False
+
+    def _read(self, index: int) -> None:
+        # Reads the tokens up to the index, unless the input ends earlier
+        tokens = self._tokens
+        while not self._done and self._base + len(tokens) <= index:
+            token = next(self._iter, None)
+            if token is None:
+                self._done = True
+            else:
+                tokens.append(token)
+        if len(tokens) > 2 * self._window:
+            drop = len(tokens) - self._window
+            del tokens[:drop]
+            self._base += drop
+
+    def __len__(self) -> int:
+        self._read(0)
+        return self._base + len(self._tokens)
+
+    @overload
+    def __getitem__(self, index: int) -> Token:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[Token]:
+        ...
+
+    def __getitem__(
+            self, index: Union[int, slice]) -> Union[Token, Sequence[Token]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        # The next token is read ahead to know if the sequence ends here
+        self._read(index + 1)
+        i = index - self._base
+        if i < 0:
+            raise ValueError(
+                "Token {} is out of the window of {} tokens".format(
+                    index, self._window
+                )
+            )
+        return self._tokens[i]
+
+
 def token(kind: str) -> TupleParser[Sequence[Token], Token]:
     """
     Parses token of the specified kind and returns the token.
@@ -122,7 +415,43 @@ def token(kind: str) -> TupleParser[Sequence[Token], Token]:
     :param kind: Kind of expected token
     """
 
-    return label(satisfy(lambda t: t.kind == kind), kind)
+    return FnParser(sequence.token(kind))
+
+
+def punct(
+        value: str, kind: str = "punct",
+        label: Optional[str] = None) -> TupleParser[Sequence[Token], Token]:
+    """
+    Parses token of the specified kind and value and returns the token. The
+    same as ``sym(Token(kind, value), label)``, but does not compare the
+    tokens as dataclasses. When error recovery is enabled, inserts
+    ``Token(kind=kind, value=value)`` on error.
+
+    >>> from reparsec.lexer import parse, punct, split_tokens
+    >>> import re
+
+    >>> spec = re.compile(r"(?P<num>[0-9]+)|(?P<op>[+])")
+    >>> parser = punct("+", "op")
+
+    >>> parse(parser, split_tokens("+", spec)).unwrap()
+    Token(kind='op', value='+')
+
+    >>> parse(parser, split_tokens("1", spec)).unwrap()
+    Traceback (most recent call last):
+      ...
+    reparsec.types.ParseError: at 1:1: expected '+'
+
+    :param value: Value of expected token
+    :param kind: Kind of expected token
+    :param label: Name for the error messages, the representation of the
+        value by default
+    """
+
+    return FnParser(
+        sequence.punct(
+            Token(kind, value), repr(value) if label is None else label
+        )
+    )
 
 
 def token_ins(
@@ -156,7 +485,10 @@ def token_ins(
 
 def parse(
         parser: Parser[Sequence[Token], A], stream: Sequence[Token],
-        recover: bool = False) -> ParseResult[A, Sequence[Token]]:
+        recover: bool = False, *,
+        max_repairs: Optional[int] = None, max_skip: Optional[int] = None,
+        memo: bool = False,
+        track_loc: bool = True) -> ParseResult[A, Sequence[Token]]:
     """
     Wrapper around :meth:`reparsec.Parser.parse` that enables line and column
     tracking.
@@ -164,17 +496,62 @@ def parse(
     :param parser: Parser to run
     :param stream: Stream of tokens to parse
     :param recover: Flag to enable error recovery
+    :param max_repairs: Maximal number of alternative repairs kept during
+        error recovery
+    :param max_skip: Maximal number of tokens skipped by a single repair
+        during error recovery
+    :param memo: Flag to enable memoization
+    :param track_loc: Flag to track the location of every position reached
+        by the parsers
     """
 
     return parser.parse(
         stream, recover,
         get_loc=lambda _, s, p: _loc_from_stream(s, p),
-        fmt_loc=lambda l: "{}:{}".format(l.line + 1, l.col + 1)
+        fmt_loc=lambda loc: "{}:{}".format(loc.line + 1, loc.col + 1),
+        max_repairs=max_repairs, max_skip=max_skip, memo=memo,
+        track_loc=track_loc
+    )
+
+
+def parse_iter(
+        parser: Parser[Sequence[Token], List[A]], stream: Sequence[Token], *,
+        memo: bool = False, track_loc: bool = True) -> Iterator[A]:
+    """
+    Wrapper around :meth:`reparsec.Parser.parse_iter` that enables line and
+    column tracking.
+
+    >>> from reparsec.lexer import LazyTokens, parse_iter, token
+    >>> import io, re
+
+    >>> spec = re.compile(r"(?P<num>[0-9]+)|\\s+")
+    >>> tokens = LazyTokens(io.StringIO("1 2 3"), spec)
+
+    >>> [t.value for t in parse_iter(token("num").many(), tokens)]
+    ['1', '2', '3']
+
+    :param parser: Parser created by ``many``, ``sep_by`` or ``sep_by1``
+    :param stream: Stream of tokens to parse
+    :param memo: Flag to enable memoization
+    :param track_loc: Flag to track the location of every position reached
+        by the parsers
+    """
+
+    return parser.parse_iter(
+        stream,
+        get_loc=lambda _, s, p: _loc_from_stream(s, p),
+        fmt_loc=lambda loc: "{}:{}".format(loc.line + 1, loc.col + 1),
+        memo=memo, track_loc=track_loc
     )
 
 
 def _loc_from_stream(stream: Sequence[Token], pos: int) -> Loc:
-    if pos < len(stream):
+    if isinstance(stream, TokenArray):
+        if pos < len(stream):
+            return stream.start(pos)
+        elif stream:
+            return stream.end(len(stream) - 1)
+    elif pos < len(stream):
         return stream[pos].start
     elif stream:
         return stream[-1].end
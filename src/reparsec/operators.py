@@ -0,0 +1,95 @@
+"""
+Operator precedence parsing.
+"""
+
+from typing import Callable, Sequence, TypeVar
+
+from .core import operators
+from .core.parser import ParseObj
+from .parser import FnParser, TupleParser
+
+__all__ = ("Operator", "prefix", "postfix", "infixl", "infixr", "expr_table")
+
+S = TypeVar("S")
+A = TypeVar("A")
+
+Operator = operators.Operator
+
+
+def prefix(op: ParseObj[S, Callable[[A], A]]) -> Operator[S, A]:
+    """
+    Prefix operator. Prefix operators of the same level may be nested.
+
+    :param op: Operator parser, returns a function of one argument
+    """
+
+    return Operator(operators.PREFIX, op.to_fns())
+
+
+def postfix(op: ParseObj[S, Callable[[A], A]]) -> Operator[S, A]:
+    """
+    Postfix operator. Postfix operators of the same level may be nested.
+
+    :param op: Operator parser, returns a function of one argument
+    """
+
+    return Operator(operators.POSTFIX, op.to_fns())
+
+
+def infixl(op: ParseObj[S, Callable[[A, A], A]]) -> Operator[S, A]:
+    """
+    Left-associative infix operator.
+
+    :param op: Operator parser, returns a function of two arguments
+    """
+
+    return Operator(operators.INFIXL, op.to_fns())
+
+
+def infixr(op: ParseObj[S, Callable[[A, A], A]]) -> Operator[S, A]:
+    """
+    Right-associative infix operator.
+
+    :param op: Operator parser, returns a function of two arguments
+    """
+
+    return Operator(operators.INFIXR, op.to_fns())
+
+
+def expr_table(
+        operand: ParseObj[S, A],
+        table: Sequence[Sequence[Operator[S, A]]]) -> TupleParser[S, A]:
+    """
+    Parses an expression of operands and operators. The table is a sequence
+    of precedence levels, from the tightest to the loosest one. Within a level,
+    prefix operators bind tighter than postfix operators, and postfix
+    operators bind tighter than infix operators. Operators of a level are
+    tried in the order they are listed.
+
+    The parser is equivalent to the nested :func:`reparsec.chainl1` and
+    :func:`reparsec.chainr1` calls, one per level, but parses each operator
+    once, without going through every level for every operand.
+
+    >>> from reparsec.sequence import sym
+
+    >>> num = sym("1") | sym("2") | sym("3")
+    >>> parser = expr_table(num, [
+    ...     [prefix(sym("-").fmap(lambda _: "(-{})".format))],
+    ...     [infixr(sym("^").fmap(lambda _: "({}^{})".format))],
+    ...     [infixl(sym("*").fmap(lambda _: "({}*{})".format))],
+    ...     [
+    ...         infixl(sym("+").fmap(lambda _: "({}+{})".format)),
+    ...         infixl(sym("-").fmap(lambda _: "({}-{})".format)),
+    ...     ],
+    ... ])
+
+    >>> parser.parse("1-2*-3^2^1+3").unwrap()
+    '((1-(2*((-3)^(2^1))))+3)'
+
+    :param operand: Operand parser
+    :param table: Levels of operators, tightest first
+    :raises ValueError: If a level mixes left- and right-associative infix
+        operators
+    """
+
+    return FnParser(operators.expr_table(operand.to_fns(), table))
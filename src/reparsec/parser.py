@@ -2,11 +2,17 @@
 Parser combinators.
 """
 
-from typing import Callable, List, Optional, Tuple, TypeVar, Union
+from typing import (
+    Callable, Generator, Generic, Iterator, List, Optional, Tuple, TypeVar,
+    Union
+)
 
 from .core import combinators
+from .core import memo as _memo
+from .core import sequence
+from .core.memo import Memo
 from .core.parser import ParseFns, ParseObj
-from .core.result import Result, SimpleResult
+from .core.result import Error, Result, SimpleResult
 from .core.types import Ctx, Loc
 from .types import ParseResult, ResultWrapper
 
@@ -26,33 +32,303 @@ def _fmt_loc(loc: Loc) -> str:
     return repr(loc.pos)
 
 
+def _locate(
+        get_loc: Callable[[Loc, S, int], Loc], stream: S,
+        track_loc: bool) -> Optional[Callable[[Loc], Loc]]:
+    if track_loc:
+        return None
+    last = Loc(0, 0, 0)
+
+    # The errors of an untracked parse keep only their positions, which are
+    # resolved when the errors are reported, each from the previous one if
+    # the positions are in order
+    def locate(loc: Loc) -> Loc:
+        nonlocal last
+        last = get_loc(
+            last if last.pos <= loc.pos else Loc(0, 0, 0), stream, loc.pos
+        )
+        return last
+
+    return locate
+
+
+def _parse_iter(
+        items: Generator[A, None, SimpleResult[None, S]],
+        fmt_loc: Callable[[Loc], str],
+        locate: Optional[Callable[[Loc], Loc]]) -> Iterator[A]:
+    r = yield from items
+    if type(r) is Error:
+        # Raises ParseError
+        ResultWrapper(r, fmt_loc, locate).unwrap()
+
+
+class Feeder(Generic[A]):
+    """
+    Incremental parser created by :meth:`Parser.feeder`.
+    """
+
+    def __init__(
+            self, parse_fns: ParseFns[str, List[A]],
+            get_loc: Callable[[Loc, str, int], Loc],
+            fmt_loc: Callable[[Loc], str], lookahead: int, memo: bool,
+            track_loc: bool):
+        self._first_fn, self._next_fn, self._empty = (
+            combinators.many_items(parse_fns)
+        )
+        self._get_loc = get_loc
+        self._fmt_loc = fmt_loc
+        self._lookahead = lookahead
+        self._memo = memo
+        self._track_loc = track_loc
+        self._buf = ""
+        self._chunks: List[str] = []
+        self._size = 0
+        self._pos = 0
+        self._ctx = self._make_ctx(Loc(0, 0, 0))
+        self._offset = 0
+        self._wait = 0
+        self._first = True
+        self._done = False
+        self._error: Optional[Error] = None
+        self._closed = False
+
+    def _make_ctx(self, loc: Loc) -> Ctx[str]:
+        return Ctx(
+            0, loc, self._get_loc, Memo() if self._memo else None,
+            self._track_loc
+        )
+
+    def feed(self, chunk: str) -> List[A]:
+        """
+        Adds a chunk of input and returns the values completed by it.
+
+        :param chunk: Next part of the input
+        """
+
+        if self._closed:
+            raise ValueError("Feeder is closed")
+        self._chunks.append(chunk)
+        self._size += len(chunk)
+        # A value that ran out of input is parsed again from its start, once
+        # the input after it has doubled, so the total work stays linear
+        if self._size < self._wait:
+            return []
+        return self._parse(False)
+
+    def close(self) -> List[A]:
+        """
+        Marks the end of the input and returns the remaining values. Raises
+        :exc:`ParseError` if there are no values before an error, otherwise
+        the error is raised by the next call.
+        """
+
+        self._raise()
+        if self._closed:
+            return []
+        self._closed = True
+        return self._parse(True)
+
+    def _parse(self, final: bool) -> List[A]:
+        ctx = self._ctx.locate(self._buf, self._pos)
+        loc = ctx.loc
+        self._offset += self._pos
+        self._buf = buf = self._buf[self._pos:] + "".join(self._chunks)
+        self._chunks = []
+        self._size = len(buf)
+        self._pos = pos = 0
+        ctx = self._make_ctx(Loc(0, loc.line, loc.col))
+        values: List[A] = []
+        while not self._done:
+            fn = self._first_fn if self._first else self._next_fn
+            r = fn(buf, pos, ctx)
+            # The value is complete if the parser has stopped far enough from
+            # the end of the input read so far. An error could be caused by
+            # a token that continues in the next chunk, so it is final only
+            # at the end of the input
+            if not final and (
+                    type(r) is Error or
+                    r.pos + self._lookahead > len(buf)):
+                self._wait = pos + 2 * (len(buf) - pos)
+                break
+            if type(r) is Error:
+                self._done = True
+                if r.consumed or self._first and not self._empty:
+                    loc = r.loc
+                    if not self._track_loc:
+                        loc = ctx.locate(buf, loc.pos).loc
+                    self._error = Error(
+                        Loc(loc.pos + self._offset, loc.line, loc.col),
+                        r.expected, r.consumed
+                    )
+                break
+            if not r.consumed and fn is self._next_fn:
+                raise RuntimeError("parser shouldn't accept empty string")
+            values.append(r.value)
+            pos = r.pos
+            ctx = r.ctx
+            self._first = False
+        self._pos = pos
+        self._ctx = ctx
+        if not values:
+            self._raise()
+        return values
+
+    def _raise(self) -> None:
+        if self._error is not None:
+            # Raises ParseError
+            ResultWrapper(self._error, self._fmt_loc).unwrap()
+
+
 class Parser(ParseObj[S_contra, A_co]):
     def parse(
             self, stream: S_contra, recover: bool = False, *,
             max_insertions: int = 5,
+            max_repairs: Optional[int] = None,
+            max_skip: Optional[int] = None,
             get_loc: Callable[[Loc, S_contra, int], Loc] = _get_loc,
-            fmt_loc: Callable[[Loc], str] = _fmt_loc
+            fmt_loc: Callable[[Loc], str] = _fmt_loc,
+            memo: bool = False,
+            track_loc: bool = True
     ) -> ParseResult[A_co, S_contra]:
         """
         Parses input.
 
+        With ``track_loc`` unset, the parsers keep only the position in the
+        input. The locations of errors are computed by ``get_loc`` only when
+        the errors are reported, from the start of the input or from the
+        previous error. During the parse, ``get_loc`` is called only by the
+        layout combinators from :mod:`reparsec.layout`, and then receives
+        the last location computed, which may be far behind the position.
+
         :param stream: Input to parse
         :param recover: Flag to enable error recovery
         :param max_insertions: Maximal number of token insertions in a row
             during error recovery
+        :param max_repairs: Maximal number of alternative repairs kept
+            during error recovery. Only the best ones are kept when the
+            repairs of several parsers are combined, which bounds the cost
+            of recovery from many errors, but may miss the best repair of
+            the whole input
+        :param max_skip: Maximal number of tokens skipped by a single repair
+            during error recovery
         :param get_loc: Function that constructs new ``Loc`` from a previous
             ``Loc``, a stream, and position in the stream
         :param fmt_loc: Function that converts ``Loc`` to string
-        """
-
-        ctx = Ctx(0, Loc(0, 0, 0), get_loc)
+        :param memo: Flag to enable memoization of :class:`Delay` parsers and
+            parsers created with :meth:`Parser.memo`
+        :param track_loc: Flag to track the location of every position
+            reached by the parsers
+        """
+
+        if max_repairs is not None and max_repairs < 1:
+            raise ValueError("Expected positive max_repairs")
+        if max_skip is not None and max_skip < 0:
+            raise ValueError("Expected non-negative max_skip")
+        ctx = Ctx(
+            0, Loc(0, 0, 0), get_loc, Memo() if memo else None, track_loc,
+            max_repairs, max_skip,
+            sequence.KindIndex(stream) if recover else None
+        )
         if recover:
             result = self.parse_fn(
                 stream, 0, ctx, max_insertions, max_insertions
             )
         else:
             result = self.parse_fast_fn(stream, 0, ctx)
-        return ResultWrapper(result, fmt_loc)
+        return ResultWrapper(
+            result, fmt_loc, _locate(get_loc, stream, track_loc)
+        )
+
+    def parse_iter(
+            self: "Parser[S, List[B]]", stream: S, *,
+            get_loc: Callable[[Loc, S, int], Loc] = _get_loc,
+            fmt_loc: Callable[[Loc], str] = _fmt_loc,
+            memo: bool = False,
+            track_loc: bool = True) -> Iterator[B]:
+        """
+        Parses input with a parser created by :meth:`many`, :meth:`sep_by`
+        or :meth:`sep_by1`, and yields the parsed values one at a time,
+        without collecting them into a list. Raises :exc:`ParseError` when
+        an error is reached. Error recovery is not supported.
+
+        >>> from reparsec.sequence import sym
+
+        >>> parser = sym("a").sep_by(sym(","))
+
+        >>> items = parser.parse_iter("a,a,b")
+        >>> next(items)
+        'a'
+        >>> next(items)
+        'a'
+        >>> next(items)
+        Traceback (most recent call last):
+          ...
+        reparsec.types.ParseError: at 4: expected 'a'
+
+        :param stream: Input to parse
+        :param get_loc: Function that constructs new ``Loc`` from a previous
+            ``Loc``, a stream, and position in the stream
+        :param fmt_loc: Function that converts ``Loc`` to string
+        :param memo: Flag to enable memoization of :class:`Delay` parsers and
+            parsers created with :meth:`Parser.memo`
+        :param track_loc: Flag to track the location of every position
+            reached by the parsers
+        """
+
+        iter_fn = combinators.iter_many(self.to_fns())
+        ctx = Ctx(
+            0, Loc(0, 0, 0), get_loc, Memo() if memo else None, track_loc
+        )
+        return _parse_iter(
+            iter_fn(stream, 0, ctx), fmt_loc,
+            _locate(get_loc, stream, track_loc)
+        )
+
+    def feeder(
+            self: "Parser[str, List[B]]", *,
+            get_loc: Callable[[Loc, str, int], Loc] = _get_loc,
+            fmt_loc: Callable[[Loc], str] = _fmt_loc,
+            lookahead: int = 1,
+            memo: bool = False,
+            track_loc: bool = True) -> Feeder[B]:
+        """
+        Creates an incremental parser for a parser created by :meth:`many`,
+        :meth:`sep_by` or :meth:`sep_by1`, that receives the input in chunks
+        and returns every parsed value as soon as it is complete, like
+        :meth:`parse_iter` on the whole input.
+
+        A value is complete once its parser stops at least ``lookahead``
+        items before the end of the input received so far, so ``lookahead``
+        should cover how far the parsers look past the point where they
+        stop. Errors are reported only by :meth:`Feeder.close`, and the input
+        after the last value is kept until then. ``get_loc`` should compute
+        the location incrementally from the previous one, as the parsed part
+        of the input is dropped.
+
+        >>> from reparsec.scannerless import regexp
+
+        >>> feeder = regexp(r"[0-9]+").sep_by(regexp(r",")).feeder()
+        >>> feeder.feed("1,2")
+        ['1']
+        >>> feeder.feed("3,4")
+        ['23']
+        >>> feeder.close()
+        ['4']
+
+        :param get_loc: Function that constructs new ``Loc`` from a previous
+            ``Loc``, a stream, and position in the stream
+        :param fmt_loc: Function that converts ``Loc`` to string
+        :param lookahead: Number of items past the end of a value that the
+            parsers need to see
+        :param memo: Flag to enable memoization of :class:`Delay` parsers and
+            parsers created with :meth:`Parser.memo`
+        :param track_loc: Flag to track the location of every position
+            reached by the parsers
+        """
+
+        return Feeder(
+            self.to_fns(), get_loc, fmt_loc, lookahead, memo, track_loc
+        )
 
     def fmap(self, fn: Callable[[A_co], B]) -> "TupleParser[S_contra, B]":
         """
@@ -239,6 +515,38 @@ class Parser(ParseObj[S_contra, A_co]):
 
         return many(self)
 
+    def skip_many(self) -> "TupleParser[S_contra, None]":
+        """
+        Like :meth:`many`, but drops the parsed values instead of collecting
+        them into a list. Useful for whitespace and comments.
+
+        >>> from reparsec.sequence import satisfy, sym
+
+        >>> parser = satisfy(str.isspace).skip_many() >> sym("a")
+
+        >>> parser.parse("  a").unwrap()
+        'a'
+        """
+
+        return skip_many(self)
+
+    def skip_many1(self) -> "TupleParser[S_contra, None]":
+        """
+        Like :meth:`skip_many`, but the parser must be applied at least once.
+
+        >>> from reparsec.sequence import satisfy
+
+        >>> parser = satisfy(str.isspace).label("space").skip_many1()
+
+        >>> parser.parse("  ").unwrap()
+        >>> parser.parse("").unwrap()
+        Traceback (most recent call last):
+          ...
+        reparsec.types.ParseError: at 0: expected space
+        """
+
+        return skip_many1(self)
+
     def attempt(self) -> "TupleParser[S_contra, A_co]":
         """
         Applies the parser, and pretends that no input was consumed if it
@@ -283,6 +591,54 @@ class Parser(ParseObj[S_contra, A_co]):
 
         return label(self, expected)
 
+    def tap(
+            self,
+            fn: Callable[[A_co], object]) -> "TupleParser[S_contra, A_co]":
+        """
+        Applies the parser, and calls ``fn`` with the parsed value as soon as
+        the parser succeeds. Lets the grammar emit events during parsing,
+        instead of building the values and processing them afterwards.
+
+        The calls are made in the order of the input, but also for the values
+        that are discarded later: by backtracking, by error recovery, or by
+        the second pass of a two-phase parse. With the ``memo`` flag of
+        :meth:`Parser.parse`, a memoized parser that is applied again at the
+        same position returns the cached result, and the calls inside it are
+        not repeated.
+
+        >>> from reparsec.sequence import sym
+
+        >>> events = []
+        >>> parser = sym("a").tap(events.append).sep_by(sym(","))
+
+        >>> parser.parse("a,a").unwrap()
+        ['a', 'a']
+        >>> events
+        ['a', 'a']
+
+        :param fn: Function to call with the parsed value
+        """
+
+        return tap(self, fn)
+
+    def memo(self) -> "TupleParser[S_contra, A_co]":
+        """
+        Caches results of the parser by position, so it is applied at most
+        once at each position of the input. Has effect only when
+        memoization is enabled with the ``memo`` flag of
+        :meth:`Parser.parse`.
+
+        >>> from reparsec.sequence import sym
+
+        >>> item = sym("a").memo()
+        >>> parser = (item + sym("b")).attempt() | (item + sym("c"))
+
+        >>> parser.parse("ac", memo=True).unwrap()
+        ('a', 'c')
+        """
+
+        return memo(self)
+
     def recover(self) -> "TupleParser[S_contra, A_co]":
         """
         Allows the parser to recover with repair sequences that starts with
@@ -390,6 +746,81 @@ class Parser(ParseObj[S_contra, A_co]):
 
         return sep_by(self, sep)
 
+    def sep_by1(
+            self,
+            sep: ParseObj[S_contra, B]) -> "TupleParser[S_contra, List[A_co]]":
+        """
+        Like :meth:`sep_by`, but the parser must be applied at least once.
+
+        >>> from reparsec.sequence import sym
+
+        >>> parser = sym("a").sep_by1(sym(","))
+
+        >>> parser.parse("a,a").unwrap()
+        ['a', 'a']
+        >>> parser.parse("").unwrap()
+        Traceback (most recent call last):
+          ...
+        reparsec.types.ParseError: at 0: expected 'a'
+
+        :param sep: Separators parser
+        """
+
+        return sep_by1(self, sep)
+
+    def fold(
+            self, init: B, step: Callable[[B, A_co], B],
+            sep: Optional[ParseObj[S_contra, C]] = None
+    ) -> "TupleParser[S_contra, B]":
+        """
+        Like :meth:`many`, or :meth:`sep_by` if ``sep`` is given, but
+        combines the values with ``step`` as they are parsed, starting with
+        ``init``, instead of collecting them into a list.
+
+        >>> from reparsec.sequence import satisfy, sym
+
+        >>> parser = satisfy(str.isdigit).fmap(int).fold(
+        ...     0, lambda acc, x: acc + x, sym("+")
+        ... )
+
+        >>> parser.parse("1+2+3").unwrap()
+        6
+
+        :param init: Initial value
+        :param step: Function that combines the value so far with the next
+            parsed value
+        :param sep: Separators parser
+        """
+
+        return fold(self, init, step, sep)
+
+    def collect_into(
+            self, factory: Callable[[], B],
+            sep: Optional[ParseObj[S_contra, C]] = None
+    ) -> "TupleParser[S_contra, B]":
+        """
+        Like :meth:`many`, or :meth:`sep_by` if ``sep`` is given, but adds
+        the values to a container created by ``factory`` as they are parsed.
+        The container is filled by its ``append`` or ``add`` method, or, for
+        a mapping, from the key and value pairs.
+
+        >>> from array import array
+        >>> from reparsec.sequence import satisfy, sym
+
+        >>> digit = satisfy(str.isdigit).fmap(int)
+        >>> pair = (digit << sym("=")) + digit
+
+        >>> digit.collect_into(lambda: array("b")).parse("123").unwrap()
+        array('b', [1, 2, 3])
+        >>> pair.collect_into(dict, sym(",")).parse("1=2,3=4").unwrap()
+        {1: 2, 3: 4}
+
+        :param factory: Function that creates an empty container
+        :param sep: Separators parser
+        """
+
+        return collect_into(self, factory, sep)
+
     def between(
             self, open: ParseObj[S_contra, B],
             close: ParseObj[S_contra, C]) -> "TupleParser[S_contra, A_co]":
@@ -740,6 +1171,10 @@ class _Tuple8(
 class Delay(TupleParser[S_contra, A_co]):
     """
     A subclass of :class:`TupleParser` to use as a forward declaration.
+    Results of the defined parser are memoized when the ``memo`` flag of
+    :meth:`Parser.parse` is set, which also allows the definition to be
+    left-recursive. With error recovery, the results of the repairs are
+    memoized too, so nested alternatives do not repeat them.
 
     >>> from reparsec import Delay
     >>> from reparsec.sequence import sym
@@ -749,6 +1184,12 @@ class Delay(TupleParser[S_contra, A_co]):
 
     >>> parser.parse("aaa").unwrap()
     ('a', ('a', ('a', None)))
+
+    >>> expr = Delay()
+    >>> expr.define((expr + sym("-") + sym("1")) | sym("1"))
+
+    >>> expr.parse("1-1-1", memo=True).unwrap()
+    (((('1', '-'), '1'), '-'), '1')
     """
 
     def __init__(self) -> None:
@@ -788,7 +1229,7 @@ class Delay(TupleParser[S_contra, A_co]):
         if self._defined:
             raise RuntimeError("Delayed parser was already defined")
         self._defined = True
-        self._fns = parser.to_fns()
+        self._fns = _memo.memo(parser.to_fns())
 
     def parse_fast_fn(
             self, stream: S_contra, pos: int,
@@ -803,7 +1244,9 @@ class Delay(TupleParser[S_contra, A_co]):
     def to_fns(self) -> ParseFns[S_contra, A_co]:
         if self._defined:
             return self._fns
-        return super().to_fns()
+        return ParseFns(
+            self.parse_fast_fn, self.parse_fn, node=("delay", self)
+        )
 
 
 def fmap(parser: ParseObj[S, A], fn: Callable[[A], B]) -> TupleParser[S, B]:
@@ -899,6 +1342,65 @@ def many(parser: ParseObj[S, A]) -> TupleParser[S, List[A]]:
     return FnParser(combinators.many(parser.to_fns()))
 
 
+def skip_many(parser: ParseObj[S, A]) -> TupleParser[S, None]:
+    """
+    :meth:`Parser.skip_many` as a function.
+
+    :param parser: Parser
+    """
+
+    return FnParser(combinators.skip_many(parser.to_fns()))
+
+
+def skip_many1(parser: ParseObj[S, A]) -> TupleParser[S, None]:
+    """
+    :meth:`Parser.skip_many1` as a function.
+
+    :param parser: Parser
+    """
+
+    return FnParser(combinators.skip_many(parser.to_fns(), empty=False))
+
+
+def fold(
+        parser: ParseObj[S, A], init: B, step: Callable[[B, A], B],
+        sep: Optional[ParseObj[S, C]] = None) -> TupleParser[S, B]:
+    """
+    :meth:`Parser.fold` as a function.
+
+    :param parser: Items parser
+    :param init: Initial value
+    :param step: Function that combines the value so far with the next parsed
+        value
+    :param sep: Separators parser
+    """
+
+    return FnParser(
+        combinators.fold(
+            parser.to_fns(), None if sep is None else sep.to_fns(), init,
+            step
+        )
+    )
+
+
+def collect_into(
+        parser: ParseObj[S, A], factory: Callable[[], B],
+        sep: Optional[ParseObj[S, C]] = None) -> TupleParser[S, B]:
+    """
+    :meth:`Parser.collect_into` as a function.
+
+    :param parser: Items parser
+    :param factory: Function that creates an empty container
+    :param sep: Separators parser
+    """
+
+    return FnParser(
+        combinators.collect_into(
+            parser.to_fns(), None if sep is None else sep.to_fns(), factory
+        )
+    )
+
+
 def attempt(parser: ParseObj[S, A]) -> TupleParser[S, A]:
     """
     :meth:`Parser.attempt` as a function.
@@ -920,6 +1422,29 @@ def label(parser: ParseObj[S, A], expected: str) -> TupleParser[S, A]:
     return FnParser(combinators.label(parser.to_fns(), expected))
 
 
+def tap(
+        parser: ParseObj[S, A],
+        fn: Callable[[A], object]) -> TupleParser[S, A]:
+    """
+    :meth:`Parser.tap` as a function.
+
+    :param parser: Parser
+    :param fn: Function to call with the parsed value
+    """
+
+    return FnParser(combinators.tap(parser.to_fns(), fn))
+
+
+def memo(parser: ParseObj[S, A]) -> TupleParser[S, A]:
+    """
+    :meth:`Parser.memo` as a function.
+
+    :param parser: Parser
+    """
+
+    return FnParser(_memo.memo(parser.to_fns()))
+
+
 def recover(parser: ParseObj[S, A]) -> TupleParser[S, A]:
     """
     :meth:`Parser.recover` as a function.
@@ -968,8 +1493,21 @@ def sep_by(
     :param sep: Separators parser
     """
 
-    return maybe(seq(parser, many(seqr(sep, parser)))).fmap(
-        lambda v: [] if v is None else [v[0]] + v[1]
+    return FnParser(combinators.sep_by(parser.to_fns(), sep.to_fns()))
+
+
+def sep_by1(
+        parser: ParseObj[S, A],
+        sep: ParseObj[S, B]) -> TupleParser[S, List[A]]:
+    """
+    :meth:`Parser.sep_by1` as a function.
+
+    :param parser: Items parser
+    :param sep: Separators parser
+    """
+
+    return FnParser(
+        combinators.sep_by(parser.to_fns(), sep.to_fns(), empty=False)
     )
 
 
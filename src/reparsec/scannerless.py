@@ -2,20 +2,24 @@
 Parsers for scannerless parsing of strings.
 """
 
-from typing import TypeVar, Union
+from typing import Iterator, List, Mapping, Optional, TypeVar, Union, overload
 
 from .core import scannerless
-from .parser import FnParser, Parser, TupleParser
+from .parser import Feeder, FnParser, Parser, TupleParser
 from .types import ParseResult
 
-__all__ = ("literal", "regexp", "parse")
+__all__ = (
+    "literal", "one_of", "regexp", "parse", "parse_iter", "feeder"
+)
 
 A = TypeVar("A")
 
 
-def literal(s: str) -> TupleParser[str, str]:
+def literal(s: str, *, trivia: Optional[str] = None) -> TupleParser[str, str]:
     """
-    Parses the string ``s`` and returns it.
+    Parses the string ``s`` and returns it. If ``trivia`` is given, the
+    input that matches it after the string, such as whitespace or comments,
+    is skipped as well.
 
     >>> from reparsec.scannerless import literal
 
@@ -28,16 +32,66 @@ def literal(s: str) -> TupleParser[str, str]:
       ...
     reparsec.types.ParseError: at 0: expected 'ab'
 
+    >>> (literal("a", trivia=" *") + literal("b")).parse("a  b").unwrap()
+    ('a', 'b')
+
     :param s: String to parse
+    :param trivia: Regular expression for the input to skip after the
+        string, must match the empty string
     """
 
-    return FnParser(scannerless.literal(s))
+    return FnParser(scannerless.literal(s, trivia))
+
+
+@overload
+def one_of(__literals: Mapping[str, A]) -> TupleParser[str, A]:
+    ...
+
+
+@overload
+def one_of(*literals: str) -> TupleParser[str, str]:
+    ...
 
 
-def regexp(pat: str, group: Union[int, str] = 0) -> TupleParser[str, str]:
+def one_of(*literals: object) -> TupleParser[str, object]:
+    """
+    Parses the longest matching string and returns it, or the value it is
+    mapped to if a mapping is given. Unlike a chain of :func:`literal`
+    parsers, the strings are looked up in a table, so the cost does not
+    grow with their number. Errors and error recovery list the longer
+    strings first.
+
+    >>> from reparsec.scannerless import one_of
+
+    >>> parser = one_of("<", "<=", "<<")
+    >>> parser.parse("<=").unwrap()
+    '<='
+
+    >>> one_of({"true": True, "false": False}).parse("false").unwrap()
+    False
+
+    >>> parser.parse(">").unwrap()
+    Traceback (most recent call last):
+      ...
+    reparsec.types.ParseError: at 0: expected '<=', '<<' or '<'
+
+    :param literals: Strings to parse, or a mapping from strings to values
+    """
+
+    if len(literals) == 1 and isinstance(literals[0], Mapping):
+        table: Mapping[str, object] = literals[0]
+    else:
+        table = {str(s): s for s in literals}
+    return FnParser(scannerless.one_of(table))
+
+
+def regexp(
+        pat: str, group: Union[int, str] = 0, *,
+        trivia: Optional[str] = None) -> TupleParser[str, str]:
     """
     Parses the prefix of input that matches ``pat`` and returns the value of
-    ``group``.
+    ``group``. If ``trivia`` is given, the input that matches it after the
+    match of ``pat`` is skipped as well.
 
     >>> from reparsec.scannerless import regexp
 
@@ -50,16 +104,24 @@ def regexp(pat: str, group: Union[int, str] = 0) -> TupleParser[str, str]:
       ...
     reparsec.types.ParseError: at 0: unexpected input
 
+    >>> number = regexp("[0-9]+", trivia=r"\\s*").fmap(int)
+    >>> number.many().parse("1 2  3").unwrap()
+    [1, 2, 3]
+
     :param pat: Regular expression
     :param group: Group index or name
+    :param trivia: Regular expression for the input to skip after the match,
+        must match the empty string
     """
 
-    return FnParser(scannerless.regexp(pat, group))
+    return FnParser(scannerless.regexp(pat, group, trivia))
 
 
 def parse(
-        parser: Parser[str, A], stream: str,
-        recover: bool = False) -> ParseResult[A, str]:
+        parser: Parser[str, A], stream: str, recover: bool = False, *,
+        max_repairs: Optional[int] = None, max_skip: Optional[int] = None,
+        memo: bool = False,
+        track_loc: bool = True) -> ParseResult[A, str]:
     """
     Wrapper around :meth:`reparsec.Parser.parse` that enables line and column
     tracking for scannerless parsers.
@@ -80,10 +142,78 @@ def parse(
     :param parser: Parser to run
     :param stream: String to parse
     :param recover: Flag to enable error recovery
+    :param max_repairs: Maximal number of alternative repairs kept during
+        error recovery
+    :param max_skip: Maximal number of characters skipped by a single
+        repair during error recovery
+    :param memo: Flag to enable memoization
+    :param track_loc: Flag to track the location of every position reached
+        by the parsers
     """
 
     return parser.parse(
         stream, recover,
+        get_loc=scannerless.LineIndex(stream).get_loc,
+        fmt_loc=lambda loc: "{}:{}".format(loc.line + 1, loc.col + 1),
+        max_repairs=max_repairs, max_skip=max_skip, memo=memo,
+        track_loc=track_loc
+    )
+
+
+def parse_iter(
+        parser: Parser[str, List[A]], stream: str, *,
+        memo: bool = False, track_loc: bool = True) -> Iterator[A]:
+    """
+    Wrapper around :meth:`reparsec.Parser.parse_iter` that enables line and
+    column tracking for scannerless parsers.
+
+    >>> from reparsec.scannerless import literal, parse_iter
+
+    >>> list(parse_iter(literal("a").sep_by(literal("\\n")), "a\\na\\na"))
+    ['a', 'a', 'a']
+
+    :param parser: Parser created by ``many``, ``sep_by`` or ``sep_by1``
+    :param stream: String to parse
+    :param memo: Flag to enable memoization
+    :param track_loc: Flag to track the location of every position reached
+        by the parsers
+    """
+
+    return parser.parse_iter(
+        stream,
+        get_loc=scannerless.LineIndex(stream).get_loc,
+        fmt_loc=lambda loc: "{}:{}".format(loc.line + 1, loc.col + 1),
+        memo=memo, track_loc=track_loc
+    )
+
+
+def feeder(
+        parser: Parser[str, List[A]], *, lookahead: int = 1,
+        memo: bool = False, track_loc: bool = True) -> Feeder[A]:
+    """
+    Wrapper around :meth:`reparsec.Parser.feeder` that enables line and
+    column tracking for scannerless parsers.
+
+    >>> from reparsec.scannerless import feeder, literal
+
+    >>> f = feeder(literal("a").sep_by(literal("\\n")))
+    >>> f.feed("a\\na\\nb")
+    ['a', 'a']
+    >>> f.close()
+    Traceback (most recent call last):
+      ...
+    reparsec.types.ParseError: at 3:1: expected 'a'
+
+    :param parser: Parser created by ``many``, ``sep_by`` or ``sep_by1``
+    :param lookahead: Number of characters past the end of a value that the
+        parsers need to see
+    :param memo: Flag to enable memoization
+    :param track_loc: Flag to track the location of every position reached
+        by the parsers
+    """
+
+    return parser.feeder(
         get_loc=scannerless.get_loc,
-        fmt_loc=lambda l: "{}:{}".format(l.line + 1, l.col + 1)
+        fmt_loc=lambda loc: "{}:{}".format(loc.line + 1, loc.col + 1),
+        lookahead=lookahead, memo=memo, track_loc=track_loc
     )
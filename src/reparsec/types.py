@@ -4,9 +4,9 @@ Core parser API.
 
 from abc import abstractmethod
 from dataclasses import dataclass
-from typing import Callable, Generic, List, Optional, TypeVar
+from typing import Callable, Generic, Iterable, List, Optional, TypeVar
 
-from .core.repair import RepairOp, Skip
+from .core.repair import RepairOp, Skip, ops_items, repair_key
 from .core.result import Error, Ok, Result
 from .core.types import Loc
 
@@ -99,44 +99,38 @@ class ParseResult(Generic[A_co, S]):
 
 
 class ResultWrapper(ParseResult[A_co, S]):
-    def __init__(self, result: Result[A_co, S], fmt_loc: Callable[[Loc], str]):
+    def __init__(
+            self, result: Result[A_co, S], fmt_loc: Callable[[Loc], str],
+            locate: Optional[Callable[[Loc], Loc]] = None):
         self._result = result
         self._fmt_loc = fmt_loc
+        self._locate = locate
 
     def fmap(self, fn: Callable[[A_co], B]) -> ParseResult[B, S]:
-        return ResultWrapper(self._result.fmap(fn), self._fmt_loc)
+        return ResultWrapper(
+            self._result.fmap(fn), self._fmt_loc, self._locate
+        )
+
+    def _error_item(
+            self, loc: Loc, expected: Iterable[str],
+            op: Optional[RepairOp] = None) -> ErrorItem:
+        if self._locate is not None:
+            loc = self._locate(loc)
+        return ErrorItem(loc, self._fmt_loc(loc), list(expected), op)
 
     def unwrap(self, recover: bool = False) -> A_co:
         if type(self._result) is Ok:
             return self._result.value
 
-        if type(self._result) is Error:
+        if type(self._result) is Error or not self._result.repairs:
             raise ParseError([
-                ErrorItem(
-                    self._result.loc,
-                    self._fmt_loc(self._result.loc),
-                    list(self._result.expected),
-                )
+                self._error_item(self._result.loc, self._result.expected)
             ])
-
-        if not self._result.repairs:
-            raise ParseError([
-                ErrorItem(
-                    self._result.loc,
-                    self._fmt_loc(self._result.loc),
-                    list(self._result.expected)
-                )
-            ])
-        repair = min(
-            self._result.repairs,
-            key=lambda r: (r.cost, -r.pos, r.prio is None)
-        )
+        repair = min(self._result.repairs, key=repair_key)
         if recover:
             return repair.value
         errors = [
-            ErrorItem(
-                item.loc, self._fmt_loc(item.loc), list(item.expected), item.op
-            )
-            for item in repair.ops
+            self._error_item(item.loc, item.expected, item.op)
+            for item in ops_items(repair.ops)
         ]
         raise ParseError(errors)
@@ -1,9 +1,9 @@
 import re
-from typing import Match, Sequence
+from typing import Dict, Match, Sequence
 
 from reparsec import Delay, Parser
-from reparsec.lexer import Token, parse, split_tokens, token
-from reparsec.sequence import eof, sym
+from reparsec.lexer import Token, parse, punct, split_tokens, token
+from reparsec.sequence import eof
 
 spec = re.compile(r"""
 [ \n\r\t]+
@@ -41,10 +41,6 @@ def unescape(s: str) -> str:
     return escape.sub(sub, s)
 
 
-def punct(x: str) -> Parser[Sequence[Token], Token]:
-    return sym(Token("punct", x), repr(x))
-
-
 value = Delay[Sequence[Token], object]()
 
 string = token("string").fmap(lambda t: unescape(t.value))
@@ -52,9 +48,9 @@ integer = token("integer").fmap(lambda t: int(t.value))
 number = token("float").fmap(lambda t: float(t.value))
 boolean = token("bool").fmap(lambda t: t.value == "true")
 null = token("null").fmap(lambda t: None)
-json_dict = (
+json_dict: Parser[Sequence[Token], Dict[str, object]] = (
     (string.recover_with("a", "'\"a\"'") << punct(":")) + value
-).sep_by(punct(",")).fmap(lambda v: dict(v)).between(
+).collect_into(dict, punct(",")).between(
     punct("{"), punct("}")
 ).label("object")
 json_list = value.sep_by(punct(",")).between(
@@ -0,0 +1,37 @@
+from typing import Callable, Sequence
+
+from reparsec import Delay, Parser
+from reparsec.lexer import Token, punct
+from reparsec.sequence import eof
+
+from .json import boolean, integer, null, number, string
+
+Emit = Callable[[str, object], object]
+
+
+def _skip(acc: None, _: object) -> None:
+    return acc
+
+
+def events(emit: Emit) -> Parser[Sequence[Token], None]:
+    value = Delay[Sequence[Token], None]()
+
+    scalar = (integer | number | boolean | null | string).tap(
+        lambda v: emit("value", v)
+    )
+    json_dict = (
+        string.tap(lambda k: emit("key", k)) + punct(":") + value
+    ).fold(None, _skip, punct(",")).between(
+        punct("{").tap(lambda _: emit("start_object", None)),
+        punct("}").tap(lambda _: emit("end_object", None))
+    ).label("object")
+    json_list = value.fold(None, _skip, punct(",")).between(
+        punct("[").tap(lambda _: emit("start_array", None)),
+        punct("]").tap(lambda _: emit("end_array", None))
+    ).label("list")
+
+    value.define(
+        (scalar | json_dict | json_list).fmap(lambda _: None).label("value")
+    )
+
+    return value << eof()
@@ -1,5 +1,5 @@
 import re
-from typing import Match
+from typing import Dict, Match
 
 from reparsec import Delay, Parser
 from reparsec.scannerless import literal, parse, regexp
@@ -24,15 +24,16 @@ def unescape(s: str) -> str:
     return escape.sub(sub, s)
 
 
-ows = regexp(r"[ \n\r\t]*")
+ws = r"[ \n\r\t]*"
+ows = regexp(ws)
 
 
 def token(pat: str) -> Parser[str, str]:
-    return regexp(pat + r"[ \n\r\t]*", 1)
+    return regexp(pat, 1, trivia=ws)
 
 
 def punct(p: str) -> Parser[str, str]:
-    return literal(p) << ows
+    return literal(p, trivia=ws)
 
 
 value = Delay[str, object]()
@@ -47,9 +48,9 @@ number = token(
 ).label("number").fmap(float)
 boolean = token(r"(true|false)").label("bool").fmap(lambda s: s == "true")
 null = token(r"(null)").label("null").fmap(lambda _: None)
-json_dict = (
+json_dict: Parser[str, Dict[str, object]] = (
     (string.recover_with("a", "'\"a\"'") << punct(":")) + value
-).sep_by(punct(",")).fmap(lambda v: dict(v)).between(
+).collect_into(dict, punct(",")).between(
     punct("{"), punct("}")
 ).label("object")
 json_list = value.sep_by(punct(",")).between(
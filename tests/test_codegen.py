@@ -0,0 +1,169 @@
+import io
+from typing import Callable, Sequence, Tuple
+
+import pytest
+
+from reparsec import Delay, ParseError, Parser
+from reparsec.codegen import compile_parser
+from reparsec.lexer import (
+    LazyTokens, LexError, TokenArray, parse, split_tokens
+)
+from reparsec.scannerless import literal
+from reparsec.scannerless import parse as sl_parse
+from reparsec.scannerless import regexp
+from reparsec.sequence import digit, eof, sym
+
+from . import (
+    test_expr, test_json, test_json_scannerless, test_layout, test_parsing,
+    test_yamlish
+)
+from .parsers import expr, json, json_scannerless, yamlish
+
+
+def outcome(run: Callable[[], object]) -> object:
+    try:
+        return run()
+    except ParseError as err:
+        return str(err), [(e.loc, e.expected) for e in err.errors]
+
+
+def compare(
+        parser: Parser[str, object], data: str,
+        parse: Callable[..., object] = sl_parse) -> None:
+    compiled = compile_parser(parser)
+    for memo in (False, True):
+        assert outcome(
+            lambda: parse(compiled, data, memo=memo).unwrap()  # type: ignore
+        ) == outcome(
+            lambda: parse(parser, data, memo=memo).unwrap()  # type: ignore
+        )
+
+
+def cases(*data: Sequence[Tuple[str, object]]) -> Sequence[str]:
+    return [d[0] for ds in data for d in ds]
+
+
+@pytest.mark.parametrize("data", cases(
+    test_json.DATA_POSITIVE, test_json.DATA_NEGATIVE,
+    test_json.DATA_RECOVERY  # type: ignore
+))
+def test_codegen_json(data: str) -> None:
+    try:
+        streams = [
+            split_tokens(data, json.spec), TokenArray(data, json.spec),
+            LazyTokens(io.StringIO(data), json.spec)
+        ]
+    except LexError:
+        pytest.skip("lexing error")
+    compiled = compile_parser(json.parser)
+    for tokens in streams:
+        assert outcome(lambda: parse(compiled, tokens).unwrap()) == outcome(
+            lambda: parse(json.parser, tokens).unwrap()
+        )
+
+
+@pytest.mark.parametrize("data", cases(
+    test_json_scannerless.DATA_POSITIVE, test_json_scannerless.DATA_NEGATIVE,
+    test_json_scannerless.DATA_RECOVERY  # type: ignore
+))
+def test_codegen_json_scannerless(data: str) -> None:
+    compare(json_scannerless.parser, data)
+
+
+@pytest.mark.parametrize("data", cases(
+    test_expr.DATA_POSITIVE, test_expr.DATA_NEGATIVE,
+    test_expr.DATA_RECOVERY  # type: ignore
+))
+def test_codegen_expr(data: str) -> None:
+    compare(expr.parser, data)
+
+
+@pytest.mark.parametrize("data", cases(test_yamlish.DATA_POSITIVE))
+def test_codegen_yamlish(data: str) -> None:
+    compare(yamlish.parser, data)
+
+
+@pytest.mark.parametrize("parser, data", [
+    (parser, data)
+    for parser, data, _ in (
+        test_parsing.DATA_POSITIVE + test_parsing.DATA_NEGATIVE  # type: ignore
+    )
+] + [(parser, "a" + data) for parser, data, _ in test_parsing.DATA_POSITIVE])
+def test_codegen_combinators(parser: Parser[str, object], data: str) -> None:
+    compare(parser << eof(), data)
+
+
+@pytest.mark.parametrize("parser, data", [
+    (parser, data)
+    for parser, data, _ in (
+        test_layout.DATA_POSITIVE + test_layout.DATA_NEGATIVE  # type: ignore
+    )
+])
+def test_codegen_layout(parser: Parser[str, object], data: str) -> None:
+    compare(parser << eof(), data)
+
+
+@pytest.mark.parametrize("data", ["1", "5-1-1", "", "5-", "5x"])
+def test_codegen_left_recursion(data: str) -> None:
+    num = digit.fmap(int)
+    sub = Delay[Sequence[str], int]()
+    sub.define((sub + sym("-") + num).fmap(lambda v: v[0][0] - v[1]) | num)
+    parser = compile_parser(sub << eof())
+
+    assert outcome(
+        lambda: parser.parse(data, memo=True).unwrap()
+    ) == outcome(lambda: (sub << eof()).parse(data, memo=True).unwrap())
+
+
+ws = regexp(" *")
+word = regexp("[a-z]+")
+regular = [
+    literal("a") << ws,
+    literal("a") + ws + literal("b"),
+    regexp("a*") + literal("a"),
+    regexp("(a)(b)?", 1) + word.label("word"),
+    (literal("ab") | literal("a") | word.label("word")) << ws,
+    literal("a") | literal("ab") | regexp("x*"),
+    (literal("a") + literal("b")) | literal("a"),
+    (literal("a") + literal("b")).attempt() | literal("a") | literal("c"),
+    literal("a").maybe() + regexp("a*") + literal("a").maybe(),
+    literal("x") >> (literal("a") | literal("b") | literal("c")).many(),
+    literal("x") + (literal("a") | literal(" ")).skip_many() + literal("b"),
+    literal("x") + (literal("a") | word | ws) + literal("y").label("Y"),
+    (literal("a") | word).fmap(str.upper) + (ws >> literal("=")),
+    (literal("x") + literal("y")) | (word.fmap(len) | regexp("[0-9]+")),
+    literal("(") + literal("a").sep_by(literal(",")) + literal(")"),
+]
+
+
+@pytest.mark.parametrize("parser", regular)
+@pytest.mark.parametrize("data", [
+    "", "a", "a  ", "ab", "a b", "aa", "aaa", "abc", "ac", "xy", "xa",
+    "xabca", "xaby", "x  y", "c", "cx", "a =", "ab  =", "xyz", "12",
+    "(a,a)", "(a,)", "()", "aaab",
+])
+def test_codegen_fused(parser: Parser[str, object], data: str) -> None:
+    compare(parser, data)
+    compare(parser << eof(), data)
+
+
+attempts = [
+    (literal("b") << regexp("a*b")).attempt().label("L0"),
+    (regexp("(b)|(a)", 0) << literal("aa")).attempt().attempt().label("L2"),
+    (literal("a") + literal("b")).attempt().label("ab") | literal("c"),
+    ((literal("a") + literal("b")).attempt().label("ab") + literal("c")),
+    (literal("a") + literal("b")).label("ab").attempt() | literal("a"),
+    ((literal("a") + literal("b")).attempt() | literal("c")).label("L"),
+    ((literal("a") + literal("b")).attempt().label("ab")).maybe() + ws,
+    literal("x") >> (literal("a") + literal("b")).attempt().label("ab").many(),
+]
+
+
+@pytest.mark.parametrize("parser", attempts)
+@pytest.mark.parametrize("data", [
+    "", "a", "ab", "abc", "ac", "b", "b ", "bab", "baa", "c", "xab", "xaba",
+])
+def test_codegen_fused_attempt(
+        parser: Parser[str, object], data: str) -> None:
+    compare(parser, data)
+    compare(parser << eof(), data)
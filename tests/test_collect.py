@@ -0,0 +1,36 @@
+from typing import List, Optional, Sequence
+
+import pytest
+
+from reparsec import Parser
+from reparsec.codegen import compile_parser
+from reparsec.sequence import eof
+
+from .test_sep_by import a, ab, comma, outcome, semi
+
+
+@pytest.mark.parametrize("sep", [None, comma, comma.attempt() | semi])
+@pytest.mark.parametrize("data", [
+    "", "ab", "ab,ab", "ab,ab,", "ab,,ab", "ab,abab", "ab,a,ab", "ab;ab",
+    "ab,b", "b", "a,,b", "abab", "aba",
+])
+@pytest.mark.parametrize("recover", [False, True])
+def test_collect(
+        sep: Optional[Parser[Sequence[str], object]], data: str,
+        recover: bool) -> None:
+    expected = ab.many() if sep is None else ab.sep_by(sep)
+    parsers: List[Parser[Sequence[str], List[str]]] = [
+        ab.collect_into(list, sep),
+        ab.fold([], lambda acc, x: [*acc, x], sep),
+    ]
+    for parser in parsers:
+        for tail in (eof(), a.maybe()):
+            for p in (parser, compile_parser(parser)):
+                assert outcome(p + tail, data, recover) == outcome(
+                    expected + tail, data, recover
+                )
+
+
+def test_collect_into_unknown() -> None:
+    with pytest.raises(TypeError):
+        ab.collect_into(object).parse("ab")
@@ -0,0 +1,96 @@
+from typing import Callable, List, Optional, Sequence, TypeVar
+
+import pytest
+
+from reparsec import ParseError, Parser
+from reparsec.core.result import Result, SimpleResult
+from reparsec.core.types import Ctx
+from reparsec.primitive import Pure
+from reparsec.scannerless import literal, regexp
+from reparsec.sequence import eof, sym
+
+S = TypeVar("S")
+A = TypeVar("A")
+
+
+class Opaque(Parser[S, A]):
+    def __init__(self, parser: Parser[S, A]):
+        self._parser = parser
+
+    def parse_fast_fn(
+            self, stream: S, pos: int, ctx: Ctx[S]) -> SimpleResult[A, S]:
+        return self._parser.parse_fast_fn(stream, pos, ctx)
+
+    def parse_fn(
+            self, stream: S, pos: int, ctx: Ctx[S], ins: int,
+            rem: Optional[int]) -> Result[A, S]:
+        return self._parser.parse_fn(stream, pos, ctx, ins, rem)
+
+
+def opaque(parser: Parser[S, A]) -> Parser[S, A]:
+    assert parser.to_fns().first is not None
+    return Opaque(parser)
+
+
+def plain_sym(s: A) -> Parser[Sequence[A], A]:
+    return opaque(sym(s))
+
+
+def outcome(
+        parser: Parser[Sequence[A], object], data: Sequence[A],
+        recover: bool) -> object:
+    try:
+        return parser.parse(data, recover).unwrap(recover)
+    except ParseError as err:
+        return str(err)
+
+
+def grammar(
+        s: Callable[[str], Parser[Sequence[str], str]]
+) -> Parser[Sequence[str], object]:
+    return (
+        (s("a") + s("b")).fmap("".join) | s("c").label("C") | s("d")
+        | (s("a") + s("c")).fmap("".join) | s("e").fmap(str.upper)
+        | Pure("!")
+    ) << eof()
+
+
+@pytest.mark.parametrize(
+    "data", ["ab", "ac", "c", "d", "e", "", "x", "ad", "abc", "aab"]
+)
+@pytest.mark.parametrize("recover", [False, True])
+def test_dispatch_sym(data: str, recover: bool) -> None:
+    assert (
+        outcome(grammar(sym), data, recover) ==
+        outcome(grammar(plain_sym), data, recover)
+    )
+
+
+@pytest.mark.parametrize("data", [[1], [[1]], [[1], "+", 1], [], ["x"]])
+@pytest.mark.parametrize("recover", [False, True])
+def test_dispatch_unhashable(data: List[object], recover: bool) -> None:
+    parser = (sym(1) | sym("+")).many() << eof()
+    plain = (plain_sym(1) | plain_sym("+")).many() << eof()
+    assert outcome(parser, data, recover) == outcome(plain, data, recover)
+
+
+scannerless = (
+    literal("ab") | literal("ac") | regexp(r"[0-9]+") | literal("b")
+    | regexp(r"(?P<x>x)|y", "x") | regexp(r"z*") | literal("q")
+) << eof()
+scannerless_plain = (
+    opaque(literal("ab")) | opaque(literal("ac")) | opaque(regexp(r"[0-9]+"))
+    | opaque(literal("b")) | opaque(regexp(r"(?P<x>x)|y", "x"))
+    | regexp(r"z*") | opaque(literal("q"))
+) << eof()
+
+
+@pytest.mark.parametrize(
+    "data", ["ab", "ac", "ad", "b", "12", "x", "y", "z", "", "q", "-"]
+)
+@pytest.mark.parametrize("recover", [False, True])
+def test_dispatch_scannerless(data: str, recover: bool) -> None:
+    assert (
+        outcome(scannerless, data, recover) ==
+        outcome(scannerless_plain, data, recover)
+    )
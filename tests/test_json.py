@@ -1,11 +1,19 @@
-from typing import List, Tuple
+import io
+import re
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
 
 import pytest
 
-from reparsec import ParseError
-from reparsec.lexer import parse, split_tokens
+from reparsec import ParseError, Parser
+from reparsec.codegen import compile_parser
+from reparsec.core.sequence import KindIndex
+from reparsec.lexer import (
+    LazyTokens, LexError, Token, TokenArray, parse, parse_iter, punct,
+    split_tokens, token
+)
+from reparsec.sequence import satisfy, sym
 
-from .parsers import json
+from .parsers import json, json_events
 
 DATA_POSITIVE: List[Tuple[str, object]] = [
     (r"1", 1),
@@ -111,3 +119,227 @@ def test_recovery(data: str, value: object, expected: str) -> None:
     with pytest.raises(ParseError) as err:
         r.unwrap()
     assert str(err.value) == expected
+
+
+@pytest.mark.parametrize("data, value, expected", DATA_RECOVERY)
+def test_max_repairs(data: str, value: object, expected: str) -> None:
+    tokens = split_tokens(data, json.spec)
+    r = json.parser.parse(tokens, recover=True, max_repairs=4)
+    assert r.unwrap(recover=True) == value
+    assert json.parser.parse(tokens, recover=True, max_repairs=1).unwrap(
+        recover=True
+    ) is not None
+
+
+def test_max_repairs_many_errors() -> None:
+    data = "[" + ", ".join(['{"a": [1 2, }'] * 20) + "]"
+    tokens = split_tokens(data, json.spec)
+    r = json.parser.parse(tokens, recover=True, max_repairs=8)
+    assert len(getattr(r, "_result").repairs) <= 8
+    assert r.unwrap(recover=True) == [{"a": [1]}] * 20
+    with pytest.raises(ParseError) as err:
+        r.unwrap()
+    assert len(err.value.errors) == 40
+
+
+@pytest.mark.parametrize("max_repairs", [0, -1])
+def test_max_repairs_invalid(max_repairs: int) -> None:
+    tokens = split_tokens("[1, 2]", json.spec)
+    with pytest.raises(ValueError):
+        json.parser.parse(tokens, recover=True, max_repairs=max_repairs)
+    with pytest.raises(ValueError):
+        parse(json.parser, tokens, recover=True, max_repairs=max_repairs)
+
+
+@pytest.mark.parametrize("data", [
+    d[0] for ds in (
+        DATA_POSITIVE, DATA_NEGATIVE, DATA_RECOVERY
+    ) for d in ds  # type: ignore
+] + ["[1,\n 2\n 3]", "{\n  \"a\": [\n}", "[1, @]"])
+@pytest.mark.parametrize("recover", [False, True])
+def test_token_array(data: str, recover: bool) -> None:
+    def run(tokens: Sequence[Token]) -> object:
+        try:
+            return parse(json.parser, tokens, recover).unwrap(recover)
+        except ParseError as err:
+            return str(err)
+
+    tokens = TokenArray(data, json.spec)
+    assert list(tokens) == split_tokens(data, json.spec)
+    assert [(t.start, t.end) for t in tokens] == [
+        (t.start, t.end) for t in split_tokens(data, json.spec)
+    ]
+    assert run(tokens) == run(split_tokens(data, json.spec))
+
+
+def test_find_kind() -> None:
+    data = '[1, "a", 2, {"b": 3}]'
+    tokens = TokenArray(data, json.spec)
+    kinds = [t.kind for t in tokens]
+    for kind in ("integer", "string", "punct", "unknown"):
+        for start in range(len(tokens) + 1):
+            found = [i for i in range(start, len(tokens)) if kinds[i] == kind]
+            assert tokens.find_kind(kind, start) == (
+                found[0] if found else -1
+            )
+
+
+def test_kind_index() -> None:
+    data = '[1, "a", 2, {"b": 3}, [4, "c"], 5]'
+    tokens = split_tokens(data, json.spec)
+    kinds = [t.kind for t in tokens]
+    queries = [
+        (kind, start, stop)
+        for kind in ("integer", "string", "punct", "unknown")
+        for start in range(len(tokens) + 1)
+        for stop in (start, start + 1, start + 3, len(tokens))
+    ]
+    # Searches go back and forth, as the repairs of a parse do
+    queries = queries[::2] + queries[1::2][::-1]
+    for stream in (
+            tokens, TokenArray(data, json.spec),
+            LazyTokens(io.StringIO(data), json.spec, 4)):
+        index = KindIndex(stream)
+        for kind, start, stop in queries:
+            found = [i for i in range(start, stop) if kinds[i:i + 1] == [kind]]
+            assert index.find(kind, start, stop) == (
+                found[0] if found else -1
+            )
+
+
+def test_token_array_error() -> None:
+    with pytest.raises(LexError) as err:
+        TokenArray("1\n 2 #", re.compile(r"(?P<num>[0-9]+)|\s+"))
+    assert str(err.value) == "Lexing error at 2:4"
+
+
+@pytest.mark.parametrize("data", [
+    "[1, 2]", "[]", "[1 2]", "[1,,2]", "1]", "[1, +]", "[[1]]"
+])
+@pytest.mark.parametrize("recover", [False, True])
+def test_token_punct(data: str, recover: bool) -> None:
+    def items(
+            num: Parser[Sequence[Token], Token],
+            punct: Callable[[str], Parser[Sequence[Token], Token]]
+    ) -> Parser[Sequence[Token], List[Token]]:
+        return num.sep_by(punct(",")).between(punct("["), punct("]"))
+
+    def run(
+            parser: Parser[Sequence[Token], List[Token]],
+            tokens: Sequence[Token]) -> object:
+        try:
+            return parse(parser, tokens, recover).unwrap(recover)
+        except ParseError as err:
+            return str(err), [(e.loc, e.expected) for e in err.errors]
+
+    spec = re.compile(r"(?P<num>[0-9]+)|(?P<punct>[\[\],])|(?P<op>[+])|\s+")
+    expected = items(
+        satisfy(lambda t: t.kind == "num").label("num"),
+        lambda x: sym(Token("punct", x), repr(x))
+    )
+    parser = items(token("num"), punct)
+    for tokens in (split_tokens(data, spec), TokenArray(data, spec)):
+        assert run(parser, tokens) == run(expected, tokens)
+
+
+@pytest.mark.parametrize("data", [
+    d[0] for ds in (
+        DATA_POSITIVE, DATA_NEGATIVE, DATA_RECOVERY
+    ) for d in ds  # type: ignore
+] + ["[1,\n 2\n 3]", "{\n  \"a\": [\n}", "[1, @]", "1 2 3 4"])
+@pytest.mark.parametrize("recover", [False, True])
+def test_lazy_tokens(data: str, recover: bool) -> None:
+    def run(tokens: Sequence[Token]) -> object:
+        try:
+            return parse(json.parser, tokens, recover).unwrap(recover)
+        except ParseError as err:
+            return str(err), [(e.loc, e.expected) for e in err.errors]
+
+    tokens = split_tokens(data, json.spec)
+    lazy = LazyTokens(io.StringIO(data), json.spec, 16)
+    assert [(t, t.start, t.end) for t in lazy] == [
+        (t, t.start, t.end) for t in tokens
+    ]
+    lazy = LazyTokens(io.StringIO(data), json.spec, 16, 64 if recover else 2)
+    assert run(lazy) == run(tokens)
+
+
+def test_lazy_tokens_window() -> None:
+    tokens = LazyTokens(io.StringIO("1 2 3 4 5 6"), json.spec, window=2)
+    assert tokens[5] == Token("integer", "6")
+    assert tokens[-1] == Token("integer", "6")
+    with pytest.raises(ValueError):
+        tokens[0]
+
+
+def test_lazy_tokens_error() -> None:
+    with pytest.raises(LexError) as err:
+        list(LazyTokens(
+            io.StringIO("1\n 2 #"), re.compile(r"(?P<num>[0-9]+)|\s+"), 2
+        ))
+    assert str(err.value) == "Lexing error at 2:4"
+
+
+def test_parse_iter() -> None:
+    spec = re.compile(r"(?P<num>[0-9]+)|\s+")
+    items = parse_iter(
+        token("num").many(), LazyTokens(io.StringIO("1 2 3 #"), spec)
+    )
+    assert next(items) == Token("num", "1")
+    assert next(items) == Token("num", "2")
+    with pytest.raises(LexError):
+        next(items)
+
+
+def walk(value: object) -> Iterator[Tuple[str, object]]:
+    if isinstance(value, dict):
+        yield "start_object", None
+        for k, v in value.items():
+            yield "key", k
+            yield from walk(v)
+        yield "end_object", None
+    elif isinstance(value, list):
+        yield "start_array", None
+        for v in value:
+            yield from walk(v)
+        yield "end_array", None
+    else:
+        yield "value", value
+
+
+@pytest.mark.parametrize("data, expected", DATA_POSITIVE)
+def test_events(data: str, expected: object) -> None:
+    events: List[Tuple[str, object]] = []
+    parser = json_events.events(lambda *e: events.append(e))
+    for tokens in (split_tokens(data, json.spec), TokenArray(data, json.spec)):
+        events.clear()
+        parse(parser, tokens).unwrap()
+        assert events == list(walk(expected))
+        events.clear()
+        parse(compile_parser(parser), tokens).unwrap()
+        assert events == list(walk(expected))
+
+
+def test_events_stream() -> None:
+    data = "[" + ", ".join('{"a": [1, true]}' for _ in range(2000)) + "]"
+    counts: Dict[str, int] = {}
+    first: List[int] = []
+    file = io.StringIO(data)
+
+    def emit(kind: str, value: object) -> None:
+        counts[kind] = counts.get(kind, 0) + 1
+        if not first:
+            first.append(file.tell())
+
+    parser = json_events.events(emit)
+    for p in (parser, compile_parser(parser)):
+        counts.clear()
+        first.clear()
+        file.seek(0)
+        # The window of two tokens fails if the parser looks back further
+        assert parse(p, LazyTokens(file, json.spec, 64, 2)).unwrap() is None
+        assert first[0] < len(data) // 10
+        assert counts == {
+            "start_array": 2001, "end_array": 2001, "start_object": 2000,
+            "end_object": 2000, "key": 2000, "value": 4000,
+        }
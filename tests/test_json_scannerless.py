@@ -53,6 +53,22 @@ def test_negative(data: str, expected: str) -> None:
     assert str(err.value) == expected
 
 
+@pytest.mark.parametrize("data", [
+    d[0] for ds in (DATA_POSITIVE, DATA_NEGATIVE) for d in ds  # type: ignore
+] + ["[1,\n 2\n 3]", "{\n  \"a\": [\n}"])
+@pytest.mark.parametrize("recover", [False, True])
+def test_untracked(data: str, recover: bool) -> None:
+    def run(track_loc: bool) -> object:
+        try:
+            return parse(
+                json_scannerless.parser, data, recover, track_loc=track_loc
+            ).unwrap(recover)
+        except ParseError as err:
+            return str(err)
+
+    assert run(False) == run(True)
+
+
 DATA_RECOVERY: List[Tuple[str, object, str]] = [
     ("1 1", 1, "at 1:3: expected end of file (skipped 1 token)"),
     ("{", {}, "at 1:2: expected string or '}' (inserted '}')"),
@@ -0,0 +1,22 @@
+import pytest
+
+from reparsec import ParseError, Parser
+from reparsec.sequence import eof
+
+from .test_sep_by import ab, comma
+
+
+@pytest.mark.parametrize("parser, sep, value", [
+    (ab.many(), "", ["ab"] * 3000),
+    (ab.sep_by(comma), ",", ["ab"] * 3000),
+    (ab.skip_many(), "", None),
+])
+def test_recovery_many_errors(
+        parser: Parser[str, object], sep: str, value: object) -> None:
+    result = (parser << eof()).parse(
+        sep.join(["a_b"] * 3000), recover=True, max_repairs=4
+    )
+    assert result.unwrap(recover=True) == value
+    with pytest.raises(ParseError) as err:
+        result.unwrap()
+    assert len(err.value.errors) == 3000
@@ -0,0 +1,238 @@
+from typing import Any, Callable, Dict, List, Sequence
+
+import pytest
+
+from reparsec import Delay, ParseError, Parser, ParseResult
+from reparsec.layout import aligned, block
+from reparsec.lexer import parse, split_tokens
+from reparsec.scannerless import literal
+from reparsec.scannerless import parse as sl_parse
+from reparsec.scannerless import regexp
+from reparsec.sequence import digit, eof, satisfy, sym
+
+from .parsers import expr, json, yamlish
+
+a = sym("a")
+b = sym("b")
+c = sym("c")
+
+
+def counted(parser: Parser[Sequence[str], str]) -> Parser[Sequence[str], str]:
+    calls: List[int] = []
+
+    def count(v: str) -> str:
+        calls.append(0)
+        return v
+
+    counted_parser = parser.fmap(count)
+    setattr(counted_parser, "calls", calls)
+    return counted_parser
+
+
+def test_memo_backtracking() -> None:
+    item = counted(a)
+    delayed = Delay[Sequence[str], str]()
+    delayed.define(item)
+    parser = (delayed + b).attempt() | (delayed + c)
+
+    assert parser.parse("ac").unwrap() == ("a", "c")
+    assert len(getattr(item, "calls")) == 2
+
+    del getattr(item, "calls")[:]
+    assert parser.parse("ac", memo=True).unwrap() == ("a", "c")
+    assert len(getattr(item, "calls")) == 1
+
+
+def test_memo_method() -> None:
+    item = counted(a)
+    parser = (item.memo() + b).attempt() | (item.memo() + c)
+
+    assert parser.parse("ac").unwrap() == ("a", "c")
+    assert len(getattr(item, "calls")) == 2
+
+    del getattr(item, "calls")[:]
+    assert parser.parse("ac", memo=True).unwrap() == ("a", "c")
+    assert len(getattr(item, "calls")) == 1
+
+
+def test_memo_nested_alternatives() -> None:
+    item = counted(a)
+    nested = Delay[Sequence[str], object]()
+    nested.define(
+        (item + nested + b).attempt() | (item + nested + c).attempt() | item
+    )
+
+    data = "a" * 12 + "c" * 11
+    assert nested.parse(data, memo=True).unwrap() is not None
+    assert len(getattr(item, "calls")) < 2 * len(data)
+
+
+@pytest.mark.parametrize("data", ["?", "x?", "3?", "10x"])
+def test_memo_recovery_alternatives(data: str) -> None:
+    calls: List[str] = []
+
+    def is_x(v: str) -> bool:
+        calls.append(v)
+        return v == "x"
+
+    rule: Parser[Sequence[str], object] = satisfy(is_x).label("x")
+    for i in range(12):
+        nested = Delay[Sequence[str], object]()
+        nested.define(rule | sym(str(i)) + rule.recover_with("x"))
+        rule = nested
+    parser = rule << eof()
+
+    def run(memo: bool) -> object:
+        try:
+            return parser.parse(data, recover=True, memo=memo).unwrap(True)
+        except ParseError as err:
+            return str(err)
+
+    expected = run(False)
+    del calls[:]
+    assert run(True) == expected
+    assert len(calls) < 100
+
+
+@pytest.mark.parametrize("data, expected", [
+    ("ac", "at 1: expected 'b'"),
+    ("abb", "at 2: expected end of file"),
+])
+def test_memo_errors(data: str, expected: str) -> None:
+    delayed = Delay[Sequence[str], object]()
+    delayed.define(a + b)
+    parser = ((delayed + c).attempt() | delayed) << eof()
+
+    with pytest.raises(ParseError) as err:
+        parser.parse(data, memo=True).unwrap()
+    assert str(err.value) == expected
+
+
+def test_memo_layout() -> None:
+    ws = regexp(r"\s*")
+    item = Delay[str, str]()
+    item.define(aligned(a) << ws)
+    parser = block(item.many()) + (ws >> block(item.many())) << eof()
+
+    assert sl_parse(parser, "a\na\n a\n a", memo=True).unwrap() == (
+        ["a", "a"], ["a", "a"]
+    )
+
+
+@pytest.mark.parametrize("data", [
+    "1", '{"a": [1, 2.0, true, null, "b"]}', '[[[[]]], {"a": {}}]'
+])
+@pytest.mark.parametrize("recover", [False, True])
+def test_memo_json(data: str, recover: bool) -> None:
+    tokens = split_tokens(data, json.spec)
+    assert (
+        parse(json.parser, tokens, recover, memo=True).unwrap() ==
+        parse(json.parser, tokens, recover).unwrap()
+    )
+
+
+GRAMMARS: Dict[str, Callable[[str, bool], ParseResult[object, Any]]] = {
+    "json": lambda data, memo: parse(
+        json.parser, split_tokens(data, json.spec), True, memo=memo
+    ),
+    "expr": lambda data, memo: sl_parse(expr.parser, data, True, memo=memo),
+    "yamlish": lambda data, memo: sl_parse(
+        yamlish.parser, data, True, memo=memo
+    ),
+}
+
+
+@pytest.mark.parametrize("grammar, data", [
+    ("json", "1 1"),
+    ("json", "{"),
+    ("json", "[1, [{, 2]"),
+    ("json", '{"key": ]'),
+    ("json", '{"key": 0, ]'),
+    ("json", '{"a", "b", "c", "d"}'),
+    ("expr", ""),
+    ("expr", "1 +"),
+    ("expr", "1 + 2 * * (3 + 4 5)"),
+    ("expr", "((1)"),
+    ("expr", ")(1"),
+    ("yamlish", "foo:\n  bar: baz\n   qux: quux"),
+    ("yamlish", "foo: bar\n  baz: qux"),
+    ("yamlish", "foo:\nbar"),
+])
+def test_memo_recovery_grammars(grammar: str, data: str) -> None:
+    def outcome(memo: bool, recover: bool) -> object:
+        try:
+            return GRAMMARS[grammar](data, memo).unwrap(recover)
+        except ParseError as err:
+            return str(err)
+
+    for recover in (False, True):
+        assert outcome(True, recover) == outcome(False, recover)
+
+
+@pytest.mark.parametrize("data", [")", ")(a", "(", "((a)b)", "(a"])
+def test_memo_recovery_insertion(data: str) -> None:
+    # The parser is called again at the same position after an inserted
+    # parenthesis, which is not a left recursion
+    parens = Delay[str, object]()
+    parens.define(
+        literal("(") >> (parens + literal("b")).maybe() << literal(")") |
+        literal("a")
+    )
+
+    def outcome(memo: bool) -> object:
+        try:
+            return sl_parse(parens << eof(), data, True, memo=memo).unwrap()
+        except ParseError as err:
+            return str(err)
+
+    assert outcome(True) == outcome(False)
+
+
+num = digit.fmap(int)
+sub = Delay[Sequence[str], int]()
+sub.define((sub + sym("-") + num).fmap(lambda v: v[0][0] - v[1]) | num)
+sub_chain = num.chainl1(sym("-").fmap(lambda _: lambda x, y: x - y))
+
+
+@pytest.mark.parametrize("data, expected", [
+    ("1", 1),
+    ("5-1-1", 3),
+    ("9-2-3-1", 3),
+])
+@pytest.mark.parametrize("recover", [False, True])
+def test_memo_left_recursion(data: str, expected: int, recover: bool) -> None:
+    assert (sub << eof()).parse(data, recover, memo=True).unwrap() == expected
+
+
+def outcome(
+        parser: Parser[Sequence[str], int], data: str,
+        **kwargs: bool) -> object:
+    try:
+        return parser.parse(data, **kwargs).unwrap(kwargs["recover"])
+    except ParseError as err:
+        return str(err)
+
+
+@pytest.mark.parametrize("data", ["", "5-", "5-1-", "5x", "5-a-1"])
+@pytest.mark.parametrize("recover", [False, True])
+def test_memo_left_recursion_errors(data: str, recover: bool) -> None:
+    assert (
+        outcome(sub << eof(), data, recover=recover, memo=True) ==
+        outcome(sub_chain << eof(), data, recover=recover)
+    )
+
+
+@pytest.mark.parametrize("data, expected", [
+    ("y", "y"),
+    ("yzx", "((yz)x)"),
+    ("wxzx", "(((wx)z)x)"),
+])
+@pytest.mark.parametrize("recover", [False, True])
+def test_memo_indirect_left_recursion(
+        data: str, expected: str, recover: bool) -> None:
+    x = Delay[Sequence[str], str]()
+    z = Delay[Sequence[str], str]()
+    x.define((z + sym("x")).fmap(lambda v: "(" + v[0] + "x)") | sym("y"))
+    z.define((x + sym("z")).fmap(lambda v: "(" + v[0] + "z)") | sym("w"))
+
+    assert (x << eof()).parse(data, recover, memo=True).unwrap() == expected
@@ -0,0 +1,132 @@
+from typing import Callable, List, Sequence
+
+import pytest
+
+from reparsec import Delay, ParseError, Parser, chainl1, chainr1
+from reparsec.codegen import compile_parser
+from reparsec.operators import expr_table, infixl, infixr, postfix, prefix
+from reparsec.scannerless import parse
+from reparsec.sequence import eof, sym
+
+from . import test_expr
+from .parsers import expr
+
+Unary = Callable[[str], str]
+Binary = Callable[[str, str], str]
+
+
+def unary(op: str) -> Parser[Sequence[str], Unary]:
+    return sym(op).fmap(lambda _: lambda a: "({}{})".format(op, a))
+
+
+def binary(op: str) -> Parser[Sequence[str], Binary]:
+    return sym(op).fmap(lambda _: lambda a, b: "({}{}{})".format(a, op, b))
+
+
+def apply_prefix(v: "tuple[List[Unary], str]") -> str:
+    ops, res = v
+    for op in reversed(ops):
+        res = op(res)
+    return res
+
+
+def apply_postfix(v: "tuple[str, List[Unary]]") -> str:
+    res, ops = v
+    for op in ops:
+        res = op(res)
+    return res
+
+
+atom = sym("a") | sym("b") | sym("c")
+operand = Delay[Sequence[str], str]()
+layered = Delay[Sequence[str], str]()
+
+term: Parser[Sequence[str], str] = operand
+term = (unary("-") | unary("~")).many().then(term).fmap(apply_prefix)
+term = term.then(unary("!").many()).fmap(apply_postfix)
+term = chainr1(term, binary("^"))
+term = unary("#").many().then(term).fmap(apply_prefix)
+term = term.then(unary("?").many()).fmap(apply_postfix)
+term = chainl1(term, binary("*") | binary("/"))
+term = chainl1(term, binary("+") | binary("-"))
+layered.define(term)
+
+table = expr_table(operand, [
+    [prefix(unary("-")), prefix(unary("~")), postfix(unary("!"))],
+    [infixr(binary("^"))],
+    [prefix(unary("#")), postfix(unary("?"))],
+    [infixl(binary("*")), infixl(binary("/"))],
+    [infixl(binary("+")), infixl(binary("-"))],
+])
+operand.define(atom | table.between(sym("("), sym(")")))
+
+
+def outcome(
+        parser: Parser[Sequence[str], object], data: str,
+        recover: bool) -> object:
+    try:
+        return parser.parse(data, recover).unwrap(recover)
+    except ParseError as err:
+        return str(err)
+
+
+@pytest.mark.parametrize("data", [
+    "a", "-a", "--a", "~-a", "a!", "a!!", "-a!", "#a", "#-a?", "-#a",
+    "a+b", "a-b", "a+b*c", "a*b+c", "a-b-c", "a^b^c", "a^-b", "-a^b",
+    "a*b^c*a", "a+b*c^a!-b", "#a+b", "a+#b*c", "a*#b", "#a^b?*c?",
+    "a?!", "a!?", "a+b?", "-a?", "(a+b)*c", "-(a)!", "a*(b+c)^#a",
+    "a/b/c*a", "#-#a", "a^b?",
+    "", "+", "a+", "ab", "a+*b", "a^", "(a", "a+b)", "-", "a--b", "a#b",
+    "a+(b*)", "a*-", "a?-", "(a+b", "a+-+b", "a*(#)", "a b",
+])
+@pytest.mark.parametrize("recover", [False, True])
+def test_expr_table(data: str, recover: bool) -> None:
+    assert (
+        outcome(table << eof(), data, recover) ==
+        outcome(layered << eof(), data, recover)
+    )
+
+
+@pytest.mark.parametrize("data", ["a", "a+b*c", "#a^b?*c?", "a+", "(a"])
+def test_expr_table_compiled(data: str) -> None:
+    compiled = compile_parser(table << eof())
+    for recover in (False, True):
+        assert (
+            outcome(compiled, data, recover) ==
+            outcome(table << eof(), data, recover)
+        )
+
+
+def test_expr_table_mixed_associativity() -> None:
+    with pytest.raises(ValueError):
+        expr_table(atom, [[infixl(binary("+")), infixr(binary("-"))]])
+
+
+def test_expr_table_empty() -> None:
+    assert outcome(expr_table(atom, []) << eof(), "a", False) == "a"
+
+
+arith = Delay[str, int]()
+arith.define(expr_table(
+    expr.number | arith.between(expr.l_paren, expr.r_paren),
+    [[infixl(expr.mul_op)], [infixl(expr.add_op)]]
+))
+
+
+@pytest.mark.parametrize("data", [
+    d[0] for ds in (
+        test_expr.DATA_POSITIVE, test_expr.DATA_NEGATIVE,
+        test_expr.DATA_RECOVERY
+    ) for d in ds  # type: ignore
+])
+@pytest.mark.parametrize("recover", [False, True])
+def test_expr_table_arith(data: str, recover: bool) -> None:
+    def run(parser: Parser[str, int]) -> object:
+        try:
+            return parse(parser << eof(), data, recover=recover).unwrap(
+                recover
+            )
+        except ParseError as err:
+            return str(err)
+
+    assert run(arith) == run(expr.expr)
@@ -0,0 +1,32 @@
+from typing import List, Sequence
+
+import pytest
+
+from reparsec import ParseError, Parser
+
+from .test_sep_by import a, ab, b, comma, outcome, semi
+
+
+@pytest.mark.parametrize("parser", [
+    ab.many(), (a | b).many(), ab.sep_by(comma), ab.sep_by1(comma),
+    ab.sep_by(comma.attempt() | semi),
+    (a | b).sep_by((comma + comma).attempt())
+])
+@pytest.mark.parametrize("data", [
+    "", "ab", "ab,ab", "ab,ab,", "ab,,ab", "ab,abab", "ab,a,ab", "ab;ab",
+    "ab,b", "b", "a,,b", "a,,", "abab", "aba",
+])
+def test_parse_iter(
+        parser: Parser[Sequence[str], List[str]], data: str) -> None:
+    def run() -> object:
+        try:
+            return list(parser.parse_iter(data))
+        except ParseError as err:
+            return str(err), [(e.loc, e.expected, e.op) for e in err.errors]
+
+    assert run() == outcome(parser, data, False)
+
+
+def test_parse_iter_not_many() -> None:
+    with pytest.raises(ValueError):
+        ab.parse_iter("ab")
@@ -1,8 +1,13 @@
-from typing import List, Tuple
+from typing import List, Optional, Sequence, Tuple
 
 import pytest
 
-from reparsec import Parser
+from reparsec import ParseError, Parser
+from reparsec.core.repair import (
+    Insert, OpItem, Ops, RepairOp, Skip, ops_items, ops_join,
+    ops_prepend_expected, ops_set_expected
+)
+from reparsec.core.types import Loc
 from reparsec.sequence import eof, sym
 
 a = sym("a")
@@ -49,6 +54,9 @@ DATA_RECOVERY: List[Tuple[Parser[str, object], str, object]] = [
     (ab.sep_by(comma), "ab,abab", ["ab", "ab"]),
     (ab.sep_by(comma), "ab,a,ab", ["ab", "ab", "ab"]),
     (ab.sep_by(comma), "ab,b,ab", ["ab", "ab", "ab"]),
+    (ab.sep_by1(comma), "", ["ab"]),
+    (ab.sep_by1(comma), "b,ab", ["ab", "ab"]),
+    (ab.sep_by1(comma), "ab,,ab", ["ab", "ab"]),
     (ab | a, "ab", "ab"),
     (ab.attempt() | a, "ab", "ab"),
     (ab | a, "a", "ab"),
@@ -83,3 +91,63 @@ def test_recovery(
         parser: Parser[str, object], data: str, expected: object) -> None:
     result = (parser << eof()).parse(data, recover=True)
     assert result.unwrap(recover=True) == expected
+
+
+@pytest.mark.parametrize("parser, data, expected", DATA_RECOVERY)
+def test_recovery_sequences(
+        parser: Parser[str, object], data: str, expected: object) -> None:
+    for stream in (list(data), tuple(data)):
+        result = (parser << eof()).parse(stream, recover=True)
+        assert result.unwrap(recover=True) == expected
+
+
+@pytest.mark.parametrize("data", [
+    "a___bab__", "_ab", "a_b_", "ab,,ab", "__", "ab_,ab", "a__",
+])
+@pytest.mark.parametrize("max_skip", [0, 1, 2, 3])
+def test_recovery_max_skip(data: str, max_skip: int) -> None:
+    parser = (ab | c).sep_by(comma.maybe()) << eof()
+
+    def errors(
+            stream: Sequence[str],
+            limit: Optional[int]) -> List[Tuple[Loc, Optional[RepairOp]]]:
+        try:
+            parser.parse(stream, recover=True, max_skip=limit).unwrap()
+        except ParseError as err:
+            return [(e.loc, e.op) for e in err.errors]
+        return []
+
+    def fits(errs: List[Tuple[Loc, Optional[RepairOp]]]) -> bool:
+        return all(
+            type(op) is not Skip or op.count <= max_skip for _, op in errs
+        )
+
+    for stream in (data, list(data)):
+        limited = errors(stream, max_skip)
+        assert fits(limited)
+        # The limit only removes repairs, so the best one stays if it fits
+        best = errors(stream, None)
+        if fits(best):
+            assert limited == best
+
+
+def test_recovery_max_skip_negative() -> None:
+    with pytest.raises(ValueError):
+        ab.parse("ab", recover=True, max_skip=-1)
+
+
+def test_repair_ops() -> None:
+    first = OpItem(Skip(1), Loc(0, 1, 1))
+    ops: Ops = first
+    for i in range(1, 10000):
+        item = OpItem(Insert("a"), Loc(i, 1, i + 1), ["a"])
+        ops = ops_set_expected(
+            ops_join(ops, ops_prepend_expected(item, ["b"], i % 2 == 0)),
+            ["x"]
+        )
+    items = ops_items(ops)
+    assert [item.loc.pos for item in items] == list(range(10000))
+    assert [list(item.expected) for item in items] == [
+        ["b", "a"] if i and i % 2 == 0 else ["x"] for i in range(10000)
+    ]
+    assert first.expected == ()
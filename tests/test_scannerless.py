@@ -0,0 +1,269 @@
+from typing import Callable, Dict, Iterable, Iterator, List, Union
+
+import pytest
+
+from reparsec import Loc, ParseError, Parser
+from reparsec.codegen import compile_parser
+from reparsec.core.scannerless import LineIndex, get_loc
+from reparsec.scannerless import (
+    feeder, literal, one_of, parse, parse_iter, regexp
+)
+from reparsec.sequence import eof
+
+keywords = ["if", "in", "int", "import", "else", "elif", "=", "==", "=>"]
+keyword_chain = literal("import")
+for kw in sorted(keywords, key=len, reverse=True)[1:]:
+    keyword_chain |= literal(kw)
+
+DATA = ["if", "in", "int", "import", "impor", "el", "elif", "==", "=", "=>"]
+
+
+@pytest.mark.parametrize("data", DATA)
+def test_one_of(data: str) -> None:
+    parser = one_of(*keywords) << regexp(".*")
+    chain = keyword_chain << regexp(".*")
+    try:
+        expected = parse(chain, data).unwrap()
+    except ParseError:
+        with pytest.raises(ParseError):
+            parse(parser, data).unwrap()
+    else:
+        assert parse(parser, data).unwrap() == expected
+
+
+@pytest.mark.parametrize("data", DATA)
+def test_one_of_end(data: str) -> None:
+    # The input ends right after the literal
+    parser = one_of(*keywords) << eof()
+    chain = keyword_chain << eof()
+    try:
+        expected = parse(chain, data).unwrap()
+    except ParseError:
+        with pytest.raises(ParseError):
+            parse(parser, data).unwrap()
+    else:
+        assert parse(parser, data).unwrap() == expected
+
+
+@pytest.mark.parametrize("values, data, expected", [
+    ({"if": 1, "i": 2}, "i", 2),
+    ({"a": 1, "ab": 2, "b": 3}, "a", 1),
+    ({"a": 1, "ab": 2, "b": 3}, "ab", 2),
+])
+def test_one_of_prefix(
+        values: Dict[str, int], data: str, expected: int) -> None:
+    assert parse(one_of(values) << eof(), data).unwrap() == expected
+
+
+def test_one_of_mapping() -> None:
+    values: Dict[str, object] = {"true": True, "false": False, "null": None}
+    parser = one_of(values).sep_by(literal(",")) << eof()
+
+    assert parser.parse("null,true,false").unwrap() == [None, True, False]
+
+
+@pytest.mark.parametrize("data, expected", [
+    ("a", "at 0: expected 'cd', 'b' or 'c'"),
+    ("bx", "at 1: expected end of file"),
+])
+def test_one_of_errors(data: str, expected: str) -> None:
+    with pytest.raises(ParseError) as err:
+        (one_of("b", "cd", "c") << eof()).parse(data).unwrap()
+    assert str(err.value) == expected
+
+
+@pytest.mark.parametrize("data, value", [
+    ("xcd", "cd"),
+    ("", "cd"),
+])
+def test_one_of_recovery(data: str, value: str) -> None:
+    parser: Parser[str, str] = one_of("b", "cd", "c") << eof()
+    assert parser.parse(data, recover=True).unwrap(True) == value
+
+
+@pytest.mark.parametrize("data", ["", "x", "xa", "xab", "abab", "a,", "ab,x"])
+def test_one_of_recovery_prefix(data: str) -> None:
+    # The repairs follow the longer literal first, whatever the argument order
+    chain = (literal("ab") | literal("a")).sep_by(literal(",")) << eof()
+    expected = outcome(chain, data, True)
+    for values in (("a", "ab"), ("ab", "a")):
+        parser = one_of(*values).sep_by(literal(",")) << eof()
+        assert outcome(parser, data, True) == expected
+
+
+def test_one_of_empty() -> None:
+    with pytest.raises(ValueError):
+        one_of()
+    with pytest.raises(ValueError):
+        one_of("a", "")
+
+
+def outcome(parser: Parser[str, object], data: str, recover: bool) -> object:
+    try:
+        return parse(parser, data, recover).unwrap()
+    except ParseError as err:
+        return str(err), [(e.loc, e.expected, e.op) for e in err.errors]
+
+
+ws = r"(?:\s|#[^\n]*)*"
+
+
+@pytest.mark.parametrize("data", [
+    "", "a", "a1", "a 1", "a # x\n 1 ", "a1 a 2", " a1", "a  x 1", "ab1",
+    "a\n1 a", "1",
+])
+@pytest.mark.parametrize("recover", [False, True])
+def test_trivia(data: str, recover: bool) -> None:
+    parser = (
+        literal("a", trivia=ws) + regexp("[0-9]+", trivia=ws)
+    ).many() << eof()
+    expected = (
+        (literal("a") << regexp(ws)) + (regexp("[0-9]+") << regexp(ws))
+    ).many() << eof()
+    for p in (parser, compile_parser(parser)):
+        assert outcome(p, data, recover) == outcome(expected, data, recover)
+
+
+@pytest.mark.parametrize("pat, group", [
+    (r"(?i)ab", 0), (r"(a)\1", 0), (r"(a)\1", 1), (r"(?P<x>a)b", "x"),
+    (r"(?P<x>a)(?P=x)", 0), (r"(?P<x>a)b", 0), (r"a(b)?", 1),
+])
+@pytest.mark.parametrize("data", [
+    "", "ab", "AB ab", "aa", "aa aa # x\n", "ab  ab", "a ab", "abab",
+])
+@pytest.mark.parametrize("recover", [False, True])
+def test_regexp_trivia(
+        pat: str, group: Union[int, str], data: str, recover: bool) -> None:
+    parser = regexp(pat, group, trivia=ws).many() << eof()
+    expected = (regexp(pat, group) << regexp(ws)).many() << eof()
+    for p in (parser, compile_parser(parser)):
+        assert outcome(p, data, recover) == outcome(expected, data, recover)
+
+
+@pytest.mark.parametrize("data", [
+    "", "ab1", "ab 1 ab", "ab # x\n ab2", "b1", "ab ab", "abx",
+])
+@pytest.mark.parametrize("recover", [False, True])
+def test_regexp_trivia_fused(data: str, recover: bool) -> None:
+    parser = (
+        regexp("(a)b", 1, trivia=ws) + regexp("[0-9]*", trivia=ws)
+    ).many() << eof()
+    expected = (
+        (regexp("(a)b", 1) << regexp(ws)) + (regexp("[0-9]*") << regexp(ws))
+    ).many() << eof()
+    for p in (parser, compile_parser(parser)):
+        assert outcome(p, data, recover) == outcome(expected, data, recover)
+
+
+def test_trivia_not_empty() -> None:
+    with pytest.raises(ValueError):
+        literal("a", trivia=" +")
+
+
+@pytest.mark.parametrize("data", ["", "a", "\n", "ab\ncd", "\n\na\n", "a\n\n"])
+def test_line_index(data: str) -> None:
+    index = LineIndex(data)
+    positions = range(len(data) + 1)
+    for start in positions:
+        loc = get_loc(Loc(0, 0, 0), data, start)
+        assert index.get_loc(Loc(0, 0, 0), data, start) == loc
+        for pos in positions:
+            assert index.get_loc(loc, data, pos) == get_loc(
+                Loc(0, 0, 0), data, pos
+            )
+
+
+@pytest.mark.parametrize("data", [
+    "ab\ncd;\nef", "ab\ncd;\n1", "ab\n;\ncd\n", "ab\ncd\n\n;",
+])
+@pytest.mark.parametrize("recover", [False, True])
+def test_untracked_errors(data: str, recover: bool) -> None:
+    steps: List[int] = []
+
+    def counting_get_loc(loc: Loc, stream: str, pos: int) -> Loc:
+        steps.append(pos - loc.pos)
+        return get_loc(loc, stream, pos)
+
+    parser = (
+        (regexp("[a-z]+") + literal(";")).attempt() | regexp("[a-z]+")
+    ).sep_by(literal("\n")) << eof()
+
+    def run(track_loc: bool) -> object:
+        try:
+            return parser.parse(
+                data, recover, get_loc=counting_get_loc, track_loc=track_loc
+            ).unwrap(recover)
+        except ParseError as err:
+            return [(e.loc, e.expected, e.op) for e in err.errors]
+
+    expected = run(True)
+    steps.clear()
+    assert run(False) == expected
+    # Only the reported errors are located, each from the previous one
+    assert all(step >= 0 for step in steps)
+    assert sum(steps) <= len(data)
+
+
+record = regexp(r"[a-z]+") + (literal("=") >> regexp(r"[0-9]+"))
+
+
+@pytest.mark.parametrize("parser, lookahead", [
+    (record.sep_by(literal("\n")), 1),
+    (record.sep_by1(literal(";\n")), 2),
+    ((record << literal("\n")).many(), 1),
+])
+@pytest.mark.parametrize("data", [
+    "", "a=1", "a=1\nbc=22\ndef=333", "a=1;\nbc=22;\ndef=333", "a=1\n",
+    "a=1\nb=", "a=1\nbb\n", "a=1;\nb", "a=1\n=2", "a=1\nb=2\n\nc=3",
+])
+@pytest.mark.parametrize("size", [1, 2, 3, 100])
+@pytest.mark.parametrize("track_loc", [False, True])
+def test_feeder(
+        parser: Parser[str, List[object]], lookahead: int, data: str,
+        size: int, track_loc: bool) -> None:
+    def feed() -> Iterator[object]:
+        f = feeder(parser, lookahead=lookahead, track_loc=track_loc)
+        for i in range(0, len(data), size):
+            yield from f.feed(data[i:i + size])
+        yield from f.close()
+        yield from f.close()
+
+    expected = run_iter(lambda: parse_iter(parser, data))
+    assert run_iter(feed) == expected
+    assert run_iter(
+        lambda: parse_iter(parser, data, track_loc=track_loc)
+    ) == expected
+
+
+def run_iter(values: Callable[[], Iterable[object]]) -> List[object]:
+    res: List[object] = []
+    try:
+        res.extend(values())
+    except ParseError as err:
+        res.append([(e.loc, e.expected) for e in err.errors])
+    return res
+
+
+@pytest.mark.parametrize("parser", [
+    regexp(r'"[^"]*"').sep_by(literal(",")),
+    (literal("abc") | literal("xyz")).sep_by(literal(",")),
+    regexp(r"[a-z]+").sep_by(literal(", ")),
+])
+@pytest.mark.parametrize("data", [
+    '"hello world","hello"', '"a",,"b"', '"a","b', "abc,xyz,abc", "abc,xya",
+    "ab,c", "ab, cd, ef", "ab,,cd", "ab, cd,",
+])
+@pytest.mark.parametrize("lookahead", [1, 4])
+def test_feeder_split_token(
+        parser: Parser[str, List[object]], data: str,
+        lookahead: int) -> None:
+    expected = run_iter(lambda: parse_iter(parser, data))
+    for split in range(len(data) + 1):
+        def feed() -> Iterator[object]:
+            f = feeder(parser, lookahead=lookahead)
+            yield from f.feed(data[:split])
+            yield from f.feed(data[split:])
+            yield from f.close()
+            yield from f.close()
+
+        assert run_iter(feed) == expected
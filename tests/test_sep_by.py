@@ -0,0 +1,84 @@
+from typing import Callable, List, Sequence, TypeVar
+
+import pytest
+
+from reparsec import ParseError, Parser, many, maybe, seq, seqr
+from reparsec.codegen import compile_parser
+from reparsec.sequence import eof, sym
+
+A = TypeVar("A")
+
+a = sym("a")
+b = sym("b")
+ab = (a + b).fmap("".join)
+comma = sym(",")
+semi = sym(";")
+
+
+def composed_sep_by(
+        parser: Parser[Sequence[str], A],
+        sep: Parser[Sequence[str], object]
+) -> Parser[Sequence[str], List[A]]:
+    return maybe(seq(parser, many(seqr(sep, parser)))).fmap(
+        lambda v: [] if v is None else [v[0]] + v[1]
+    )
+
+
+def composed_sep_by1(
+        parser: Parser[Sequence[str], A],
+        sep: Parser[Sequence[str], object]
+) -> Parser[Sequence[str], List[A]]:
+    return seq(parser, many(seqr(sep, parser))).fmap(
+        lambda v: [v[0]] + v[1]
+    )
+
+
+def outcome(
+        parser: Parser[Sequence[str], object], data: str,
+        recover: bool) -> object:
+    try:
+        return parser.parse(data, recover).unwrap(recover)
+    except ParseError as err:
+        return str(err), [(e.loc, e.expected, e.op) for e in err.errors]
+
+
+Make = Callable[
+    [Parser[Sequence[str], str], Parser[Sequence[str], object]],
+    Parser[Sequence[str], List[str]]
+]
+PARSERS: List[Callable[[Make], Parser[Sequence[str], object]]] = [
+    lambda sep_by: sep_by(ab, comma) << eof(),
+    lambda sep_by: sep_by(ab, comma.attempt() | semi) << eof(),
+    lambda sep_by: sep_by(a | b, (comma + comma).attempt()) << eof(),
+    lambda sep_by: (sep_by(ab, comma) + sep_by(a, semi)) << eof(),
+    lambda sep_by: (sep_by(ab, comma) | sym("x").fmap(list)) << eof(),
+    lambda sep_by: sep_by(ab.label("AB"), comma.label("C")) + a.maybe(),
+]
+
+
+@pytest.mark.parametrize("make", PARSERS)
+@pytest.mark.parametrize("data", [
+    "", "ab", "ab,ab", "ab,ab,", "ab,,ab", "ab,abab", "ab,a,ab", "ab;ab",
+    "ab,b", "b", "a,,b", "a,,", "ab,ab;a;a", "ab,x", "x", "abab", "aba",
+])
+@pytest.mark.parametrize("recover", [False, True])
+def test_sep_by(
+        make: Callable[[Make], Parser[Sequence[str], object]], data: str,
+        recover: bool) -> None:
+    assert outcome(
+        make(lambda p, s: p.sep_by(s)), data, recover
+    ) == outcome(make(composed_sep_by), data, recover)
+    assert outcome(
+        make(lambda p, s: p.sep_by1(s)), data, recover
+    ) == outcome(make(composed_sep_by1), data, recover)
+    assert outcome(
+        compile_parser(make(lambda p, s: p.sep_by(s))), data, recover
+    ) == outcome(make(composed_sep_by), data, recover)
+    assert outcome(
+        compile_parser(make(lambda p, s: p.sep_by1(s))), data, recover
+    ) == outcome(make(composed_sep_by1), data, recover)
+
+
+def test_sep_by_empty_item() -> None:
+    with pytest.raises(RuntimeError):
+        a.maybe().sep_by(comma.maybe()).parse("a")
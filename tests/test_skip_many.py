@@ -0,0 +1,23 @@
+import pytest
+
+from reparsec.codegen import compile_parser
+from reparsec.sequence import eof
+
+from .test_sep_by import a, ab, outcome
+
+
+@pytest.mark.parametrize("data", [
+    "", "ab", "abab", "aba", "abb", "b", "ab,", "abaab",
+])
+@pytest.mark.parametrize("recover", [False, True])
+def test_skip_many(data: str, recover: bool) -> None:
+    cases = [
+        (ab.skip_many(), ab.many()),
+        (ab.skip_many1(), ab + ab.many()),
+    ]
+    for parser, expected in cases:
+        for tail in (eof(), a.maybe()):
+            for p in (parser, compile_parser(parser)):
+                assert outcome(p + tail, data, recover) == outcome(
+                    expected.fmap(lambda _: None) + tail, data, recover
+                )
@@ -2,6 +2,9 @@ from typing import List, Tuple
 
 import pytest
 
+from reparsec import ParseError
+from reparsec.scannerless import parse
+
 from .parsers import yamlish
 
 DATA_POSITIVE: List[Tuple[str, object]] = [
@@ -35,3 +38,19 @@ qux: quux
 @pytest.mark.parametrize("data, expected", DATA_POSITIVE)
 def test_positive(data: str, expected: object) -> None:
     assert yamlish.loads(data) == expected
+
+
+@pytest.mark.parametrize("data", [d[0] for d in DATA_POSITIVE] + [
+    "foo:\n  bar: baz\n   qux: quux", "foo:\nbar", "foo: bar\n  baz: qux",
+])
+@pytest.mark.parametrize("recover", [False, True])
+def test_untracked(data: str, recover: bool) -> None:
+    def run(track_loc: bool) -> object:
+        try:
+            return parse(
+                yamlish.parser, data, recover, track_loc=track_loc
+            ).unwrap(recover)
+        except ParseError as err:
+            return str(err)
+
+    assert run(False) == run(True)